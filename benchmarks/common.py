@@ -0,0 +1,32 @@
+from functools import lru_cache
+
+import pandas as pd
+
+from entsog.parsers import parse_general
+from entsog.synthetic import generate_payload
+
+START = pd.Timestamp('2022-01-01', tz='UTC')
+
+
+@lru_cache(maxsize=None)
+def payload(endpoint: str, rows: int, period_type: str = 'day') -> str:
+    """Synthetic response of an endpoint, cached so every benchmark only measures its own path"""
+    return generate_payload(endpoint, rows, start=START, period_type=period_type)
+
+
+def operational_frame(rows: int) -> pd.DataFrame:
+    return parse_general(payload('/operationaldatas', rows))
+
+
+def grouped_input(rows: int) -> pd.DataFrame:
+    """Operational data joined with its point directions, the input of parse_grouped_operational_aggregates"""
+    flows = operational_frame(rows)
+    points = parse_general(payload('/operatorpointdirections', 400)).rename(columns={
+        't_so_country': 'tso_country',
+        't_so_balancing_zone': 'tso_balancing_zone',
+        'e_u_relationship': 'eu_relationship',
+    })
+    points = points.drop_duplicates(subset=['point_key', 'direction_key', 'operator_key'])
+    data = pd.merge(flows, points, on=['point_key', 'direction_key', 'operator_key'], suffixes=('', '_point'))
+    data['value'] = data['value'].astype(float)
+    return data
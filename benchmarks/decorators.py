@@ -0,0 +1,49 @@
+import pandas as pd
+
+from entsog.decorators import week_limited
+from entsog.misc import week_blocks
+from entsog.parsers import parse_operational_data
+
+from .common import START, payload
+
+BLOCKS = 20
+OVERLAP = 0.01  # Share of every block that is repeated in the next one, as happens on block boundaries
+
+
+def _blocks(rows: int):
+    """Slices a frame of `rows` records into overlapping blocks, one per week"""
+    base = parse_operational_data(payload('/operationaldatas', min(rows, 100_000)), False)
+    data = pd.concat([base] * -(-rows // len(base)), ignore_index=True).iloc[:rows]
+    data['value'] = range(len(data))  # Every record unique, except the overlapping ones
+
+    size = -(-rows // BLOCKS)
+    overlap = int(size * OVERLAP)
+    return [data.iloc[max(i * size - overlap, 0):(i + 1) * size] for i in range(BLOCKS)]
+
+
+class _Client:
+
+    def __init__(self, frames):
+        self.frames = frames
+
+    @week_limited
+    def query_blocks(self, start, end):
+        return self.frames[start]
+
+
+class ConcatDedupe:
+    params = [10_000, 1_000_000, 10_000_000]
+    param_names = ['rows']
+    timeout = 600
+
+    def setup(self, rows):
+        self.end = START + pd.Timedelta(weeks=BLOCKS)
+        frames = _blocks(rows)
+        starts = [start for start, _ in week_blocks(START, self.end)]
+        self.client = _Client(dict(zip(starts, frames)))
+
+    def time_week_limited(self, rows):
+        self.client.query_blocks(start=START, end=self.end)
+
+    def peakmem_week_limited(self, rows):
+        self.client.query_blocks(start=START, end=self.end)
@@ -0,0 +1,26 @@
+import pandas as pd
+
+from entsog import EntsogPandasClient
+from entsog.server import EntsogServer
+
+from .common import START
+
+
+class FetchLocal:
+    """Request and parse operational data from a local EntsogServer, so only the client is measured"""
+
+    params = [10_000, 100_000]
+    param_names = ['rows']
+
+    def setup(self, rows):
+        self.server = EntsogServer(rows={'/operationaldatas': rows}).start()
+        self.client = EntsogPandasClient(base_url=self.server.url, retry_delay=0)
+        self.end = START + pd.Timedelta(days=7)
+        # Warm the synthetic data of the server
+        self.client.query_operational_point_data(start=START, end=self.end, point_directions=['x'])
+
+    def teardown(self, rows):
+        self.server.stop()
+
+    def time_query_operational_point_data(self, rows):
+        self.client.query_operational_point_data(start=START, end=self.end, point_directions=['x'])
@@ -0,0 +1,18 @@
+class Import:
+    """Cold start cost, every timeraw_ benchmark runs in a fresh interpreter"""
+
+    def timeraw_import_entsog(self):
+        return "import entsog"
+
+    def timeraw_import_client(self):
+        return "from entsog import EntsogPandasClient"
+
+    def timeraw_create_client(self):
+        return """
+        from entsog import EntsogPandasClient
+        EntsogPandasClient()
+        """
+
+    def timeraw_import_pandas(self):
+        # Reference point: what importing entsog cost when it loaded pandas eagerly
+        return "import pandas"
@@ -0,0 +1,125 @@
+from entsog import parsers
+
+from .common import payload, grouped_input
+
+# Parsers taking (json_text, verbose) and the endpoint producing their input
+PARSERS = {
+    'parse_operational_data': '/operationaldatas',
+    'parse_interruptions': '/interruptions',
+    'parse_CMP_auction_premiums': '/cmpauctions',
+    'parse_CMP_unavailable_firm_capacity': '/cmpunavailables',
+    'parse_CMP_unsuccesful_requests': '/cmpUnsuccessfulRequests',
+    'parse_aggregate_data': '/aggregatedData',
+}
+
+
+class ExtractData:
+    params = [10_000, 100_000]
+    param_names = ['rows']
+
+    def setup(self, rows):
+        self.json = payload('/operationaldatas', rows)
+
+    def time_extract_data(self, rows):
+        parsers._extract_data(self.json)
+
+    def peakmem_extract_data(self, rows):
+        parsers._extract_data(self.json)
+
+
+class Parse:
+    params = [sorted(PARSERS), [10_000, 100_000]]
+    param_names = ['parser', 'rows']
+
+    def setup(self, parser, rows):
+        self.parser = getattr(parsers, parser)
+        self.json = payload(PARSERS[parser], rows)
+
+    def time_parse(self, parser, rows):
+        self.parser(self.json, False)
+
+    def peakmem_parse(self, parser, rows):
+        self.parser(self.json, False)
+
+
+class ParseReference:
+    params = [['parse_general', 'parse_interconnections', 'parse_operator_points_directions'], [1_000, 10_000]]
+    param_names = ['parser', 'rows']
+
+    ENDPOINTS = {
+        'parse_general': '/urgentmarketmessages',
+        'parse_interconnections': '/interconnections',
+        'parse_operator_points_directions': '/operatorpointdirections',
+    }
+
+    def setup(self, parser, rows):
+        self.parser = getattr(parsers, parser)
+        self.json = payload(self.ENDPOINTS[parser], rows)
+
+    def time_parse(self, parser, rows):
+        self.parser(self.json)
+
+
+class ParseTariffs:
+    params = [[False, True], [10_000, 100_000]]
+    param_names = ['melt', 'rows']
+
+    def setup(self, melt, rows):
+        self.json = payload('/tariffsfulls', rows)
+        self.sim_json = payload('/tariffsSimulations', rows)
+
+    def time_parse_tariffs(self, melt, rows):
+        parsers.parse_tariffs(self.json, verbose=False, melt=melt)
+
+    def peakmem_parse_tariffs(self, melt, rows):
+        parsers.parse_tariffs(self.json, verbose=False, melt=melt)
+
+    def time_parse_tariffs_sim(self, melt, rows):
+        parsers.parse_tariffs_sim(self.sim_json, verbose=False, melt=melt)
+
+
+class ParseAggregateDataComplex:
+    params = [[None, 'point', 'operator', 'balancing_zone', 'country', 'region'], [10_000, 100_000]]
+    param_names = ['group_type', 'rows']
+
+    def setup(self, group_type, rows):
+        self.json = payload('/aggregatedData', rows)
+        self.interconnections = parsers.parse_interconnections(payload('/interconnections', 1_000))
+
+    def time_parse_aggregate_data_complex(self, group_type, rows):
+        parsers.parse_aggregate_data_complex(self.json, self.interconnections, group_type=group_type)
+
+
+class GroupedOperationalAggregates:
+    params = [['point', 'operator', 'balancing_zone', 'country', 'region'], [10_000, 100_000, 1_000_000]]
+    param_names = ['group_type', 'rows']
+    timeout = 300
+
+    def setup(self, group_type, rows):
+        self.data = grouped_input(rows)
+
+    def time_grouped_operational_aggregates(self, group_type, rows):
+        parsers.parse_grouped_operational_aggregates(self.data, group_type, entry_exit=False)
+
+    def peakmem_grouped_operational_aggregates(self, group_type, rows):
+        parsers.parse_grouped_operational_aggregates(self.data, group_type, entry_exit=False)
+
+
+class OperationalRollup:
+    params = [10_000, 100_000, 1_000_000]
+    param_names = ['rows']
+    timeout = 300
+
+    def setup(self, rows):
+        self.data = grouped_input(rows)
+        self.rollup = parsers.rollup_operational_aggregates(self.data, entry_exit=False)
+        self.rollup['point']
+
+    def time_all_levels(self, rows):
+        rollup = parsers.rollup_operational_aggregates(self.data, entry_exit=False)
+        for level in rollup.levels:
+            rollup[level]
+
+    def time_drill_down_cached(self, rows):
+        for level in ('region', 'country', 'balancing_zone', 'operator', 'point'):
+            self.rollup[level]
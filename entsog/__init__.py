@@ -1,2 +1,23 @@
-from .entsog import EntsogRawClient, EntsogPandasClient, __version__
-from .mappings import Area
+import importlib
+
+# Names are resolved on first access (PEP 562), so `import entsog` does not pull in pandas and requests
+_EXPORTS = {
+    'EntsogRawClient': '.entsog',
+    'EntsogPandasClient': '.entsog',
+    '__version__': '.entsog',
+    'Area': '.mappings',
+}
+
+__all__ = [name for name in _EXPORTS if not name.startswith('_')]
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,75 @@
+import importlib
+import importlib.util
+import sys
+import threading
+import types
+
+# One lock for all lazy modules: a module imported by another one (numpy by pandas) cannot deadlock
+_LOCK = threading.RLock()
+# Lazy modules handed out so far, by name
+_MODULES = {}
+
+
+class _LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that imports it on first attribute access. It is not put in sys.modules, so
+    the import itself is a regular, thread-safe one; unlike importlib.util.LazyLoader, which is not
+    thread-safe before Python 3.12 and lets other threads see a half-executed module.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        with _LOCK:
+            module = self.__dict__['_module']
+            if module is None:
+                module = importlib.import_module(self.__name__)
+                # Later lookups of the attributes present now skip __getattr__
+                self.__dict__.update({k: v for k, v in module.__dict__.items() if k not in ('__name__', '__spec__')})
+                self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, name: str):
+        return getattr(self._load(), name)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name: str):
+    """
+    Returns a module that is only imported on first attribute access, so importing entsog stays cheap
+    for code paths that never touch it (e.g. pandas or requests in short-lived jobs).
+
+    Parameters
+    ----------
+    name : str
+        e.g. 'pandas' or 'dateutil.rrule'
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    with _LOCK:
+        if name not in _MODULES:
+            if importlib.util.find_spec(name) is None:
+                raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+            _MODULES[name] = _LazyModule(name)
+        return _MODULES[name]
+
+
+def load(*modules):
+    """
+    Imports lazy modules now, e.g. before starting threads that would all need them at the same time
+
+    Parameters
+    ----------
+    *modules
+        modules returned by lazy_import, all of them when none are given
+    """
+    with _LOCK:
+        modules = modules or tuple(_MODULES.values())
+    for module in modules:
+        if isinstance(module, _LazyModule):
+            module._load()
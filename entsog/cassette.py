@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import urllib.parse
+from datetime import timedelta
+from typing import Dict, Optional
+
+from .exceptions import CassetteMissError
+from ._lazy import lazy_import
+
+requests = lazy_import('requests')
+
+MODES = ('record', 'replay', 'auto')
+
+
+def _successful(status_code: int) -> bool:
+    return 200 <= status_code < 300
+
+
+class Cassette:
+    """
+    Records every response of EntsogRawClient._base_request to a directory, so it can be replayed without network.
+
+    Every interaction is stored as one gzip file named after a hash of the endpoint and the query parameters.
+    The file holds a line of JSON metadata (url, params, status, headers) followed by the raw response body,
+    so replaying only needs a decompress and no decoding of the body itself.
+
+    Modes:
+        record : always perform the request and (over)write the recording
+        replay : never touch the network, raise CassetteMissError for unrecorded requests
+        auto   : replay when recorded, otherwise perform the request and record it
+
+    Only successful (2xx) responses are recorded, so a request that failed during an outage is performed
+    again (and retried) next time instead of replaying the error.
+
+    Usage:
+        client = EntsogPandasClient(cassette=Cassette('fixtures/operational', mode='auto'))
+    """
+
+    def __init__(self, path: str, mode: str = 'auto', compresslevel: int = 6):
+        """
+        Parameters
+        ----------
+        path : str
+            directory containing the recordings, created when needed
+        mode : str
+            'record', 'replay' or 'auto'
+        compresslevel : int
+            gzip compression level of new recordings
+        """
+        if mode not in MODES:
+            raise ValueError(f"mode should be one of {MODES}, not {mode}")
+
+        self.path = path
+        self.mode = mode
+        self.compresslevel = compresslevel
+        self._loaded = {}
+
+    @staticmethod
+    def key(endpoint: str, params: Dict) -> str:
+        query = urllib.parse.urlencode(sorted((str(k), str(v)) for k, v in params.items()))
+        return hashlib.sha1(f"{endpoint}?{query}".encode('utf-8')).hexdigest()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.gz")
+
+    def __len__(self):
+        if not os.path.isdir(self.path):
+            return len(self._loaded)
+        return len({name[:-3] for name in os.listdir(self.path) if name.endswith('.gz')} | set(self._loaded))
+
+    def _read(self, key: str):
+        if key in self._loaded:
+            return self._loaded[key]
+
+        try:
+            with open(self._file(key), 'rb') as f:
+                raw = gzip.decompress(f.read())
+        except FileNotFoundError:
+            return None
+
+        meta, body = raw.split(b'\n', 1)
+        return json.loads(meta), body
+
+    def preload(self):
+        """Reads all recordings into memory, so replays in benchmarks do not measure disk access"""
+        if not os.path.isdir(self.path):
+            return
+        for name in os.listdir(self.path):
+            if name.endswith('.gz'):
+                key = name[:-3]
+                self._loaded[key] = self._read(key)
+
+    def play(self, endpoint: str, params: Dict) -> Optional[requests.Response]:
+        """
+        Returns the recorded response for a request, or None when it should be performed
+
+        Parameters
+        ----------
+        endpoint : str
+        params : dict
+            the full query parameters of the request
+
+        Returns
+        -------
+        requests.Response
+        """
+        if self.mode == 'record':
+            return None
+
+        recording = self._read(self.key(endpoint, params))
+        if recording is None:
+            if self.mode == 'replay':
+                raise CassetteMissError(f"No recording of {endpoint} with params {params} in {self.path}")
+            return None
+
+        meta, body = recording
+        if self.mode == 'auto' and not _successful(meta['status_code']):
+            # Recorded by an older version, an error is not worth replaying when the server can be asked
+            return None
+        response = requests.Response()
+        response.status_code = meta['status_code']
+        response.headers = requests.structures.CaseInsensitiveDict(meta['headers'])
+        response.url = meta['url']
+        response.encoding = meta['encoding'] or 'utf-8'
+        response.elapsed = timedelta(0)
+        response._content = body
+        return response
+
+    def record(self, endpoint: str, params: Dict, response: requests.Response):
+        """
+        Stores a response, unless it is an error
+
+        Parameters
+        ----------
+        endpoint : str
+        params : dict
+            the full query parameters of the request
+        response : requests.Response
+        """
+        if not _successful(response.status_code):
+            return
+
+        os.makedirs(self.path, exist_ok=True)
+        key = self.key(endpoint, params)
+        meta = {
+            'endpoint': endpoint,
+            'params': {str(k): str(v) for k, v in params.items()},
+            'url': response.url,
+            'status_code': response.status_code,
+            'headers': dict(response.headers),
+            'encoding': response.encoding,
+        }
+        raw = json.dumps(meta).encode('utf-8') + b'\n' + response.content
+
+        # Write to a temporary file first, so concurrent readers never see half a recording
+        temp = f"{self._file(key)}.{os.getpid()}.tmp"
+        with open(temp, 'wb') as f:
+            f.write(gzip.compress(raw, compresslevel=self.compresslevel))
+        os.replace(temp, self._file(key))
+
+        if key in self._loaded:
+            self._loaded[key] = (meta, response.content)
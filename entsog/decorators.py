@@ -1,13 +1,35 @@
 import sys
+import urllib.parse
 from socket import gaierror
 from time import sleep
-import requests
 from functools import wraps
+from typing import List, Optional, Tuple
 from .exceptions import NoMatchingDataError, PaginationError, BadGatewayError, TooManyRequestsError, NotFoundError
-import pandas as pd
 import logging
 
-from .misc import year_blocks, day_blocks, month_blocks, week_blocks
+from ._lazy import lazy_import
+
+from .metrics import current_request
+from .tracing import span
+from .mappings import lookup_indicator
+from .misc import year_blocks, day_blocks, month_blocks, week_blocks, batch_pairs
+
+pd = lazy_import('pandas')
+requests = lazy_import('requests')
+
+# Characters of a /operationaldatas url besides the base url and the keys: the endpoint and every parameter
+# EntsogRawClient.query_operational_data and _request send, with their longest values (a page of
+# documents_limited, an hourly period), so only the point directions and indicators are left to batch
+URL_OVERHEAD = len('/operationaldatas?' + urllib.parse.urlencode({
+    'limit': 10000, 'timeZone': 'UCT', 'from': '2022-01-01', 'to': '2022-01-01', 'periodType': 'hour',
+    'offset': 250000, 'indicator': '', 'pointDirection': '',
+}))
+
+
+def _drop_duplicates(df):
+    # Records repeated in several requests differ only in their url column, e.g. on block boundaries
+    subset = [column for column in df.columns if column != 'url']
+    return df.drop_duplicates(subset=subset or None, keep='first')
 
 
 def retry(func):
@@ -19,9 +41,13 @@ def retry(func):
         error = None
         for r in range(self.retry_count):
             try:
-                result = func(*args, **kwargs)
+                with span('entsog.attempt', attempt=r + 1):
+                    result = func(*args, **kwargs)
             except (requests.ConnectionError, gaierror, BadGatewayError, TooManyRequestsError) as e:
                 error = e
+                record = current_request()
+                if record is not None:
+                    record.retries += 1
                 retry_delay = self.retry_delay * (r + 1) # Exponential backoff
                 print(f"Connection error, retrying in {retry_delay} seconds", file=sys.stderr)
                 sleep(retry_delay)
@@ -43,8 +69,10 @@ def paginated(func):
             df = func(*args, start=start, end=end, **kwargs)
         except PaginationError:
             pivot = start + (end - start) / 2
-            df1 = pagination_wrapper(*args, start=start, end=pivot, **kwargs)
-            df2 = pagination_wrapper(*args, start=pivot, end=end, **kwargs)
+            with span('entsog.split', start=start, end=pivot):
+                df1 = pagination_wrapper(*args, start=start, end=pivot, **kwargs)
+            with span('entsog.split', start=pivot, end=end):
+                df2 = pagination_wrapper(*args, start=pivot, end=end, **kwargs)
             df = pd.concat([df1, df2])
         return df
 
@@ -59,7 +87,8 @@ def documents_limited(n):
             frames = []
             for offset in range(0, 250_000 + n, n):
                 try:
-                    frame = func(*args, offset=offset, **kwargs)
+                    with span('entsog.page', offset=offset, limit=n):
+                        frame = func(*args, offset=offset, **kwargs)
                     sleep(0.25)
                     frames.append(frame)
                 except NoMatchingDataError:
@@ -74,7 +103,7 @@ def documents_limited(n):
                 raise NoMatchingDataError
 
             df = pd.concat(frames, sort=True)
-            df = df.drop_duplicates(keep = 'first')
+            df = _drop_duplicates(df)
             return df
         return documents_wrapper
     return decorator
@@ -90,7 +119,8 @@ def year_limited(func):
         frames = []
         for _start, _end in blocks:
             try:
-                frame = func(*args, start=_start, end=_end, **kwargs)
+                with span('entsog.block', start=_start, end=_end):
+                    frame = func(*args, start=_start, end=_end, **kwargs)
             except NoMatchingDataError:
                 logging.debug(f"NoMatchingDataError: between {_start} and {_end}")
                 frame = None
@@ -101,7 +131,7 @@ def year_limited(func):
             raise NoMatchingDataError
 
         df = pd.concat(frames, sort=True)
-        df = df.drop_duplicates(keep = 'first')
+        df = _drop_duplicates(df)
         return df
         
     return year_wrapper
@@ -117,7 +147,8 @@ def month_limited(func):
         frames = []
         for _start, _end in blocks:
             try:
-                frame = func(*args, start=_start, end=_end, **kwargs)
+                with span('entsog.block', start=_start, end=_end):
+                    frame = func(*args, start=_start, end=_end, **kwargs)
             except NoMatchingDataError:
                 logging.debug(f"NoMatchingDataError: between {_start} and {_end}")
                 frame = None
@@ -128,7 +159,7 @@ def month_limited(func):
             raise NoMatchingDataError
 
         df = pd.concat(frames, sort=True)
-        df = df.drop_duplicates(keep = 'first')
+        df = _drop_duplicates(df)
         return df
 
     return month_wrapper
@@ -144,7 +175,8 @@ def day_limited(func):
         frames = []
         for _start, _end in blocks:
             try:
-                frame = func(*args, start=_start, end=_end, **kwargs)
+                with span('entsog.block', start=_start, end=_end):
+                    frame = func(*args, start=_start, end=_end, **kwargs)
             except NoMatchingDataError:
                 print(f"NoMatchingDataError: between {_start} and {_end}", file=sys.stderr)
                 frame = None
@@ -156,7 +188,7 @@ def day_limited(func):
 
         df = pd.concat(frames)
 
-        df = df.drop_duplicates(keep = 'first')
+        df = _drop_duplicates(df)
 
         return df
 
@@ -173,7 +205,8 @@ def week_limited(func):
         frames = []
         for _start, _end in blocks:
             try:
-                frame = func(*args, start=_start, end=_end, **kwargs)
+                with span('entsog.block', start=_start, end=_end):
+                    frame = func(*args, start=_start, end=_end, **kwargs)
             except NoMatchingDataError:
                 print(f"NoMatchingDataError: between {_start} and {_end}", file=sys.stderr)
                 frame = None
@@ -184,7 +217,7 @@ def week_limited(func):
             raise NoMatchingDataError
 
         df = pd.concat(frames)
-        df = df.drop_duplicates(keep = 'first')
+        df = _drop_duplicates(df)
 
         return df
 
@@ -201,7 +234,8 @@ def operator_limited(func):
         frames = []
         for _operator in blocks:
             try:
-                frame = func(*args, operator = _operator, **kwargs)
+                with span('entsog.block', operator=_operator):
+                    frame = func(*args, operator = _operator, **kwargs)
             except NoMatchingDataError:
                 print(f"NoMatchingDataError: {_operator}", file=sys.stderr)
                 frame = None
@@ -215,3 +249,89 @@ def operator_limited(func):
         return df
 
     return operator_wrapper
+
+
+def reference_cached(name):
+    """Serves calls without filters from the reference data kept in memory by EntsogPandasClient.warm,
+    refreshing a dataset once its time to live has passed"""
+
+    def decorator(func):
+        @wraps(func)
+        def reference_wrapper(self, *args, **kwargs):
+            filtered = args or any(value is not None for value in kwargs.values())
+            if filtered or not self._reference_enabled:
+                return func(self, *args, **kwargs)
+
+            frame = self._reference_get(name)
+            if frame is None:
+                frame = func(self, *args, **kwargs)
+                self._reference_put(name, frame)
+            return frame.copy()
+
+        return reference_wrapper
+
+    return decorator
+
+
+def url_batches(client, point_directions: Optional[List[str]],
+                indicators: Optional[List]) -> List[Tuple[Optional[List[str]], Optional[List]]]:
+    """
+    Splits point directions and indicators over as few /operationaldatas requests as fit in the
+    max_url_length of a client
+
+    Parameters
+    ----------
+    client : EntsogRawClient
+    point_directions : list
+    indicators : list
+        Indicators or their names
+
+    Returns
+    -------
+    list
+        (point directions, indicators) per request, None where none were given
+    """
+    # Length of everything but the keys: base url, endpoint, dates and the other params
+    budget = client.max_url_length - len(client.base_url) - URL_OVERHEAD
+    codes = {indicator: lookup_indicator(indicator).code for indicator in indicators or []}
+    originals = {code: indicator for indicator, code in codes.items()}
+    batches = batch_pairs(point_directions, [codes[i] for i in indicators] if indicators else None, budget)
+    return [(_point_directions, [originals[code] for code in _codes] if _codes is not None else None)
+            for _point_directions, _codes in batches]
+
+
+def url_limited(func):
+    """Deals with calls whose point_directions and indicators do not fit in a single url, by splitting
+    them over as few requests within the max_url_length of the client as possible. Combined with
+    the time blocking decorators every block is queried per batch."""
+
+    @wraps(func)
+    def url_wrapper(self, *args, point_directions=None, indicators=None, **kwargs):
+        batches = url_batches(self, point_directions, indicators)
+        if len(batches) == 1:
+            return func(self, *args, point_directions=point_directions, indicators=indicators, **kwargs)
+
+        frames = []
+        for _point_directions, _indicators in batches:
+            try:
+                with span('entsog.batch', point_directions=len(_point_directions or []),
+                          indicators=len(_indicators or [])):
+                    frame = func(self, *args, point_directions=_point_directions, indicators=_indicators, **kwargs)
+            except NoMatchingDataError:
+                logging.debug(f"NoMatchingDataError: for batch of {len(_point_directions or [])} point directions")
+                frame = None
+            except NotFoundError:
+                # The API answers 404 "No Data Found" for a batch without any data
+                logging.debug(f"NotFoundError: for batch of {len(_point_directions or [])} point directions")
+                frame = None
+            frames.append(frame)
+
+        if sum([f is None for f in frames]) == len(frames):
+            # All the data returned are void
+            raise NoMatchingDataError
+
+        df = pd.concat(frames)
+        df = _drop_duplicates(df)
+        return df
+
+    return url_wrapper
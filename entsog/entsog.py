@@ -1,16 +1,29 @@
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
 import urllib.parse
-import urllib.request
+from time import perf_counter
 from typing import List
-from typing import Union, Optional, Dict
-
-import pandas as pd
-import pytz
-import requests
-
-from .decorators import *
-from .exceptions import GatewayTimeOut, UnauthorizedError, BadGatewayError, TooManyRequestsError, NotFoundError
+from typing import Union, Optional, Dict, Callable
+
+from ._lazy import lazy_import, load
+from .decorators import retry, paginated, documents_limited, year_limited, week_limited, day_limited, \
+    reference_cached, url_limited
+from .exceptions import GatewayTimeOut, UnauthorizedError, BadGatewayError, TooManyRequestsError, NotFoundError, \
+    NoMatchingDataError
+from .cassette import Cassette
+from .reference import DATASETS, ReferenceData
+from .tracing import span, traced
+from .metrics import RequestMetrics, MetricsRegistry, current_request, set_current_request, emit
 from .mappings import Area, lookup_area, Indicator, lookup_balancing_zone, lookup_country, lookup_indicator, Country, BalancingZone
-from .parsers import *
+from .parsers import parse_general, parse_operational_data, parse_CMP_unsuccesful_requests, \
+    parse_CMP_unavailable_firm_capacity, parse_CMP_auction_premiums, parse_interruptions, parse_tariffs_sim, \
+    parse_tariffs, parse_interconnections, parse_operator_points_directions, parse_aggregate_data
+
+pd = lazy_import('pandas')
+pytz = lazy_import('pytz')
+requests = lazy_import('requests')
 
 __title__ = "entsog-py"
 __version__ = "1.0.3"
@@ -19,6 +32,14 @@ __license__ = "MIT"
 
 URL = 'https://transparency.entsog.eu/api/v1'
 OFFSET = 10000
+# Longest url (encoded) to send, well within the limits of common servers
+MAX_URL_LENGTH = 2000
+
+# Reference datasets EntsogPandasClient.warm can keep in memory, with the method fetching them
+REFERENCE_DATASETS = {name: method for name, (method, _) in DATASETS.items()}
+
+# Columns identifying the records of a reference dataset, used to join it onto other data
+REFERENCE_KEYS = {name: columns for name, (_, columns) in DATASETS.items()}
 
 class EntsogRawClient:
     """
@@ -30,10 +51,18 @@ class EntsogRawClient:
         Attributions: Entire framework is based upon the existing scraper for Entsoe authored from EnergieID.be
         """
 
+    # The pandas client emits the metrics of a request only after parsing its response
+    _parses_responses = False
+
     def __init__(
             self, session: Optional[requests.Session] = None,
             retry_count: int = 5, retry_delay: int = 3,
-            proxies: Optional[Dict] = None, timeout: Optional[int] = None):
+            proxies: Optional[Dict] = None, timeout: Optional[int] = None,
+            hooks: Optional[List[Callable[[RequestMetrics], None]]] = None,
+            metrics: Optional[MetricsRegistry] = None,
+            cassette: Optional[Cassette] = None,
+            base_url: str = URL,
+            max_url_length: int = MAX_URL_LENGTH):
         """
         Parameters
         ----------
@@ -45,6 +74,16 @@ class EntsogRawClient:
         proxies : dict
             requests proxies
         timeout : int
+        hooks : list of callables
+            called with a RequestMetrics object after every request
+        metrics : MetricsRegistry
+            registry in which the metrics of every request are collected
+        cassette : Cassette
+            records responses to disk and replays them without network
+        base_url : str
+            root of the API, e.g. the url of a local EntsogServer
+        max_url_length : int
+            encoded length of the request urls that point directions and indicators are batched into
         """
 
         if session is None:
@@ -54,8 +93,29 @@ class EntsogRawClient:
         self.retry_count = retry_count
         self.retry_delay = retry_delay
         self.timeout = timeout
+        self.hooks = list(hooks) if hooks is not None else []
+        self.metrics = metrics
+        self.cassette = cassette
+        self.base_url = base_url
+        self.max_url_length = max_url_length
+
+    def add_hook(self, hook: Callable[[RequestMetrics], None]):
+        """Registers a callable that receives a RequestMetrics object after every request"""
+        self.hooks.append(hook)
+
+    def _emit_metrics(self, record: RequestMetrics):
+        set_current_request(None)
+        emit(record, self.hooks, self.metrics)
+
+    def emit_request_metrics(self):
+        """
+        Emits the metrics of the last request if that did not happen yet: the pandas client emits them
+        after parsing, so code that skips parsing a response (e.g. because it did not change) calls this.
+        """
+        record = current_request()
+        if record is not None:
+            self._emit_metrics(record)
 
-    @retry
     def _base_request(self, endpoint: str, params: Dict) -> requests.Response:
 
         """
@@ -70,18 +130,55 @@ class EntsogRawClient:
         requests.Response
         """
 
-        url = URL + endpoint
+        record = RequestMetrics(endpoint, params)
+        set_current_request(record)
+        try:
+            with span('entsog.request', endpoint=endpoint):
+                response = self._request(endpoint, params)
+        except Exception as e:
+            record.error = type(e).__name__
+            self._emit_metrics(record)
+            raise
+
+        if not self._parses_responses:
+            self._emit_metrics(record)
+
+        return response
+
+    @retry
+    def _request(self, endpoint: str, params: Dict) -> requests.Response:
+
+        url = self.base_url + endpoint
         base_params = {
             'limit': -1,
             'timeZone': 'UCT'
         }
         # Update the default parameters and add the new ones.
         params = {**base_params, **params}
-        logging.debug(f'Performing request to {url} with params {params}')
+        record = current_request()
+
+        start = perf_counter()
+        response = None
+        if self.cassette is not None:
+            response = self.cassette.play(endpoint, params)
+            if record is not None:
+                record.cache = 'miss' if response is None else 'hit'
+
+        if response is None:
+            logging.debug(f'Performing request to {url} with params {params}')
+            encoded_params = urllib.parse.urlencode(params, safe=',')  # ENTSOG uses comma-seperated values
+            # UPDATE: ENTSOG now cannot handle verifications of SSL certificates. This is a temporary fix, will contact ENTSOG to fix this.
+            response = self.session.get(url=url, params=encoded_params, proxies=self.proxies, timeout=self.timeout)
+            if self.cassette is not None:
+                self.cassette.record(endpoint, params, response)
+
+        if record is not None:
+            record.url = response.url
+            record.status_code = response.status_code
+            record.response_bytes = len(response.content)
+            record.ttfb = response.elapsed.total_seconds()
+            record.download = max(perf_counter() - start - record.ttfb, 0.0)
 
-        params = urllib.parse.urlencode(params, safe=',')  # ENTSOG uses comma-seperated values
-        # UPDATE: ENTSOG now cannot handle verifications of SSL certificates. This is a temporary fix, will contact ENTSOG to fix this.
-        response = self.session.get(url=url, params=params, proxies=self.proxies, timeout=self.timeout)
         try:
             response.raise_for_status()
         except requests.HTTPError as e:
@@ -1026,9 +1123,9 @@ class EntsogRawClient:
             'from': self._datetime_to_str(start),
             'to': self._datetime_to_str(end),
         }
-        response_text, response_url = self._base_request(endpoint='/interruptions', params = params)
+        response = self._base_request(endpoint='/interruptions', params = params)
 
-        return response_text, response_url
+        return response.text, response.url
 
     def query_CMP_auction_premiums(self, start: pd.Timestamp, end: pd.Timestamp,
                                    period_type: str = 'day') -> str:
@@ -1353,11 +1450,175 @@ class EntsogRawClient:
 
 class EntsogPandasClient(EntsogRawClient):
 
-    def __init__(self):
-        super(EntsogPandasClient, self).__init__()
-        self._interconnections = None
-        self._operator_point_directions = None
+    _parses_responses = True
+
+    def __init__(self, *args, reference: Optional[ReferenceData] = None, **kwargs):
+        """
+        Parameters
+        ----------
+        reference : ReferenceData
+            registry to serve unfiltered reference queries from, e.g. a loaded snapshot; otherwise
+            one is kept in memory after warm()
+        *args, **kwargs
+            see EntsogRawClient
+        """
+        super(EntsogPandasClient, self).__init__(*args, **kwargs)
+        self._reference_enabled = reference is not None
+        # The ttl of warm() only applies to a registry of the client itself, never to one that was passed in
+        self._owns_reference = reference is None
+        self.reference = reference if reference is not None else ReferenceData(max_age='3600s')
+
+    def warm(self, datasets: Optional[List[str]] = None, ttl: Optional[float] = 3600,
+             max_workers: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Fetches reference datasets concurrently and keeps them in the reference registry. Afterwards calls of
+        their query methods without filters, and enrich(), are served from memory until the ttl passes,
+        after which the next call fetches the dataset again.
+
+        Parameters
+        ----------
+        datasets : list
+            names in REFERENCE_DATASETS, all of them by default
+        ttl : float
+            seconds to keep a dataset, None keeps it until the next warm(); sets the max_age of the registry
+            the client created, a registry passed to the client keeps its own max_age
+        max_workers : int
+            concurrent requests, one per dataset by default
+
+        Returns
+        -------
+        dict
+            name -> pd.DataFrame
+        """
+        datasets = list(datasets or REFERENCE_DATASETS)
+        unknown = set(datasets) - set(REFERENCE_DATASETS)
+        if unknown:
+            raise ValueError(f"Unknown reference datasets {sorted(unknown)}, should be in {list(REFERENCE_DATASETS)}")
+
+        self._reference_enabled = True
+        if self._owns_reference:
+            self.reference.max_age = f"{ttl}s" if ttl is not None else None
+        for name in datasets:
+            self.reference.discard(name)
+
+        # Import the heavy modules once here, rather than in every worker at the same moment
+        load()
+        with ThreadPoolExecutor(max_workers=max_workers or len(datasets)) as executor:
+            futures = {name: executor.submit(getattr(self, REFERENCE_DATASETS[name])) for name in datasets}
+            return {name: future.result() for name, future in futures.items()}
+
+    def _reference_get(self, name: str) -> Optional[pd.DataFrame]:
+        frame = self.reference.get(name)
+        if self.metrics is not None:
+            self.metrics.inc('reference_cache_total', dataset=name, result='hit' if frame is not None else 'miss')
+        return frame
+
+    def _reference_put(self, name: str, frame: pd.DataFrame):
+        self.reference.set(name, frame)
+
+    def _cached_reference(self, name: str) -> pd.DataFrame:
+        """A reference dataset from memory, fetched and kept for the ttl when it is not there (yet)"""
+        frame = self._reference_get(name)
+        if frame is None:
+            frame = getattr(self, REFERENCE_DATASETS[name])()
+            self._reference_put(name, frame)
+        return frame
+
+    def resolve_point_directions(self,
+                                 country_code: Optional[Union[Country, str, List]] = None,
+                                 balancing_zone: Optional[Union[BalancingZone, str, List]] = None,
+                                 operator: Optional[Union[str, List[str]]] = None) -> List[str]:
+        """
+        Expands countries, balancing zones and/or operators into the pointDirection keys
+        (operator key + point key + direction key) of their operator point directions with data.
+        Uses the operator point directions in memory, see warm().
+
+        Parameters
+        ----------
+        country_code : Union[Country, str, list]
+        balancing_zone : Union[BalancingZone, str, list]
+        operator : Union[str, list]
+            operator keys, e.g. 'DE-TSO-0001'
+
+        Returns
+        -------
+        list
+        """
+        def as_list(value):
+            return value if isinstance(value, (list, tuple, set)) else [value]
+
+        points = self._cached_reference('operator_point_directions')
+        mask = pd.Series(True, index=points.index)
+        if country_code is not None:
+            countries = [lookup_country(c).code for c in as_list(country_code)]
+            mask &= points['t_so_country'].isin(countries)
+        if balancing_zone is not None:
+            zones = [lookup_balancing_zone(b).code for b in as_list(balancing_zone)]
+            mask &= points['t_so_balancing_zone'].isin(zones)
+        if operator is not None:
+            mask &= points['operator_key'].isin(as_list(operator))
+        if 'has_data' in points.columns:
+            mask &= points['has_data'].fillna(0).astype(bool)
+
+        points = points[mask]
+        keys = points['operator_key'] + points['point_key'] + points['direction_key']
+        return sorted(keys.dropna().unique())
+
+    def enrich(self, data: pd.DataFrame, dataset: str = 'operator_point_directions',
+               on: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Left joins a reference dataset onto data, e.g. the point directions onto operational data.
+        The reference data comes from memory after warm().
 
+        Parameters
+        ----------
+        data : pd.DataFrame
+        dataset : str
+            name in REFERENCE_DATASETS
+        on : list
+            join columns, by default the keys of the dataset in REFERENCE_KEYS
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        on = on or REFERENCE_KEYS.get(dataset)
+        if on is None:
+            raise ValueError(f"No default join columns for {dataset}, please pass on")
+        missing = [column for column in on if column not in data.columns]
+        if missing:
+            raise ValueError(f"Cannot join {dataset} on {on}, data has no column(s) {missing}")
+
+        reference = self._cached_reference(dataset)
+        reference = reference.drop(columns=['url'], errors='ignore').drop_duplicates(subset=on)
+        return pd.merge(data, reference, on=on, how='left', suffixes=('', '_reference'))
+
+    def parse(self, parser: Callable, *args, **kwargs) -> pd.DataFrame:
+        """
+        Runs a parser on the response of the last request, records the parse time
+        and row count and emits the metrics of that request. Public for code that
+        performs the raw requests itself.
+        """
+        record = current_request()
+        if record is None:
+            return parser(*args, **kwargs)
+
+        start = perf_counter()
+        try:
+            data = parser(*args, **kwargs)
+            record.rows = len(data)
+        except Exception as e:
+            record.error = type(e).__name__
+            raise
+        finally:
+            # Exclude the JSON decoding, which the parser reports separately
+            record.parse = perf_counter() - start - (record.decode or 0)
+            self._emit_metrics(record)
+
+        return data
+
+    @traced
+    @reference_cached('connection_points')
     def query_connection_points(self) -> pd.DataFrame:
         """
         
@@ -1378,11 +1639,13 @@ class EntsogPandasClient(EntsogRawClient):
         json, url = super(EntsogPandasClient, self).query_connection_points(
 
         )
-        data = parse_general(json)
+        data = self.parse(parse_general, json)
         data['url'] = url
 
         return data
 
+    @traced
+    @reference_cached('operators')
     def query_operators(self,
                         country_code: Union[Country, str] = None,
                         has_data: int = 1) -> pd.DataFrame:
@@ -1405,11 +1668,13 @@ class EntsogPandasClient(EntsogRawClient):
         json, url = super(EntsogPandasClient, self).query_operators(
             country_code=country_code, has_data=has_data
         )
-        data = parse_general(json)
+        data = self.parse(parse_general, json)
         data['url'] = url
 
         return data
 
+    @traced
+    @reference_cached('balancing_zones')
     def query_balancing_zones(self) -> pd.DataFrame:
 
         """
@@ -1427,11 +1692,13 @@ class EntsogPandasClient(EntsogRawClient):
         json, url = super(EntsogPandasClient, self).query_balancing_zones(
 
         )
-        data = parse_general(json)
+        data = self.parse(parse_general, json)
         data['url'] = url
 
         return data
 
+    @traced
+    @reference_cached('operator_point_directions')
     def query_operator_point_directions(self,
                                         country_code: Optional[Union[Country, str]] = None) -> pd.DataFrame:
 
@@ -1453,11 +1720,13 @@ class EntsogPandasClient(EntsogRawClient):
         json, url = super(EntsogPandasClient, self).query_operator_point_directions(
             country_code=country_code
         )
-        data = parse_operator_points_directions(json)
+        data = self.parse(parse_operator_points_directions, json)
         data['url'] = url
 
         return data
 
+    @traced
+    @reference_cached('interconnections')
     def query_interconnections(self,
                                from_country_code: Union[Country, str] = None,
                                to_country_code: Union[Country, str] = None,
@@ -1509,10 +1778,12 @@ class EntsogPandasClient(EntsogRawClient):
             from_operator,
             to_operator
         )
-        data = parse_interconnections(json)
+        data = self.parse(parse_interconnections, json)
 
         return data
 
+    @traced
+    @reference_cached('aggregate_interconnections')
     def query_aggregate_interconnections(self,
                                          country_code: Optional[Union[Country, str]] = None) -> pd.DataFrame:
 
@@ -1534,11 +1805,12 @@ class EntsogPandasClient(EntsogRawClient):
         json, url = super(EntsogPandasClient, self).query_aggregate_interconnections(
             country_code=country_code
         )
-        data = parse_general(json)
+        data = self.parse(parse_general, json)
         data['url'] = url
 
         return data
 
+    @traced
     def query_urgent_market_messages(self,
                                      balancing_zone: Union[BalancingZone, str] = None) -> pd.DataFrame:
 
@@ -1562,11 +1834,12 @@ class EntsogPandasClient(EntsogRawClient):
             balancing_zone=balancing_zone
         )
 
-        data = parse_general(json)
+        data = self.parse(parse_general, json)
         data['url'] = url
 
         return data
 
+    @traced
     @week_limited
     def query_tariffs(self, start: pd.Timestamp, end: pd.Timestamp,
                       country_code: Union[Country, str],
@@ -1593,11 +1866,12 @@ class EntsogPandasClient(EntsogRawClient):
         json, url = super(EntsogPandasClient, self).query_tariffs(
             start=start, end=end, country_code=country_code
         )
-        data = parse_tariffs(json, verbose=verbose, melt=melt)
+        data = self.parse(parse_tariffs, json, verbose=verbose, melt=melt)
         data['url'] = url
 
         return data
 
+    @traced
     @week_limited
     def query_tariffs_sim(self, start: pd.Timestamp, end: pd.Timestamp,
                           country_code: Union[Country, str],
@@ -1624,11 +1898,12 @@ class EntsogPandasClient(EntsogRawClient):
         json, url = super(EntsogPandasClient, self).query_tariffs_sim(
             start=start, end=end, country_code=country_code
         )
-        data = parse_tariffs_sim(json, verbose=verbose, melt=melt)
+        data = self.parse(parse_tariffs_sim, json, verbose=verbose, melt=melt)
         data['url'] = url
 
         return data
 
+    @traced
     @week_limited
     def query_aggregated_data(self, start: pd.Timestamp, end: pd.Timestamp,
                               country_code: Union[Country, str] = None,
@@ -1659,11 +1934,12 @@ class EntsogPandasClient(EntsogRawClient):
             start=start, end=end, country_code=country_code, balancing_zone=balancing_zone, period_type=period_type
         )
 
-        data = parse_aggregate_data(json, verbose)
+        data = self.parse(parse_aggregate_data, json, verbose)
         data['url'] = url
 
         return data
     
+    @traced
     @day_limited
     def query_interruptions(self, start : pd.Timestamp, end : pd.Timestamp, verbose : bool = False) -> pd.DataFrame:
 
@@ -1683,11 +1959,12 @@ class EntsogPandasClient(EntsogRawClient):
         """
 
         json, url = super(EntsogPandasClient, self).query_interruptions(start = start, end = end)
-        data = parse_interruptions(json, verbose)
+        data = self.parse(parse_interruptions, json, verbose)
         data['url'] = url
 
         return data
 
+    @traced
     def query_CMP_auction_premiums(self, start: pd.Timestamp, end: pd.Timestamp,
                                    verbose: bool = True) -> pd.DataFrame:
 
@@ -1708,11 +1985,12 @@ class EntsogPandasClient(EntsogRawClient):
         json, url = super(EntsogPandasClient, self).query_CMP_auction_premiums(
             start=start, end=end
         )
-        data = parse_CMP_auction_premiums(json, verbose)
+        data = self.parse(parse_CMP_auction_premiums, json, verbose)
         data['url'] = url
 
         return data
 
+    @traced
     def query_CMP_unavailable_firm_capacity(self, start: pd.Timestamp, end: pd.Timestamp,
                                             verbose: bool = True) -> pd.DataFrame:
 
@@ -1733,11 +2011,12 @@ class EntsogPandasClient(EntsogRawClient):
         json, url = super(EntsogPandasClient, self).query_CMP_unavailable_firm_capacity(
             start=start, end=end
         )
-        data = parse_CMP_unavailable_firm_capacity(json, verbose)
+        data = self.parse(parse_CMP_unavailable_firm_capacity, json, verbose)
         data['url'] = url
 
         return data
 
+    @traced
     @week_limited
     def query_CMP_unsuccesful_requests(self, start: pd.Timestamp, end: pd.Timestamp,
                                        verbose: bool = True) -> pd.DataFrame:
@@ -1759,11 +2038,12 @@ class EntsogPandasClient(EntsogRawClient):
         json, url = super(EntsogPandasClient, self).query_CMP_unsuccesful_requests(
             start=start, end=end
         )
-        data = parse_CMP_unsuccesful_requests(json, verbose)
+        data = self.parse(parse_CMP_unsuccesful_requests, json, verbose)
         data['url'] = url
 
         return data
 
+    @traced
     @day_limited
     @paginated
     @documents_limited(OFFSET)
@@ -1799,11 +2079,13 @@ class EntsogPandasClient(EntsogRawClient):
             indicators=indicators, 
             offset = offset
         )
-        data = parse_operational_data(json, verbose)
+        data = self.parse(parse_operational_data, json, verbose)
         data['url'] = url
 
         return data
 
+    @traced
+    @url_limited
     @year_limited
     def query_operational_point_data(
         self,
@@ -1822,29 +2104,49 @@ class EntsogPandasClient(EntsogRawClient):
             indicators=indicators
         )
         
-        data = parse_operational_data(json_data, verbose)
+        data = self.parse(parse_operational_data, json_data, verbose)
         data['url'] = url
         return data
     
         
-    @week_limited
-    def _query_operational_data(self,
-                                start: pd.Timestamp,
-                                end: pd.Timestamp,
-                                operator: str,
-                                period_type: str = 'day',
-                                indicators: Union[List[Indicator], List[str]] = None,
-                                verbose: bool = False) -> pd.DataFrame:
-
-        #try:
-        json_data, url = super(EntsogPandasClient, self).query_operational_data(
-            start=start,
-            end=end,
-            operator=operator,
-            period_type=period_type,
-            indicators=indicators
+    @traced
+    def query_operational_data_by_area(self,
+                                       start: pd.Timestamp,
+                                       end: pd.Timestamp,
+                                       country_code: Optional[Union[Country, str, List]] = None,
+                                       balancing_zone: Optional[Union[BalancingZone, str, List]] = None,
+                                       operator: Optional[Union[str, List[str]]] = None,
+                                       period_type: str = 'day',
+                                       indicators: Union[List[Indicator], List[str]] = ['physical_flow'],
+                                       verbose: bool = False) -> pd.DataFrame:
+        """
+        Operational data of all points of countries, balancing zones and/or operators. These are resolved
+        into point directions, which are queried in as few requests as the URL length allows. Named apart from
+        query_operational_data, which keeps the signature of the raw client.
+
+        Parameters
+        ----------
+        start: pd.Timestamp
+        end: pd.Timestamp
+        country_code: Union[Country, str, list]
+        balancing_zone: Union[BalancingZone, str, list]
+        operator: Union[str, list]
+            operator keys
+        period_type: str
+        indicators: Union[List[Indicator],List[str]]
+        verbose: bool
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        point_directions = self.resolve_point_directions(
+            country_code=country_code, balancing_zone=balancing_zone, operator=operator
         )
+        if not point_directions:
+            raise NoMatchingDataError
 
-        data = parse_operational_data(json_data, verbose)
-        data['url'] = url
-        return data
+        return self.query_operational_point_data(
+            start=start, end=end, point_directions=point_directions,
+            period_type=period_type, indicators=indicators, verbose=verbose
+        )
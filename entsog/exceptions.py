@@ -18,3 +18,6 @@ class GatewayTimeOut(Exception):
 
 class NotFoundError(Exception):
     pass
+
+class CassetteMissError(Exception):
+    pass
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+from typing import List, Optional, Sequence, Tuple, Union
+
+from ._lazy import lazy_import
+from .misc import ranges, to_utc
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+# Validity columns per dataset
+PERIOD = ('period_from', 'period_to')
+CAPACITY = ('capacity_from', 'capacity_to')
+EVENT = ('event_start', 'event_stop')
+
+# Missing starts and stops
+_MIN = -2 ** 63
+_MAX = 2 ** 63 - 1
+
+
+def _nanoseconds(values, missing: int) -> np.ndarray:
+    """Timestamps (or strings) as UTC nanoseconds, missing ones replaced"""
+    if isinstance(values, pd.Series) and values.dtype == object:
+        values = to_utc(values)
+    times = pd.DatetimeIndex(pd.to_datetime(values, utc=True))
+    return np.where(times.isna(), missing, times.asi8)
+
+
+def _key_codes(frame: pd.DataFrame, by: Sequence[str]) -> pd.MultiIndex:
+    return pd.MultiIndex.from_frame(frame[list(by)].astype(object))
+
+
+class IntervalIndex:
+    """
+    Index over validity intervals [start, stop), e.g. the period_from/period_to of interruptions and tariffs
+    or the eventStart/eventStop of urgent market messages, optionally per key such as the point and direction.
+
+    The intervals are sorted by (key, start) together with the running maximum of their stop, both
+    as composite integers of key and rank of time. Every query interval then takes two binary searches to
+    find its candidates, and batches of queries are answered at once with searchsorted and np.repeat.
+    A missing start is taken as the beginning of time, a missing stop as an interval that has not ended.
+
+    Usage:
+        index = IntervalIndex.from_frame(interruptions, by=['point_key', 'direction_key'])
+        index.overlapping('2022-03-01', '2022-03-08', key=('ITP-00096', 'entry'))
+        flows_with_interruptions = overlap_join(flows, interruptions, by=['point_key', 'direction_key'])
+    """
+
+    def __init__(self, starts, stops, keys: Optional[pd.MultiIndex] = None):
+        """
+        Parameters
+        ----------
+        starts : array-like of timestamps
+        stops : array-like of timestamps
+        keys : pd.MultiIndex
+            key of every interval, None for intervals that all share one key
+        """
+        start = _nanoseconds(starts, _MIN)
+        stop = _nanoseconds(stops, _MAX)
+        if keys is not None:
+            codes, self.keys = pd.factorize(keys)
+        else:
+            codes, self.keys = np.zeros(len(start), dtype=np.intp), None
+
+        # Ranks of the distinct times, so (key, time) fits a single int64
+        self.times = np.unique(np.concatenate([start, stop]))
+        self._width = len(self.times) + 1
+        start_rank = np.searchsorted(self.times, start)
+        stop_rank = np.searchsorted(self.times, stop)
+
+        self.order = np.lexsort((start_rank, codes))
+        codes, start_rank, stop_rank = codes[self.order], start_rank[self.order], stop_rank[self.order]
+        running = pd.Series(stop_rank).groupby(codes).cummax().to_numpy() if len(codes) else stop_rank
+        self._start = codes.astype(np.int64) * self._width + start_rank
+        self._running = codes.astype(np.int64) * self._width + running
+        self._stop_rank = stop_rank
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, columns: Tuple[str, str] = PERIOD,
+                   by: Optional[Sequence[str]] = None) -> 'IntervalIndex':
+        """
+        Parameters
+        ----------
+        frame : pd.DataFrame
+        columns : (str, str)
+            start and stop column, e.g. PERIOD, CAPACITY or EVENT
+        by : list
+            key columns, e.g. ['point_key', 'direction_key']
+        """
+        start, stop = columns
+        keys = _key_codes(frame, by) if by else None
+        return cls(frame[start], frame[stop], keys)
+
+    def __len__(self):
+        return len(self.order)
+
+    def __repr__(self):
+        return f"IntervalIndex({len(self)} intervals)"
+
+    def join(self, starts, stops, keys: Optional[pd.MultiIndex] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        All pairs of a query interval and an indexed interval that overlap (with the same key)
+
+        Parameters
+        ----------
+        starts : array-like of timestamps
+        stops : array-like of timestamps
+        keys : pd.MultiIndex
+            key of every query, required when the index has keys
+
+        Returns
+        -------
+        (np.ndarray, np.ndarray)
+            positions of the queries and of the intervals they overlap
+        """
+        start = _nanoseconds(starts, _MIN)
+        stop = _nanoseconds(stops, _MAX)
+        if self.keys is not None:
+            if keys is None:
+                raise ValueError("This index has keys, give the key of every query")
+            codes = self.keys.get_indexer(keys)
+        else:
+            codes = np.zeros(len(start), dtype=np.intp)
+        queries = np.flatnonzero(codes >= 0)
+        codes, start, stop = codes[queries].astype(np.int64), start[queries], stop[queries]
+
+        # An interval overlaps when its stop is after the query start and its start before the query stop
+        after = np.searchsorted(self.times, start, side='right')
+        before = np.searchsorted(self.times, stop, side='left')
+        lo = np.searchsorted(self._running, codes * self._width + after - 1, side='right')
+        hi = np.searchsorted(self._start, codes * self._width + before, side='left')
+        hi = np.maximum(lo, hi)
+
+        query = np.repeat(np.arange(len(queries)), hi - lo)
+        candidate = ranges(lo, hi)
+        overlaps = self._stop_rank[candidate] >= after[query]
+        return queries[query[overlaps]], self.order[candidate[overlaps]]
+
+    def at(self, timestamps, keys: Optional[pd.MultiIndex] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Pairs of a timestamp and an indexed interval containing it, see join"""
+        start = _nanoseconds(timestamps, _MIN)
+        return self.join(pd.to_datetime(start, utc=True), pd.to_datetime(start + 1, utc=True), keys)
+
+    def overlapping(self, start, stop, key: Optional[Union[tuple, str]] = None) -> np.ndarray:
+        """Positions of the intervals overlapping a single period, in order"""
+        keys = None
+        if self.keys is not None:
+            key = key if isinstance(key, tuple) else (key,)
+            keys = pd.MultiIndex.from_tuples([key])
+        _, positions = self.join([pd.Timestamp(start)], [pd.Timestamp(stop)], keys)
+        return np.sort(positions)
+
+
+def overlap_join(left: pd.DataFrame, right: pd.DataFrame,
+                 left_on: Tuple[str, str] = PERIOD, right_on: Tuple[str, str] = PERIOD,
+                 by: Optional[List[str]] = None, suffixes: Tuple[str, str] = ('', '_right')) -> pd.DataFrame:
+    """
+    Joins every row of left to the rows of right whose interval overlaps its own, e.g. operational flows
+    to the interruptions or tariffs valid during their period
+
+    Parameters
+    ----------
+    left : pd.DataFrame
+    right : pd.DataFrame
+        the side that is indexed
+    left_on : (str, str)
+        start and stop column of left
+    right_on : (str, str)
+        start and stop column of right
+    by : list
+        columns that should be equal as well, e.g. ['point_key', 'direction_key']
+    suffixes : (str, str)
+
+    Returns
+    -------
+    pd.DataFrame
+        one row per overlapping pair, in the order of left
+    """
+    index = IntervalIndex.from_frame(right, right_on, by)
+    keys = _key_codes(left, by) if by else None
+    query, position = index.join(left[left_on[0]], left[left_on[1]], keys)
+    order = np.lexsort((position, query))
+    query, position = query[order], position[order]
+
+    joined = left.take(query).reset_index(drop=True)
+    other = right.take(position).drop(columns=list(by or [])).reset_index(drop=True)
+    overlap = set(joined.columns) & set(other.columns)
+    joined = joined.rename(columns={c: f"{c}{suffixes[0]}" for c in overlap})
+    other = other.rename(columns={c: f"{c}{suffixes[1]}" for c in overlap})
+    return pd.concat([joined, other], axis=1)
@@ -1,22 +1,17 @@
 import enum
-from typing import Union
+from functools import lru_cache
+from typing import Dict, List, Optional, Union
+
+from .misc import transform_unique
 
 
 def lookup_area(s: Union['Area', str]) -> 'Area':
     if isinstance(s, Area):
         # If it already is an Area object, we're happy
         area = s
-    else:  # It is a string
-        try:
-            # If it is a 'country code' string, we do a lookup
-            area = Area[s]
-        except KeyError:
-            # It is not, it may be a direct code
-            try:
-                area = [area for area in Area if area.value == s][0]
-            except IndexError:
-                # None argument
-                area = None
+    else:  # It is a string: a country code, operator key or operator label
+        # None argument or unknown string
+        area = _find(s, Area)
 
     return area
 
@@ -33,26 +28,113 @@ def lookup_country(s: Union['Country', str]) -> 'Country':
     return _lookup(s, Country)
 
 
+def lookup_region(country_key: Optional[str]) -> str:
+    # Countries missing from REGIONS end up in 'Undefined' instead of dropping out of aggregations
+    return REGIONS.get(country_key, REGIONS['Undefined'])
+
+
 def _lookup(s, object):
     if isinstance(s, object):
         # If it already is the required object, we're happy
         _object = s
     else:  # It is a string
-        try:
-            # If it is a code string, we do a lookup
-            _object = object[s]
-        except KeyError:
-            # It is not, it may be a direct code
-            try:
-                _object = [_object for _object in object if _object.value == s][0]
-            except IndexError as e:
-                print(
-                    f"{s} is not contained in {object}. This information is hardcoded, please raise an issue. Message: {e}")
-                raise
+        _object = _find(s, object)
+        if _object is None:
+            message = f"{s} is not contained in {object}. This information is hardcoded, please raise an issue."
+            print(message)
+            raise IndexError(message)
 
     return _object
 
 
+def _normalize(s: str) -> str:
+    # Aliases ignore case and surrounding or repeated whitespace
+    return ' '.join(s.split()).casefold()
+
+
+def _keys(member: enum.Enum) -> List[str]:
+    """Names, codes and labels a member can be looked up by, in order of precedence"""
+    value = member.value
+    codes = list(value) if isinstance(value, tuple) else [value]
+    labels = member.operator_labels if isinstance(member, Area) else [getattr(member, 'label', None)]
+    return [member.name] + codes + [label for label in labels if label]
+
+
+@lru_cache(maxsize=None)
+def _index(object) -> Dict[str, enum.Enum]:
+    """
+    Reverse index of an enum, built once: name, code (or operator key for Area) and label to member,
+    followed by the normalized aliases of all of them. Earlier keys win when two members share one.
+    """
+    keys = [(key, member) for member in object for key in _keys(member)]
+    # Names first, so 'NL' stays Area.NL even though it is also used as a label elsewhere
+    ranked = sorted(keys, key=lambda item: item[0] != item[1].name)
+
+    index = {}
+    for key, member in ranked:
+        index.setdefault(key, member)
+    for key, member in ranked:
+        index.setdefault(_normalize(key), member)
+    return index
+
+
+def _find(s: Optional[str], object) -> Optional[enum.Enum]:
+    if not isinstance(s, str):
+        return None
+    index = _index(object)
+    member = index.get(s)
+    return member if member is not None else index.get(_normalize(s))
+
+
+@lru_cache(maxsize=None)
+def code_index(object, attribute: str = 'label') -> Dict[str, str]:
+    """
+    Maps the code of every member of an enum to one of its attributes, e.g. code_index(Country)['NL'] == 'Netherlands'.
+    For Area every operator key maps to the attribute of its Area.
+
+    Parameters
+    ----------
+    object : Country | BalancingZone | Indicator | Area
+    attribute : str
+        e.g. 'label', 'manager_label' or 'name'
+
+    Returns
+    -------
+    dict
+    """
+    index = {}
+    for member in object:
+        value = getattr(member, attribute)
+        codes = member.value if isinstance(member.value, tuple) else (member.value,)
+        for code in codes:
+            index.setdefault(code, value)
+    return index
+
+
+def map_codes(values, object, attribute: str = 'label'):
+    """
+    Vectorized lookup of a whole Series of codes, e.g. map_codes(df['country_key'], Country) for the country labels.
+    Codes that are not in the enum become NaN.
+
+    Parameters
+    ----------
+    values : pd.Series
+    object : Country | BalancingZone | Indicator | Area
+    attribute : str
+
+    Returns
+    -------
+    pd.Series
+    """
+    index = code_index(object, attribute)
+    return transform_unique(values, lambda uniques: uniques.map(index))
+
+
+def map_regions(values):
+    """Vectorized lookup_region of a Series of country codes"""
+    return transform_unique(values, lambda uniques: uniques.map(REGIONS).fillna(REGIONS['Undefined']))
+
+
 class BalancingZone(enum.Enum):
     '''
     ENUM containing 3 things about a BalancingZone: Key, Label, Manager
@@ -77,11 +159,11 @@ class BalancingZone(enum.Enum):
 
     @property
     def label(self):
-        return (self._operator_labels)
+        return (self._label)
 
     @property
     def manager_label(self):
-        return (self._operator_labels)
+        return (self._manager_label)
 
     AT = "AT---------", "Austria", "Central European Gas Hub AG",
     BE_H = "BE-H-ZONE--", "H-Zone", "Fluxys Belgium",
@@ -347,7 +429,7 @@ DATASET_MAPPINGS = {
     '6': 'Aggregate Interconnections'
 }
 
-# TODO: All countries must be represented in operational_aggregates, or this does NOT work
+# Countries that are not listed map to 'Undefined', see map_regions and lookup_region
 REGIONS = {
     "AL": "Northern Africa",
     'SM': "Southern Europe",
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+from ._lazy import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+# Columns of the operator point directions holding the own and adjacent node per level
+LEVELS = {
+    'country': ('t_so_country', 'adjacent_country'),
+    'balancing_zone': ('t_so_balancing_zone', 'adjacent_zones'),
+}
+
+KEY_COLUMNS = ['operator_key', 'point_key', 'direction_key']
+
+# Which reports of a cross-border flow to use: an exit of A towards B is usually also reported as an entry of B
+SIDES = ('entry', 'exit', 'mean')
+
+
+class FlowMatrix:
+    """
+    Flows between countries or balancing zones as a dense (period × from × to) array,
+    with values[p, i, j] the flow from nodes[i] to nodes[j] during periods[p].
+
+    Usage:
+        matrix = flow_matrix(operational_data, client.query_operator_point_directions())
+        matrix.net_positions()  # (period × node) imports minus exports
+        matrix.flow('NO', 'DE')
+    """
+
+    def __init__(self, values: np.ndarray, periods: pd.DatetimeIndex, nodes: List[str]):
+        self.values = values
+        self.periods = periods
+        self.nodes = list(nodes)
+        self.index: Dict[str, int] = {node: i for i, node in enumerate(self.nodes)}
+
+    def __repr__(self):
+        return f"FlowMatrix({len(self.periods)} periods x {len(self.nodes)} x {len(self.nodes)} nodes)"
+
+    def flow(self, from_node: str, to_node: str) -> pd.Series:
+        """Flow from one node to another per period"""
+        return pd.Series(self.values[:, self.index[from_node], self.index[to_node]], index=self.periods)
+
+    def exports(self) -> np.ndarray:
+        """(period × node) total flow out of every node"""
+        return self.values.sum(axis=2)
+
+    def imports(self) -> np.ndarray:
+        """(period × node) total flow into every node"""
+        return self.values.sum(axis=1)
+
+    def net_positions(self) -> np.ndarray:
+        """(period × node) imports minus exports, positive for net importers"""
+        return self.imports() - self.exports()
+
+    def net(self) -> np.ndarray:
+        """(period × from × to) flow from i to j minus the flow back, so net[p, i, j] == -net[p, j, i]"""
+        return self.values - self.values.transpose(0, 2, 1)
+
+    def frame(self, array: np.ndarray) -> pd.DataFrame:
+        """A (period × node) array, e.g. net_positions(), as a DataFrame with periods as index and nodes as columns"""
+        return pd.DataFrame(array, index=self.periods, columns=self.nodes)
+
+    def to_frame(self, array: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """The non-zero cells of values (or of another period × from × to array) as a long DataFrame"""
+        array = self.values if array is None else array
+        p, i, j = np.nonzero(array)
+        nodes = np.asarray(self.nodes, dtype=object)
+        return pd.DataFrame({
+            'period_from': self.periods[p],
+            'from': nodes[i],
+            'to': nodes[j],
+            'value': array[p, i, j],
+        })
+
+
+def _accumulate(period: np.ndarray, source: np.ndarray, target: np.ndarray, value: np.ndarray,
+                shape: Tuple[int, int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Sums values into a dense array, and counts the reports per cell"""
+    cells = np.ravel_multi_index((period, source, target), shape)
+    size = shape[0] * shape[1] * shape[2]
+    sums = np.bincount(cells, weights=value, minlength=size).reshape(shape)
+    counts = np.bincount(cells, minlength=size).reshape(shape)
+    return sums, counts
+
+
+def flow_matrix(data: pd.DataFrame,
+                point_directions: pd.DataFrame,
+                level: str = 'country',
+                side: str = 'entry',
+                indicator: Optional[str] = 'Physical Flow') -> FlowMatrix:
+    """
+    Builds the flow matrix of operational data, locating every point direction with the
+    operator point directions instead of merging them.
+
+    An entry of node B from adjacent node A is a flow from A to B, an exit of A towards B a flow from A to B.
+    Flows within a node (e.g. to storage or distribution) are left out.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        operational data with operator_key, point_key, direction_key, period_from and value
+    point_directions : pd.DataFrame
+        operator point directions, e.g. from EntsogPandasClient.query_operator_point_directions
+    level : str
+        'country' or 'balancing_zone'
+    side : str
+        'entry' or 'exit' to use the reports of that side only, 'mean' to average both where present
+    indicator : str
+        indicator to keep, None when data contains a single one
+
+    Returns
+    -------
+    FlowMatrix
+    """
+    if level not in LEVELS:
+        raise ValueError(f"level should be one of {list(LEVELS)}, not {level}")
+    if side not in SIDES:
+        raise ValueError(f"side should be one of {SIDES}, not {side}")
+
+    # Only copy the columns needed when filtering
+    data = data[KEY_COLUMNS + ['period_from', 'value'] + (['indicator'] if 'indicator' in data.columns else [])]
+    if indicator is not None and 'indicator' in data.columns:
+        data = data[data['indicator'] == indicator]
+
+    own, adjacent = LEVELS[level]
+    points = point_directions.drop_duplicates(subset=KEY_COLUMNS)
+    position = pd.MultiIndex.from_frame(points[KEY_COLUMNS]).get_indexer(pd.MultiIndex.from_frame(data[KEY_COLUMNS]))
+
+    found = (position >= 0) & data['value'].notna().to_numpy()
+    position = position[found]
+    node = points[own].to_numpy()[position]
+    adjacent_node = points[adjacent].to_numpy()[position]
+    direction = data['direction_key'].to_numpy()[found]
+    value = pd.to_numeric(data['value']).to_numpy(dtype=float)[found]
+    period_from = data['period_from'].to_numpy()[found]
+
+    # Cross-border flows only
+    valid = pd.notna(node) & pd.notna(adjacent_node) & (node != adjacent_node)
+    node, adjacent_node, direction, value, period_from = (
+        node[valid], adjacent_node[valid], direction[valid], value[valid], period_from[valid]
+    )
+
+    # Parse every distinct period once, rather than every row
+    period_codes, periods = pd.factorize(period_from)
+    periods = pd.to_datetime(periods, utc=True)
+    order = np.argsort(periods.asi8, kind='stable')
+    period_codes = np.argsort(order)[period_codes]
+    periods = periods[order]
+    node_codes, nodes = pd.factorize(np.concatenate([node, adjacent_node]), sort=True)
+    node_codes, adjacent_codes = node_codes[:len(node)], node_codes[len(node):]
+    shape = (len(periods), len(nodes), len(nodes))
+
+    is_entry = direction == 'entry'
+    is_exit = direction == 'exit'
+    # Entries flow from the adjacent node into the node, exits the other way round
+    entries, entry_counts = _accumulate(period_codes[is_entry], adjacent_codes[is_entry], node_codes[is_entry],
+                                        value[is_entry], shape)
+    exits, exit_counts = _accumulate(period_codes[is_exit], node_codes[is_exit], adjacent_codes[is_exit],
+                                     value[is_exit], shape)
+
+    if side == 'entry':
+        values = entries
+    elif side == 'exit':
+        values = exits
+    else:
+        reported = (entry_counts > 0).astype(int) + (exit_counts > 0)
+        values = (entries + exits) / np.maximum(reported, 1)
+
+    return FlowMatrix(values, periods, list(nodes))
@@ -0,0 +1,176 @@
+import logging
+from contextvars import ContextVar
+from threading import Lock
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+_current_request: ContextVar = ContextVar('entsog_current_request', default=None)
+
+# Upper bounds (seconds) of the histogram buckets, Prometheus convention
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+PHASES = ('ttfb', 'download', 'decode', 'parse')
+
+
+class RequestMetrics:
+    """
+    Structured timings of a single call to the API, from sending the request until the response is parsed.
+
+    All durations are in seconds and are None when the phase did not happen (e.g. parse for the raw client).
+    ``ttfb`` is the time until the response headers arrived, which includes DNS resolution and connecting
+    as requests does not expose those separately. ``download`` is the time spent reading the body.
+    """
+
+    __slots__ = ('endpoint', 'url', 'params', 'status_code', 'error',
+                 'ttfb', 'download', 'decode', 'parse', 'total',
+                 'response_bytes', 'rows', 'retries', 'cache', '_started')
+
+    def __init__(self, endpoint: str, params: Optional[Dict] = None):
+        self.endpoint = endpoint
+        self.url = None
+        self.params = params
+        self.status_code = None
+        self.error = None
+        self.ttfb = None
+        self.download = None
+        self.decode = None
+        self.parse = None
+        self.total = None
+        self.response_bytes = None
+        self.rows = None
+        self.retries = 0
+        self.cache = None  # 'hit', 'miss' or None when no cache is involved
+        self._started = perf_counter()
+
+    def finish(self):
+        self.total = perf_counter() - self._started
+
+    def as_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__ if not name.startswith('_')}
+
+    def __repr__(self):
+        return f"RequestMetrics({self.as_dict()})"
+
+
+def current_request() -> Optional[RequestMetrics]:
+    """Returns the metrics of the request that is currently being performed or parsed, if any"""
+    return _current_request.get()
+
+
+def set_current_request(record: Optional[RequestMetrics]):
+    _current_request.set(record)
+
+
+def add_timing(phase: str, seconds: float):
+    """Adds a duration to a phase of the current request, a no-op outside of a request"""
+    record = _current_request.get()
+    if record is not None:
+        setattr(record, phase, (getattr(record, phase) or 0) + seconds)
+
+
+def emit(record: RequestMetrics, hooks: List[Callable], registry: Optional['MetricsRegistry']):
+    """Finishes a record and hands it to the hooks and registry. Failing hooks never fail the request."""
+    record.finish()
+    for hook in hooks:
+        try:
+            hook(record)
+        except Exception:
+            logging.exception(f"Metrics hook {hook} failed")
+    if registry is not None:
+        registry.observe(record)
+
+
+class MetricsRegistry:
+    """
+    Minimal thread-safe registry of counters and histograms, rendered in the Prometheus text format.
+
+    Usage:
+        registry = MetricsRegistry()
+        client = EntsogPandasClient(metrics=registry)
+        ...
+        print(registry.render())
+    """
+
+    def __init__(self, namespace: str = 'entsog', buckets: Tuple[float] = DEFAULT_BUCKETS):
+        self.namespace = namespace
+        self.buckets = tuple(sorted(buckets))
+        self._lock = Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def _inc(self, name: str, labels: Tuple, amount: float = 1):
+        key = (name, labels)
+        self._counters[key] = self._counters.get(key, 0) + amount
+
+    def _observe(self, name: str, labels: Tuple, value: float):
+        key = (name, labels)
+        if key not in self._histograms:
+            self._histograms[key] = [[0] * len(self.buckets), 0, 0.0]  # bucket counts, count, sum
+        histogram = self._histograms[key]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                histogram[0][i] += 1
+        histogram[1] += 1
+        histogram[2] += value
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        """Increments a counter, e.g. inc('reference_cache_total', dataset='operators', result='hit')"""
+        with self._lock:
+            self._inc(name, tuple(sorted(labels.items())), amount)
+
+    def observe(self, record: RequestMetrics):
+        endpoint = ('endpoint', record.endpoint)
+        status = ('status', str(record.status_code) if record.status_code is not None else 'error')
+        with self._lock:
+            self._inc('requests_total', (endpoint, status))
+            if record.retries:
+                self._inc('retries_total', (endpoint,), record.retries)
+            if record.response_bytes is not None:
+                self._inc('response_bytes_total', (endpoint,), record.response_bytes)
+            if record.rows is not None:
+                self._inc('rows_total', (endpoint,), record.rows)
+            if record.cache is not None:
+                self._inc('cache_total', (endpoint, ('result', record.cache)))
+            for phase in PHASES:
+                value = getattr(record, phase)
+                if value is not None:
+                    self._observe('phase_seconds', (endpoint, ('phase', phase)), value)
+            if record.total is not None:
+                self._observe('request_seconds', (endpoint,), record.total)
+
+    def get(self, name: str, **labels) -> float:
+        """Returns the summed value of a counter over all series matching the given labels"""
+        with self._lock:
+            return sum(
+                value for (_name, _labels), value in self._counters.items()
+                if _name == name and set(labels.items()) <= set(_labels)
+            )
+
+    def render(self) -> str:
+        def fmt(labels):
+            if not labels:
+                return ''
+            return '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+        lines = []
+        with self._lock:
+            for name in sorted({name for name, _ in self._counters}):
+                full_name = f"{self.namespace}_{name}"
+                lines.append(f"# TYPE {full_name} counter")
+                for (_name, labels), value in sorted(self._counters.items()):
+                    if _name == name:
+                        lines.append(f"{full_name}{fmt(labels)} {value}")
+
+            for name in sorted({name for name, _ in self._histograms}):
+                full_name = f"{self.namespace}_{name}"
+                lines.append(f"# TYPE {full_name} histogram")
+                for (_name, labels), (counts, count, total) in sorted(self._histograms.items()):
+                    if _name != name:
+                        continue
+                    for bound, bucket_count in zip(self.buckets, counts):
+                        lines.append(f"{full_name}_bucket{fmt(labels + (('le', bound),))} {bucket_count}")
+                    lines.append(f"{full_name}_bucket{fmt(labels + (('le', '+Inf'),))} {count}")
+                    lines.append(f"{full_name}_count{fmt(labels)} {count}")
+                    lines.append(f"{full_name}_sum{fmt(labels)} {total}")
+
+        return '\n'.join(lines) + '\n'
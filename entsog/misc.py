@@ -1,8 +1,16 @@
+from __future__ import annotations
+
 import re
+import urllib.parse
 from itertools import tee
-import pandas as pd
-from dateutil import rrule
-from unidecode import unidecode
+from typing import Callable, List, Optional, Tuple, Union
+
+from ._lazy import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+rrule = lazy_import('dateutil.rrule')
+unidecode = lazy_import('unidecode')
 
 
 def year_blocks(start, end):
@@ -119,6 +127,162 @@ def pairwise(iterable):
     return zip(a, b)
 
 
+def batch_by_length(keys: List[str], max_length: int, separator: str = ',') -> List[List[str]]:
+    """
+    Packs keys, in order, into as few batches as possible whose URL-encoded, separator-joined length
+    stays within max_length. A key that is longer by itself gets a batch of its own.
+
+    Parameters
+    ----------
+    keys : list
+    max_length : int
+    separator : str
+
+    Returns
+    -------
+    list
+        lists of keys
+    """
+    batches = []
+    batch = []
+    length = 0
+    for key in keys:
+        size = len(urllib.parse.quote_plus(key, safe=separator))
+        if batch and length + len(separator) + size > max_length:
+            batches.append(batch)
+            batch = []
+            length = 0
+        length += size + (len(separator) if batch else 0)
+        batch.append(key)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _joined_length(keys: List[str], separator: str = ',') -> int:
+    return len(urllib.parse.quote_plus(separator.join(keys), safe=separator))
+
+
+def batch_pairs(first: Optional[List[str]], second: Optional[List[str]], max_length: int,
+                separator: str = ',') -> List[Tuple[Optional[List[str]], Optional[List[str]]]]:
+    """
+    Splits two lists of keys that go into the same request (e.g. point directions and indicators) into
+    the fewest requests for which the encoded length of both joined batches stays within max_length.
+    Every combination of a batch of first with a batch of second is one request. None stays None.
+
+    Parameters
+    ----------
+    first : list
+    second : list
+    max_length : int
+    separator : str
+
+    Returns
+    -------
+    list
+        (first batch, second batch) per request
+    """
+    if not second:
+        return [(batch, second) for batch in (batch_by_length(first, max_length, separator) if first else [first])]
+    if not first:
+        return [(first, batch) for batch in batch_by_length(second, max_length, separator)]
+
+    best = None
+    total = _joined_length(second, separator)
+    longest = max(_joined_length([key], separator) for key in second)
+    # Try splitting the second list into 1, 2, ... batches and give the rest of the length to the first
+    for n in range(1, len(second) + 1):
+        second_batches = batch_by_length(second, max(-(-total // n), longest), separator)
+        remaining = max_length - max(_joined_length(batch, separator) for batch in second_batches)
+        if remaining <= 0:
+            continue
+        first_batches = batch_by_length(first, remaining, separator)
+        if best is None or len(first_batches) * len(second_batches) < len(best[0]) * len(best[1]):
+            best = first_batches, second_batches
+        if len(second_batches) == len(second):
+            break
+
+    if best is None:
+        # Not even single keys fit, send them one by one and let the server decide
+        best = [[key] for key in first], [[key] for key in second]
+    return [(a, b) for a in best[0] for b in best[1]]
+
+
+def factorize(values) -> Tuple[np.ndarray, pd.Index]:
+    """
+    pd.factorize, with missing values as a distinct value of their own (coded last) rather than -1.
+    Same as use_na_sentinel=False, which needs pandas 1.5.
+
+    Parameters
+    ----------
+    values : pd.Series | np.ndarray
+
+    Returns
+    -------
+    (np.ndarray, pd.Index)
+        codes and distinct values
+    """
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Index(uniques)
+    missing = codes < 0
+    if missing.any():
+        codes = np.where(missing, len(uniques), codes)
+        uniques = uniques.insert(len(uniques), np.nan)
+    return codes, uniques
+
+
+def to_utc(values):
+    """
+    Timestamps in UTC from strings in mixed ISO 8601 forms (with or without a time or offset), NaT where
+    missing or unparsable. pandas 2 infers a single format from the first value and has to be told to accept
+    every ISO 8601 form; earlier versions parse each value on its own and lack that option.
+
+    Parameters
+    ----------
+    values : pd.Series | list
+
+    Returns
+    -------
+    pd.Series | pd.DatetimeIndex
+    """
+    options = {'format': 'ISO8601'} if int(pd.__version__.split('.')[0]) >= 2 else {}
+    return pd.to_datetime(values, utc=True, errors='coerce', **options)
+
+
+def transform_unique(values: pd.Series,
+                     func: Callable[[pd.Series], Union[pd.Series, pd.DataFrame]]) -> Union[pd.Series, pd.DataFrame]:
+    """
+    Applies a vectorized transform (e.g. a str.extract or a map) to the distinct values of a Series only,
+    and broadcasts the result back to every row. Columns such as codes, keys and countries have a
+    handful of distinct values over many rows, so this costs a factorize instead of a regex per row.
+
+    Parameters
+    ----------
+    values : pd.Series
+    func : callable
+        takes a Series and returns a Series or DataFrame of the same length; missing values are passed on
+
+    Returns
+    -------
+    pd.Series | pd.DataFrame
+        with the index of values
+    """
+    codes, uniques = factorize(values)
+    result = func(pd.Series(uniques, name=values.name)).take(codes)
+    result.index = values.index
+    return result
+
+
+def ranges(starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """Concatenation of np.arange(start, stop) for every pair of starts and stops, without a loop"""
+    lengths = stops - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.zeros(0, dtype=np.intp)
+    offsets = np.repeat(starts - np.r_[0, np.cumsum(lengths)[:-1]], lengths)
+    return np.arange(total) + offsets
+
+
 def to_snake_case(string: str) -> str:
     """Converts any string to snake case
 
@@ -130,7 +294,7 @@ def to_snake_case(string: str) -> str:
     -------
     str
     """
-    string = unidecode(string)
+    string = unidecode.unidecode(string)
     string = re.sub('[^A-Za-z0-9 _]+', '_', string)
     string = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', string)
     string = re.sub('([a-z0-9])([A-Z])', r'\1_\2', string)
@@ -1,14 +1,65 @@
-import bs4
-import pandas as pd
+from __future__ import annotations
+
 import json
+from time import perf_counter
+from typing import Dict, Optional
 
 from entsog.exceptions import NoMatchingDataError
-from .mappings import REGIONS
-from .misc import to_snake_case
+from ._lazy import lazy_import
+from .metrics import add_timing
+from .mappings import map_regions
+from .misc import to_snake_case, transform_unique
+from .rollup import Rollup
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+_PERIOD = ['period_from', 'period_to']
+
+# Grouping columns per level of parse_aggregate_data_complex, from point up to region
+AGGREGATE_DATA_LEVELS = {
+    'point': _PERIOD + ['region_key', 'country_key', 'bz_key', 'adjacent_bz_key', 'adjacent_systems_key',
+                        'adjacent_systems_label', 'operator_key', 'points_names', 'indicator', 'direction_key', 'note'],
+    'operator': _PERIOD + ['region_key', 'country_key', 'bz_key', 'adjacent_bz_key', 'adjacent_systems_key',
+                           'adjacent_systems_label', 'operator_key', 'indicator', 'direction_key', 'note'],
+    'balancing_zone': _PERIOD + ['region_key', 'country_key', 'bz_key', 'adjacent_bz_key', 'adjacent_systems_key',
+                                 'adjacent_systems_label', 'indicator', 'direction_key', 'note'],
+    'country': _PERIOD + ['region_key', 'country_key', 'adjacent_bz_key', 'adjacent_systems_key',
+                          'adjacent_systems_label', 'indicator', 'direction_key', 'note'],
+    'region': _PERIOD + ['region_key', 'adjacent_bz_key', 'adjacent_systems_key', 'adjacent_systems_label',
+                         'indicator', 'direction_key', 'note'],
+}
+
+_ALL = _PERIOD + [
+    'point_type',  # All
+    'cross_border_point_type',  # e.g. in-country, within EU,
+    'eu_relationship',  # Within EU, outside EU
+]
+_OPERATOR = ['operator_key', 'operator_label']
+_COUNTRY = ['tso_country', 'adjacent_country']
+_BALANCING_ZONE = [
+    'connected_operators',  # E.g. Nordstream - Country level
+    'tso_balancing_zone',
+    'adjacent_zones',
+]
+_REGION = ['region_key', 'adjacent_region_key']
+_POINT = ['point_key', 'point_label']
+_INDICATOR = ['indicator', 'direction_key']
+
+# Grouping columns per level of parse_grouped_operational_aggregates, from point up to region
+OPERATIONAL_AGGREGATE_LEVELS = {
+    'point': _ALL + _OPERATOR + _COUNTRY + _BALANCING_ZONE + _REGION + _POINT + _INDICATOR,
+    'operator': _ALL + _OPERATOR + _COUNTRY + _BALANCING_ZONE + _REGION + _INDICATOR,
+    'balancing_zone': _ALL + _BALANCING_ZONE + _REGION + _INDICATOR,
+    'country': _ALL + _COUNTRY + _BALANCING_ZONE + _REGION + _INDICATOR,
+    'region': _ALL + _REGION + _INDICATOR,
+}
 
 
 def _extract_data(json_text):
+    start = perf_counter()
     json_data = json.loads(json_text)
+    add_timing('decode', perf_counter() - start)
     keys = list(json_data.keys())
     # Returns nothing
     if len(keys) == 1 or keys[0] == 'message':
@@ -24,6 +75,38 @@ def parse_general(json_text):
     return df
 
 
+def parse_urgent_market_messages(json_text: str, versions: Optional[Dict] = None) -> pd.DataFrame:
+    """
+    Urgent market messages, leaving out the ones already known before normalizing the records
+
+    Parameters
+    ----------
+    json_text : str
+    versions : dict
+        messageId -> highest versionNumber known; only messages not in it or with a higher version are parsed
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    start = perf_counter()
+    json_data = json.loads(json_text)
+    add_timing('decode', perf_counter() - start)
+    keys = list(json_data.keys())
+    if len(keys) == 1 or keys[0] == 'message':
+        return pd.DataFrame()
+
+    records = json_data[keys[1]]
+    if versions:
+        records = [
+            record for record in records
+            if (record.get('versionNumber') or 0) > versions.get(record.get('messageId'), -1)
+        ]
+    df = pd.json_normalize(records)
+    df.columns = [to_snake_case(col) for col in df.columns]
+    return df
+
+
 def parse_operational_data(json_text: str, verbose: bool):
     data = parse_general(json_text)
     columns = ['point_key', 'point_label', 'period_from', 'period_to', 'period_type', 'unit', 'indicator',
@@ -153,6 +236,16 @@ def parse_tariffs_sim(json_text: str, verbose: bool, melt: bool):
         raise NoMatchingDataError('No matching data found')
 
 
+def _parse_tariff_codes(code: pd.Series) -> pd.DataFrame:
+    """Splits tariff codes like 'EUR/(kWh/d)/y' into currency, unit and product code"""
+    code = code.astype(object)
+    return pd.DataFrame({
+        'currency': code.str.extract(r'^(.*?)\/')[0],  # ^(.*?)\/ LINE START
+        'unit': code.str.extract(r'\((.*?)\)')[0],  # \((.*?)\) UNIT IN MIDDLE BETWEEN BRACKETS ()
+        'product_code': code.str.extract(r'\)\/(.*?)$')[0],  # \)\/(.*?)$ Product after unit
+    })
+
+
 def parse_tariffs(json_text: str, verbose: bool, melt: bool):
     # https://transparency.entsog.eu/api/v1/tariffsfulls
 
@@ -228,40 +321,20 @@ def parse_tariffs(json_text: str, verbose: bool, melt: bool):
             "applicable_tariff_in_common_unit_unit",
         ]
 
-        id_columns = list(set(columns) - set(melt_columns_unit + melt_columns_value))
+        id_columns = [column for column in columns if column not in melt_columns_value + melt_columns_unit]
 
-        data_value = pd.melt(
-            data,
-            id_vars=id_columns,
-            value_vars=melt_columns_value,
-            var_name='variable',
-            value_name='value'
-        )
-        
-        data_value['variable'] = data_value["variable"].str.replace("_value$", "")
-        
-        data_unit = pd.melt(
-            data,
-            id_vars=id_columns,
-            value_vars=melt_columns_unit,
-            var_name='variable',
-            value_name='code'
+        # Stack the value/unit pairs positionally, one block of rows per pair, like pd.melt would
+        n = len(data)
+        data_pivot = data[id_columns].take(np.tile(np.arange(n), len(melt_columns_value))).reset_index(drop=True)
+        data_pivot['variable'] = np.repeat(
+            pd.Series(melt_columns_value).str.extract(r'(local_currency|eur|common_unit)')[0].to_numpy(), n
         )
-        data_unit['variable'] = data_unit["variable"].str.replace("_unit$", "")
+        data_pivot['value'] = np.concatenate([data[column].to_numpy() for column in melt_columns_value])
+        data_pivot['code'] = np.concatenate([data[column].to_numpy() for column in melt_columns_unit])
 
-        # Append with variable
-        id_columns.append('variable')
-
-        data_pivot = pd.merge(data_value, data_unit, on=id_columns)
-        
-        data_pivot['variable'] = data_pivot['variable'].str.extract(r'(local_currency|eur|common_unit)')
-        data_pivot['currency'] = data_pivot['code'].str.extract(r'^(.*?)\/')  # ^(.*?)\/ LINE START
-        data_pivot['unit'] = data_pivot['code'].str.extract(
-            r'\((.*?)\)')  # \((.*?)\) UNIT IN MIDDLE BETWEEN BRACKETS ()
-        data_pivot['product_code'] = data_pivot['code'].str.extract(
-            r'\)\/(.*?)$')  # \)\/(.*?)$ Product after unit
-
-        # Regex: applicable_tariff_(.*?)(_unit|_value)
+        # Only a few dozen distinct codes: parse every one of them once
+        parsed = transform_unique(data_pivot['code'], _parse_tariff_codes)
+        data_pivot[parsed.columns] = parsed
 
         return data_pivot
     else:
@@ -273,8 +346,8 @@ def parse_interconnections(json_text):
     df.columns = [to_snake_case(col) for col in df.columns]
 
     # Get the regions in Europe
-    df['from_region_key'] = df['from_country_key'].map(REGIONS)
-    df['to_region_key'] = df['to_country_key'].map(REGIONS)
+    df['from_region_key'] = df['from_country_key'].pipe(map_regions)
+    df['to_region_key'] = df['to_country_key'].pipe(map_regions)
 
     return df
 
@@ -284,20 +357,25 @@ def parse_operator_points_directions(json_text):
     df.columns = [to_snake_case(col) for col in df.columns]
 
     # Get the regions in Europe
-    df['region'] = df['t_so_country'].map(REGIONS)
-    df['adjacent_region'] = df['adjacent_country'].map(REGIONS)
+    df['region'] = df['t_so_country'].pipe(map_regions)
+    df['adjacent_region'] = df['adjacent_country'].pipe(map_regions)
 
     return df
 
 
+def _adjacent_bz_key(adjacent_systems_key: pd.Series) -> pd.Series:
+    """Balancing zone of a transmission adjacent system, '-----------' for other adjacent systems"""
+    return adjacent_systems_key.str.extract(r"^Transmission(.*)$")[0].fillna(
+        '-----------').replace(r'^\s*$', '-----------', regex=True)
+
+
 def parse_aggregate_data(
         json_text,
         verbose: bool
 ):
     data = parse_general(json_text)
 
-    data['adjacent_bz_key'] = data['adjacent_systems_key'].str.extract(r"^Transmission(.*)$").fillna(
-        '-----------').replace(r'^\s*$', '-----------', regex=True)
+    data['adjacent_bz_key'] = transform_unique(data['adjacent_systems_key'], _adjacent_bz_key)
     columns = [
         'country_key', 'country_label',
         'bz_key', 'bz_short', 'bz_long',
@@ -326,13 +404,12 @@ def parse_aggregate_data_complex(
     df.columns = [to_snake_case(col) for col in df.columns]
 
     # Get the regions in Europe
-    df['region_key'] = df['country_key'].map(REGIONS)
+    df['region_key'] = df['country_key'].pipe(map_regions)
     # Extract the balancing zone from adjacent system, equal to matching last 11 characters of adjacent_systems_key
 
     # Only if it starts with transmission
     # df['adjacent_bz_key'] = df['adjacent_systems_key'].str.extract(r"^Transmission?.*(.{11}$)").fillna('-----------') # Problem: DK-SE 12 characters
-    df['adjacent_bz_key'] = df['adjacent_systems_key'].str.extract(r"^Transmission(.*)$").fillna('-----------').replace(
-        r'^\s*$', '-----------', regex=True)
+    df['adjacent_bz_key'] = transform_unique(df['adjacent_systems_key'], _adjacent_bz_key)
 
     # Join with interconnections (only the ones with Transmission, Transmission)... These are outside Europe Transmissions
     # Entry gets joined with  to_point (points_names) to_operator_key (operator_key)
@@ -377,221 +454,39 @@ def parse_aggregate_data_complex(
 
     if entry_exit:
         mask = (df['direction_key'] == 'exit')
-        df['value'][mask] = df['value'][mask] * -1  # Multiply by minus one as it is an exit
+        df.loc[mask, 'value'] = df.loc[mask, 'value'] * -1  # Multiply by minus one as it is an exit
         df['direction_key'] = 'aggregated'
 
     if group_type is None:
         return df
 
-    if group_type == 'point':
-        df = df.groupby([
-            'period_from',
-            'period_to',
-            'region_key',
-            'country_key',
-            'bz_key',
-            'adjacent_bz_key',
-            'adjacent_systems_key',
-            'adjacent_systems_label',
-            'operator_key',
-            'points_names',
-            'indicator',
-            'direction_key',
-            'note']).agg(
-            value=('value', sum)  # KWh/d
-        )
-    elif group_type == 'operator':
-
-        df = df.groupby([
-            'period_from',
-            'period_to',
-            'region_key',
-            'country_key',
-            'bz_key',
-            'adjacent_bz_key',
-            'adjacent_systems_key',
-            'adjacent_systems_label',
-            'operator_key',
-            'indicator',
-            'direction_key',
-            'note']).agg(
-            value=('value', sum)  # KWh/d
-        )
-    elif group_type == 'balancing_zone':
-        df = df.groupby([
-            'period_from',
-            'period_to',
-            'region_key',
-            'country_key',
-            'bz_key',
-            'adjacent_bz_key',
-            'adjacent_systems_key',
-            'adjacent_systems_label',
-            'indicator',
-            'direction_key',
-            'note']).agg(
-            value=('value', sum)  # KWh/d
-        )
-    elif group_type == 'country':
-        df = df.groupby([
-            'period_from',
-            'period_to',
-            'region_key',
-            'country_key',
-            'adjacent_bz_key',
-            'adjacent_systems_key',
-            'adjacent_systems_label',
-            'indicator',
-            'direction_key',
-            'note']).agg(
-            value=('value', sum)  # KWh/d
-        )
-    elif group_type == 'region':
-        df = df.groupby([
-            'period_from',
-            'period_to',
-            'region_key',
-            'adjacent_bz_key',
-            'adjacent_systems_key',
-            'adjacent_systems_label',
-            'indicator',
-            'direction_key',
-            'note']).agg(
-            value=('value', sum)  # KWh/d
-        )
+    return Rollup(df, AGGREGATE_DATA_LEVELS)[group_type]
 
-    return df.reset_index()
 
-
-def parse_grouped_operational_aggregates(
+def rollup_operational_aggregates(
         data: pd.DataFrame,
-        group_type: str,
-        entry_exit: str
-) -> str:
+        entry_exit: bool
+) -> Rollup:
+    """
+    Operational data joined with its operator point directions, summed on every level of
+    OPERATIONAL_AGGREGATE_LEVELS at once. Index the result with a level, e.g. rollup['country'].
+    """
+    data = data.copy()
     # Get the regions in Europe
-
-    # data['tso_country'] = data['tso_country'].replace(nan,'Undefined')
-    # data['adjacent_country'] = data['adjacent_country'].replace(nan,'Undefined')
-
-    # print(group_type)
-    # print(set(data['tso_country']))
-
-    data['region_key'] = data['tso_country'].map(REGIONS)
-    data['adjacent_region_key'] = data['adjacent_country'].map(REGIONS)
+    data['region_key'] = data['tso_country'].pipe(map_regions)
+    data['adjacent_region_key'] = data['adjacent_country'].pipe(map_regions)
 
     if entry_exit:
         mask = (data['direction_key'] == 'exit')
-        data['value'][mask] = data['value'][mask] * -1  # Multiply by minus one as it is an exit
+        data.loc[mask, 'value'] = data.loc[mask, 'value'] * -1  # Multiply by minus one as it is an exit
         data['direction_key'] = 'aggregated'
 
-    if group_type == 'point':
-        df = data.groupby([
-            'period_from',  # All
-            'period_to',  # All
-            'point_type',  # All
-            'cross_border_point_type',  # e.g. in-country, within EU,
-            'eu_relationship',  # Within EU, outside EU
-            'operator_key',  # Operator level
-            'operator_label',  # Operator level
-            'tso_country',  # Country level
-            'adjacent_country',  # Country level
-            'connected_operators',  # E.g. Nordstream - Country level
-            'tso_balancing_zone',  # Balancing zone level
-            'adjacent_zones',  # Balancing zone level
-
-            'region_key',  # Region level
-            'adjacent_region_key',  # Region level
-
-            'point_key',  # Point level
-            'point_label',  # Point level
-
-            'indicator',
-            'direction_key'
-        ]).agg(
-            value=('value', sum)  # KW/ period_type
-        )
-    elif group_type == 'operator':
-
-        df = data.groupby([
-            'period_from',  # All
-            'period_to',  # All
-            'point_type',  # All
-            'cross_border_point_type',  # e.g. in-country, within EU,
-            'eu_relationship',  # Within EU, outside EU
-            'operator_key',  # Operator level
-            'operator_label',  # Operator level
-            'tso_country',  # Country level
-            'adjacent_country',  # Country level
-            'connected_operators',  # E.g. Nordstream - Country level
-            'tso_balancing_zone',  # Balancing zone level
-            'adjacent_zones',  # Balancing zone level
-
-            'region_key',  # Region level
-            'adjacent_region_key',  # Region level
-
-            'indicator',
-            'direction_key'
-        ]).agg(
-            value=('value', sum)  # KW/ period_type
-        )
-    elif group_type == 'balancing_zone':
-        df = data.groupby([
-            'period_from',  # All
-            'period_to',  # All
-            'point_type',  # All
-            'cross_border_point_type',  # e.g. in-country, within EU,
-            'eu_relationship',  # Within EU, outside EU
-
-            'connected_operators',  # E.g. Nordstream - Country level
-            'tso_balancing_zone',  # Balancing zone level
-            'adjacent_zones',  # Balancing zone level
-
-            'region_key',  # Region level
-            'adjacent_region_key',  # Region level
-
-            'indicator',
-            'direction_key'
-        ]).agg(
-            value=('value', sum)  # KW/ period_type
-        )
-    elif group_type == 'country':
-        df = data.groupby([
-            'period_from',  # All
-            'period_to',  # All
-            'point_type',  # All
-            'cross_border_point_type',  # e.g. in-country, within EU,
-            'eu_relationship',  # Within EU, outside EU
-
-            'tso_country',  # Country level
-            'adjacent_country',  # Country level
-
-            'connected_operators',  # E.g. Nordstream - Country level
-            'tso_balancing_zone',  # Balancing zone level
-            'adjacent_zones',  # Balancing zone level
-
-            'region_key',  # Region level
-            'adjacent_region_key',  # Region level
-
-            'indicator',
-            'direction_key'
-        ]).agg(
-            value=('value', sum)  # KW/ period_type
-        )
-    elif group_type == 'region':
-        df = data.groupby([
-            'period_from',  # All
-            'period_to',  # All
-            'point_type',  # All
-            'cross_border_point_type',  # e.g. in-country, within EU,
-            'eu_relationship',  # Within EU, outside EU
-
-            'region_key',  # Region level
-            'adjacent_region_key',  # Region level
-
-            'indicator',
-            'direction_key'
-        ]).agg(
-            value=('value', sum)  # KW/ period_type
-        )
+    return Rollup(data, OPERATIONAL_AGGREGATE_LEVELS)
+
 
-    return df.reset_index()
+def parse_grouped_operational_aggregates(
+        data: pd.DataFrame,
+        group_type: str,
+        entry_exit: bool
+) -> pd.DataFrame:
+    return rollup_operational_aggregates(data, entry_exit)[group_type]
@@ -1,11 +1,11 @@
 
-from plistlib import PlistFormat
 from typing import Optional
 import pandas as pd
 from entsog.entsog import EntsogPandasClient
 import plotnine as p9
 
-from entsog.mappings import lookup_country
+from entsog.mappings import Country, code_index
+from entsog.revisions import latest_revisions
 
 ENTSOG_THEME =  p9.theme(
     axis_text = p9.element_text(),
@@ -43,11 +43,8 @@ UNIT_TRANSFORMATION = {
 
 def label_func(x):
 
-    if len(x) == 2:
-        country = lookup_country(x)
-        return country.label
-    else:
-        return x
+    # Country codes become their label, anything else is kept as is
+    return code_index(Country).get(x, x)
 
 
 
@@ -66,6 +63,9 @@ def plot_area(
     
     flow_data = flow_data.replace({'': None})
 
+    # Only the preferred revision of every observation: confirmed over provisional, then the latest update
+    flow_data = latest_revisions(flow_data)
+
 
     flow_data['value'] = flow_data['value'].astype(float)
 
@@ -92,19 +92,13 @@ def plot_area(
     merged['point_label'] = merged['point_label'] + " - (" + merged['country'] + ")"
 
     # Group by point and period_from
-    merged_grouped = merged.groupby([pd.Grouper(key = 'period_from',freq = aggregation, label = 'right'), 'point_label','flow_status', facet_row, facet_col]).agg(
+    merged_grouped = merged.groupby([pd.Grouper(key = 'period_from',freq = aggregation, label = 'right'), 'point_label', facet_row, facet_col]).agg(
         {'value': 'sum'}
     ).reset_index()
 
 
     #merged_grouped['label'] = f"{merged_grouped['point_label']} - {merged_grouped[facet_row]}"
 
-    # If flow status == 'Confirmed', delete the other rows for the keys ['period_from','tso_item_identifier','tso_eic_code','point_key','direction_key']
-    # Pandas drop duplicates, but keep the first row where flow_status == 'Confirmed'
-    merged_grouped = merged_grouped.sort_values(by = ['flow_status'])
-    merged_grouped = merged_grouped.drop_duplicates(subset=['period_from','point_label'], keep='first')
-    
-
     plot = (
     p9.ggplot(merged_grouped)
     + p9.aes(x='period_from', y='value', fill = 'point_label')
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Union
+
+from ._lazy import lazy_import
+from .mappings import lookup_region
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+# Dataset name: (method of EntsogPandasClient, columns identifying a record)
+DATASETS = {
+    'connection_points': ('query_connection_points', ['point_key']),
+    'operators': ('query_operators', ['operator_key']),
+    'balancing_zones': ('query_balancing_zones', ['bz_key']),
+    'operator_point_directions': ('query_operator_point_directions', ['operator_key', 'point_key', 'direction_key']),
+    'interconnections': ('query_interconnections', ['from_operator_key', 'from_point_key', 'from_direction_key',
+                                                    'to_operator_key', 'to_point_key', 'to_direction_key']),
+    'aggregate_interconnections': ('query_aggregate_interconnections', ['bz_key', 'operator_key', 'direction_key',
+                                                                        'adjacent_systems_key']),
+}
+
+# Parquet when pyarrow is installed, otherwise a pickle which loads just as fast but is tied to the pandas version
+FORMAT = 'parquet' if importlib.util.find_spec('pyarrow') is not None else 'pickle'
+
+
+class ReferenceData:
+    """
+    Registry of the reference data of the transparency platform: connection points, operators, balancing zones,
+    operator point directions and (aggregate) interconnections, loaded at runtime through EntsogPandasClient
+    instead of the hardcoded enums in mappings, so new TSOs and points show up without a release.
+
+    The datasets are kept as a local snapshot (Parquet, or pickle without pyarrow) and refreshed once older
+    than max_age. Lookups go through dict indexes built once per dataset and column. It is also the in-memory
+    cache of EntsogPandasClient.warm, so a client given a loaded registry serves its reference queries from it.
+
+    Usage:
+        reference = ReferenceData('~/.cache/entsog')
+        reference.ensure(EntsogPandasClient())  # Loads the snapshot, refreshes it when stale
+        reference.operator('NL-TSO-0001')['operator_label']
+        reference.point_directions(operator_key='NL-TSO-0001')
+        client = EntsogPandasClient(reference=reference)  # Serves unfiltered reference queries from the registry
+    """
+
+    def __init__(self, path: Optional[str] = None, max_age: Optional[Union[str, pd.Timedelta]] = '1D'):
+        """
+        Parameters
+        ----------
+        path : str
+            directory of the snapshot, None keeps everything in memory only
+        max_age : str | pd.Timedelta
+            age after which a dataset is stale, None keeps datasets until they are replaced
+        """
+        self.path = os.path.expanduser(path) if path is not None else None
+        # Converted when used, so a registry can be created without importing pandas
+        self.max_age = max_age
+        self.frames: Dict[str, pd.DataFrame] = {}
+        self.refreshed: Dict[str, pd.Timestamp] = {}
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.{FORMAT}")
+
+    def _meta_file(self) -> str:
+        return os.path.join(self.path, 'reference.json')
+
+    def set(self, name: str, frame: pd.DataFrame, refreshed: Optional[pd.Timestamp] = None):
+        """Replaces a dataset, e.g. with a frame that was already queried elsewhere"""
+        if name not in DATASETS:
+            raise ValueError(f"Unknown reference dataset {name}, should be one of {list(DATASETS)}")
+
+        frame = frame.reset_index(drop=True)
+        with self._lock:
+            self.frames[name] = frame
+            self.refreshed[name] = refreshed if refreshed is not None else pd.Timestamp.now(tz='UTC')
+            self._indexes = {key: index for key, index in self._indexes.items() if key[0] != name}
+
+    def discard(self, name: str):
+        """Forgets a dataset, so it is fetched again on next use"""
+        with self._lock:
+            self.frames.pop(name, None)
+            self.refreshed.pop(name, None)
+            self._indexes = {key: index for key, index in self._indexes.items() if key[0] != name}
+
+    def _fresh(self, name: str, now: pd.Timestamp) -> bool:
+        if name not in self.frames:
+            return False
+        return self.max_age is None or now - self.refreshed[name] <= pd.Timedelta(self.max_age)
+
+    def get(self, name: str) -> Optional[pd.DataFrame]:
+        """A dataset when it is loaded and not stale, otherwise None"""
+        with self._lock:
+            return self.frames[name] if self._fresh(name, pd.Timestamp.now(tz='UTC')) else None
+
+    def refresh(self, client, datasets: Optional[List[str]] = None):
+        """
+        Queries datasets from the API and stores them in the snapshot
+
+        Parameters
+        ----------
+        client : EntsogPandasClient
+        datasets : list
+            names in DATASETS, all by default
+        """
+        for name in datasets or DATASETS:
+            method, _ = DATASETS[name]
+            self.set(name, getattr(client, method)())
+        self.save()
+
+    def stale(self) -> List[str]:
+        """Datasets that are missing or older than max_age"""
+        now = pd.Timestamp.now(tz='UTC')
+        return [name for name in DATASETS if not self._fresh(name, now)]
+
+    def ensure(self, client) -> 'ReferenceData':
+        """Loads the snapshot and refreshes the datasets that are stale"""
+        if not self.frames:
+            self.load()
+        stale = self.stale()
+        if stale:
+            self.refresh(client, stale)
+        return self
+
+    def save(self):
+        if self.path is None:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        for name, frame in self.frames.items():
+            # Write to a temporary file first, so concurrent readers never see half a snapshot
+            temp = f"{self._file(name)}.{os.getpid()}.tmp"
+            if FORMAT == 'parquet':
+                frame.to_parquet(temp, index=False)
+            else:
+                frame.to_pickle(temp)
+            os.replace(temp, self._file(name))
+
+        with open(self._meta_file(), 'w') as f:
+            json.dump({name: ts.isoformat() for name, ts in self.refreshed.items()}, f)
+
+    def load(self) -> bool:
+        """Reads the snapshot, returns False when there is none"""
+        if self.path is None or not os.path.exists(self._meta_file()):
+            return False
+
+        with open(self._meta_file()) as f:
+            refreshed = json.load(f)
+        for name, ts in refreshed.items():
+            if name not in DATASETS or not os.path.exists(self._file(name)):
+                continue
+            if FORMAT == 'parquet':
+                frame = pd.read_parquet(self._file(name))
+            else:
+                frame = pd.read_pickle(self._file(name))
+            self.set(name, frame, refreshed=pd.Timestamp(ts))
+        return bool(self.frames)
+
+    def __getitem__(self, name: str) -> pd.DataFrame:
+        try:
+            return self.frames[name]
+        except KeyError:
+            raise KeyError(f"Reference dataset {name} is not loaded, call refresh() or ensure() first") from None
+
+    def _index(self, name: str, frame: pd.DataFrame, columns: tuple) -> Dict:
+        """
+        Positions of the records of a dataset frame per value of one or more columns, built on first use. The
+        index is kept with the frame it was built from, so a dataset replaced meanwhile never gets a stale one.
+        """
+        key = (name, columns)
+        with self._lock:
+            built = self._indexes.get(key)
+            if built is None or built[0] is not frame:
+                by = list(columns) if len(columns) > 1 else columns[0]
+                built = self._indexes[key] = frame, frame.groupby(by, sort=False, dropna=False).indices
+            return built[1]
+
+    def select(self, name: str, **values) -> pd.DataFrame:
+        """
+        Records of a dataset matching all given column values, e.g. select('interconnections', to_country_key='NL')
+
+        Parameters
+        ----------
+        name : str
+        **values
+            column=value
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        frame = self[name]
+        positions = None
+        for column, value in values.items():
+            if value is None:
+                continue
+            found = self._index(name, frame, (column,)).get(value, np.array([], dtype=np.intp))
+            positions = found if positions is None else np.intersect1d(positions, found, assume_unique=True)
+        if positions is None:
+            return frame
+        return frame.take(np.sort(positions))
+
+    def _record(self, name: str, key) -> Optional[Dict]:
+        _, columns = DATASETS[name]
+        frame = self[name]
+        positions = self._index(name, frame, tuple(columns)).get(key)
+        if positions is None:
+            return None
+        return frame.iloc[positions[0]].to_dict()
+
+    def operator(self, operator_key: str) -> Optional[Dict]:
+        return self._record('operators', operator_key)
+
+    def balancing_zone(self, bz_key: str) -> Optional[Dict]:
+        return self._record('balancing_zones', bz_key)
+
+    def point_directions(self, point_key: Optional[str] = None, operator_key: Optional[str] = None,
+                         direction_key: Optional[str] = None, country: Optional[str] = None,
+                         balancing_zone: Optional[str] = None) -> pd.DataFrame:
+        return self.select('operator_point_directions', point_key=point_key, operator_key=operator_key,
+                           direction_key=direction_key, t_so_country=country,
+                           t_so_balancing_zone=balancing_zone)
+
+    def interconnections(self, **values) -> pd.DataFrame:
+        return self.select('interconnections', **values)
+
+    def operators(self, country: Optional[str] = None) -> pd.DataFrame:
+        return self.select('operators', operator_country_key=country)
+
+    def region(self, country_key: str) -> str:
+        return lookup_region(country_key)
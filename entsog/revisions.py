@@ -0,0 +1,384 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Union
+
+from ._lazy import lazy_import
+from .misc import factorize, to_utc, transform_unique
+from .rollup import _group
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+# Columns identifying an observation of operational data; revisions of it share the key
+KEY = ['operator_key', 'point_key', 'direction_key', 'indicator', 'period_type', 'period_from']
+
+# Preferred flow status first, anything else ranks below these
+FLOW_STATUS_RANK: Dict[str, int] = {
+    'Confirmed': 2,
+    'Provisional': 1,
+}
+
+# The rank goes above the seconds of the update time, which fit in 34 bits until the 26th century
+_RANK_SHIFT = 2 ** 34
+
+
+def update_times(data: pd.DataFrame) -> pd.Series:
+    """last_update_date_time as UTC timestamps, NaT where missing"""
+    # Many rows share an update time, parse every distinct one once
+    return transform_unique(data['last_update_date_time'], to_utc)
+
+
+def revision_score(data: pd.DataFrame) -> np.ndarray:
+    """
+    Preference of every row among the revisions of its key: confirmed before provisional,
+    then the latest last_update_date_time. Higher is preferred.
+    """
+    if 'flow_status' in data.columns:
+        rank = transform_unique(data['flow_status'], lambda status: status.map(FLOW_STATUS_RANK).fillna(0))
+        rank = rank.to_numpy(dtype=np.int64)
+    else:
+        rank = np.zeros(len(data), dtype=np.int64)
+
+    if 'last_update_date_time' in data.columns:
+        updated = update_times(data)
+        seconds = np.where(updated.isna(), 0, updated.to_numpy(dtype='datetime64[s]').astype(np.int64))
+    else:
+        seconds = np.zeros(len(data), dtype=np.int64)
+
+    return rank * _RANK_SHIFT + np.clip(seconds, 0, _RANK_SHIFT - 1)
+
+
+def latest_revisions(data: pd.DataFrame, key: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    The preferred revision of every key (see revision_score), with a groupby-idxmax instead of sorting
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        operational data
+    key : list
+        columns identifying an observation, KEY by default
+
+    Returns
+    -------
+    pd.DataFrame
+        one row per key, in order of first appearance
+    """
+    key = KEY if key is None else key
+    codes = [factorize(data[column]) for column in key]
+    best = _preferred([c for c, _ in codes], [len(uniques) for _, uniques in codes], revision_score(data))
+    return data.take(best)
+
+
+def _preferred(codes: List[np.ndarray], sizes: List[int], score: np.ndarray) -> np.ndarray:
+    """Position of the highest scoring row per key, keys given as integer codes per column"""
+    # Grouping on one integer id is much faster than on several object columns
+    group = _group(codes, sizes)
+    return pd.Series(score).groupby(group, sort=False).idxmax().to_numpy()
+
+
+class LatestRevisions:
+    """
+    Maintained view of the preferred revision of every observation of operational data.
+
+    Chunks arriving later (e.g. from polling or paging) are reduced to their best revision per key
+    and merged into the view: a row replaces the one in the view when it scores at least as high.
+    Only the chunk is grouped; the view is matched on integer key codes, and its rows are kept as
+    the chunks they came from until frame is read, so an update never copies or sorts the data seen before.
+
+    Usage:
+        view = LatestRevisions()
+        for chunk in chunks:
+            changed = view.update(chunk)  # The rows that are new or replaced an earlier revision
+        view.frame
+    """
+
+    def __init__(self, data: Optional[pd.DataFrame] = None, key: Optional[List[str]] = None):
+        self.key = KEY if key is None else list(key)
+        # Distinct values seen per key column; a value's position is its code
+        self._vocabulary = {column: pd.Index([], dtype=object) for column in self.key}
+        # Per row of the view: key codes, score, and where it lives among the chunks
+        self._codes = {column: np.zeros(0, dtype=np.intp) for column in self.key}
+        self._score = np.zeros(0, dtype=np.int64)
+        self._part = np.zeros(0, dtype=np.intp)
+        self._row = np.zeros(0, dtype=np.intp)
+        self._parts: List[pd.DataFrame] = []
+        self._alive: List[np.ndarray] = []
+        self._frame = None
+        if data is not None:
+            self.update(data)
+
+    def __len__(self):
+        return len(self._score)
+
+    def __repr__(self):
+        return f"LatestRevisions({len(self)} keys)"
+
+    def _encode(self, column: str, values: pd.Series) -> np.ndarray:
+        """Codes of the values of a column in its vocabulary, which grows with unseen values"""
+        codes, uniques = factorize(values)
+        vocabulary = self._vocabulary[column]
+        positions = vocabulary.get_indexer(uniques)
+        unknown = positions < 0
+        if unknown.any():
+            positions[unknown] = np.arange(len(vocabulary), len(vocabulary) + unknown.sum())
+            self._vocabulary[column] = vocabulary.append(pd.Index(uniques[unknown], dtype=object))
+        return positions[codes]
+
+    def update(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """
+        Merges a chunk of operational data into the view
+
+        Parameters
+        ----------
+        chunk : pd.DataFrame
+
+        Returns
+        -------
+        pd.DataFrame
+            the rows of the chunk that were added to the view
+        """
+        if chunk.empty:
+            return chunk
+
+        # Values are hashed once per chunk, everything after works on their codes
+        codes = {column: self._encode(column, chunk[column]) for column in self.key}
+        score = revision_score(chunk)
+        position = _preferred(list(codes.values()), [len(self._vocabulary[column]) for column in self.key], score)
+        best = chunk.take(position).reset_index(drop=True)
+        codes = {column: column_codes[position] for column, column_codes in codes.items()}
+        score = score[position]
+
+        # The keys of the view are distinct, so they get group ids 0..n-1 in order
+        n = len(self)
+        group = _group([np.concatenate([self._codes[column], codes[column]]) for column in self.key],
+                       [len(self._vocabulary[column]) for column in self.key])[n:]
+        known = group < n
+        added = ~known
+        added[known] = score[known] >= self._score[group[known]]
+        replaced = group[known & added]
+
+        for part in np.unique(self._part[replaced]):
+            rows = self._row[replaced][self._part[replaced] == part]
+            self._alive[part][rows] = False
+
+        keep = np.ones(n, dtype=bool)
+        keep[replaced] = False
+        new = best[added].reset_index(drop=True)
+        self._codes = {column: np.concatenate([self._codes[column][keep], codes[column][added]])
+                       for column in self.key}
+        self._score = np.concatenate([self._score[keep], score[added]])
+        self._part = np.concatenate([self._part[keep], np.full(len(new), len(self._parts), dtype=np.intp)])
+        self._row = np.concatenate([self._row[keep], np.arange(len(new), dtype=np.intp)])
+        self._parts.append(new)
+        self._alive.append(np.ones(len(new), dtype=bool))
+        self._frame = None
+        return new
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """The view: one row per key, in order of arrival"""
+        if self._frame is None:
+            parts = [part[alive] for part, alive in zip(self._parts, self._alive)]
+            self._frame = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+            # Compact into a single chunk, the order of the rows stays the same
+            self._parts, self._alive = [self._frame], [np.ones(len(self._frame), dtype=bool)]
+            self._part = np.zeros(len(self._frame), dtype=np.intp)
+            self._row = np.arange(len(self._frame), dtype=np.intp)
+        return self._frame
+
+
+# Columns of operational data kept per version by RevisionStore
+VALUE_COLUMNS = ['value', 'flow_status']
+
+
+class RevisionStore:
+    """
+    Every distinct version of every observation of operational data, by last_update_date_time,
+    to see what was published at some moment in the past.
+
+    A version is only stored when one of its value columns differs from the version before it,
+    so re-pulling a window that did not change adds nothing. Versions are kept as columnar arrays:
+    an integer key id, the update time in nanoseconds, floats for numeric columns and categorical
+    codes for the others. Snapshots are answered with binary searches over the versions sorted by
+    (key, update time), never by scanning them.
+
+    Only versions newer than the latest stored one of their key are added: the API serves the
+    current version only, so older ones can not show up later.
+
+    Usage:
+        store = RevisionStore()
+        store.add(client.query_operational_point_data(...))  # Every poll or daily pull
+        store.as_of('2022-03-01 06:00')  # The data as published at that moment
+    """
+
+    def __init__(self, key: Optional[List[str]] = None, columns: Optional[List[str]] = None):
+        self.key = KEY if key is None else list(key)
+        self.columns = VALUE_COLUMNS if columns is None else list(columns)
+        self._vocabulary = {column: pd.Index([], dtype=object) for column in self.key}
+        # Key codes per key id
+        self._key_codes = {column: np.zeros(0, dtype=np.intp) for column in self.key}
+        # Update time and values of the latest version per key id, to skip unchanged versions
+        self._latest = np.zeros(0, dtype=np.int64)
+        self._latest_values = {}
+        # Added versions per chunk, sorted into one index on the first query after an add
+        self._chunks = []
+        self._sorted = None
+
+    def __len__(self):
+        return sum(len(chunk[0]) for chunk in self._chunks)
+
+    def __repr__(self):
+        return f"RevisionStore({len(self)} versions of {len(self._latest)} keys)"
+
+    def _encode(self, column: str, values: pd.Series) -> np.ndarray:
+        """Codes of the values of a column in its vocabulary, which grows with unseen values"""
+        codes, uniques = factorize(values)
+        vocabulary = self._vocabulary.get(column, pd.Index([], dtype=object))
+        positions = vocabulary.get_indexer(uniques)
+        unknown = positions < 0
+        if unknown.any():
+            positions[unknown] = np.arange(len(vocabulary), len(vocabulary) + unknown.sum())
+            vocabulary = vocabulary.append(pd.Index(uniques[unknown], dtype=object))
+        self._vocabulary[column] = vocabulary
+        return positions[codes]
+
+    def _values(self, column: str, values: pd.Series) -> np.ndarray:
+        if column not in self._latest_values:
+            numeric = pd.api.types.is_numeric_dtype(values)
+            self._latest_values[column] = np.zeros(0, dtype=float if numeric else np.intp)
+        if self._latest_values[column].dtype == float:
+            return pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
+        return self._encode(column, values)
+
+    def add(self, data: pd.DataFrame) -> int:
+        """
+        Stores the versions in data that are new and changed
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            operational data with the key, value columns and last_update_date_time
+
+        Returns
+        -------
+        int
+            number of versions stored
+        """
+        updated = update_times(data).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        known = ~np.isnat(updated.view('datetime64[ns]'))
+        data, updated = data[known], updated[known]
+        if data.empty:
+            return 0
+
+        # Key ids: known keys get ids 0..n-1 in order, new ones the ids after
+        n = len(self._latest)
+        codes = {column: self._encode(column, data[column]) for column in self.key}
+        key = _group([np.concatenate([self._key_codes[column], codes[column]]) for column in self.key],
+                     [len(self._vocabulary[column]) for column in self.key])[n:]
+        new_keys, first = np.unique(key[key >= n], return_index=True)
+        keys = len(self._latest) + len(new_keys)
+        for column in self.key:
+            self._key_codes[column] = np.concatenate([self._key_codes[column], codes[column][key >= n][first]])
+        self._latest = np.concatenate([self._latest, np.full(len(new_keys), np.iinfo(np.int64).min)])
+        values = {column: self._values(column, data[column]) for column in self.columns}
+        for column, latest in self._latest_values.items():
+            fill = np.nan if latest.dtype == float else -1
+            self._latest_values[column] = np.concatenate([latest, np.full(keys - len(latest), fill, latest.dtype)])
+
+        # Versions of the same key in time order, one per update time
+        order = np.lexsort((updated, key))
+        key, updated = key[order], updated[order]
+        last = np.r_[(key[1:] != key[:-1]) | (updated[1:] != updated[:-1]), True]
+        order = order[last]
+        key, updated = key[last], updated[last]
+        values = {column: array[order] for column, array in values.items()}
+
+        # Only versions after the latest stored one, and only when something changed compared to the one before:
+        # the previous row if that is a new version of the same key too, else the latest stored one
+        newer = updated > self._latest[key]
+        after_new = np.r_[False, (key[1:] == key[:-1]) & newer[:-1]]
+        changed = ~after_new & (self._latest[key] == np.iinfo(np.int64).min)  # First version of a key
+        for column, array in values.items():
+            previous = np.where(after_new, np.r_[array[:1], array[:-1]], self._latest_values[column][key])
+            if array.dtype == float:
+                changed |= ~((array == previous) | (np.isnan(array) & np.isnan(previous)))
+            else:
+                changed |= array != previous
+        stored = newer & changed
+
+        key, updated = key[stored], updated[stored]
+        values = {column: array[stored] for column, array in values.items()}
+        if len(key):
+            last = np.r_[key[1:] != key[:-1], True]
+            self._latest[key[last]] = updated[last]
+            for column, array in values.items():
+                self._latest_values[column][key[last]] = array[last]
+            self._chunks.append((key, updated, values))
+            self._sorted = None
+        return len(key)
+
+    def _index(self):
+        """All versions sorted by key and update time, with a composite key of key id and rank of update time"""
+        if self._sorted is None:
+            key = np.concatenate([chunk[0] for chunk in self._chunks]) if self._chunks else np.zeros(0, np.intp)
+            updated = np.concatenate([chunk[1] for chunk in self._chunks]) if self._chunks else np.zeros(0, np.int64)
+            values = {column: np.concatenate([chunk[2][column] for chunk in self._chunks])
+                      for column in self.columns} if self._chunks else {}
+
+            times, rank = np.unique(updated, return_inverse=True)
+            composite = key.astype(np.int64) * (len(times) + 1) + rank
+            order = np.argsort(composite, kind='stable')
+            self._sorted = (composite[order], key[order], times, updated[order],
+                            {column: array[order] for column, array in values.items()})
+            # One chunk from now on
+            self._chunks = [(key[order], updated[order], self._sorted[4])] if len(key) else []
+        return self._sorted
+
+    def as_of(self, timestamp: Union[str, pd.Timestamp]) -> pd.DataFrame:
+        """
+        The data as it was published at a moment: per key, the latest version updated at or before it
+
+        Parameters
+        ----------
+        timestamp : str | pd.Timestamp
+            naive timestamps are taken as UTC
+
+        Returns
+        -------
+        pd.DataFrame
+            key columns, value columns and last_update_date_time
+        """
+        timestamp = pd.Timestamp(timestamp)
+        timestamp = timestamp.tz_localize('UTC') if timestamp.tzinfo is None else timestamp.tz_convert('UTC')
+        composite, key, times, _, _ = self._index()
+
+        # Per key, the last version with a rank of update time up to the one of timestamp
+        rank = np.searchsorted(times, timestamp.value, side='right') - 1
+        keys = np.arange(len(self._latest), dtype=np.int64)
+        position = np.searchsorted(composite, keys * (len(times) + 1) + rank, side='right') - 1
+        found = position >= 0
+        found[found] = key[position[found]] == keys[found]
+        return self._frame(position[found])
+
+    def history(self, **values) -> pd.DataFrame:
+        """
+        Every stored version of the keys matching the given key column values, e.g. history(point_key='ITP-00001')
+        """
+        _, key, _, _, _ = self._index()
+        selected = np.ones(len(self._latest), dtype=bool)
+        for column, value in values.items():
+            selected &= self._key_codes[column] == self._vocabulary[column].get_indexer([value])[0]
+        return self._frame(np.flatnonzero(selected[key]))
+
+    def _frame(self, position: np.ndarray) -> pd.DataFrame:
+        """Decodes versions at positions of the index into a DataFrame"""
+        _, key, _, updated, values = self._index()
+        result = pd.DataFrame({
+            column: self._vocabulary[column].take(self._key_codes[column][key[position]]) for column in self.key
+        })
+        for column, array in values.items():
+            array = array[position]
+            result[column] = array if array.dtype == float else self._vocabulary[column].take(array)
+        result['last_update_date_time'] = pd.to_datetime(updated[position], utc=True)
+        return result
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from typing import Dict, List, Sequence
+
+from ._lazy import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+# Combined group keys are re-densified before they could overflow an int64
+_KEY_BOUND = 2 ** 62
+
+
+def _group(codes: Sequence[np.ndarray], sizes: Sequence[int]) -> np.ndarray:
+    """
+    Dense group ids (in order of first appearance) of the rows of several integer-coded columns.
+    Missing values (code -1) form a group of their own.
+    """
+    key = np.zeros(len(codes[0]) if codes else 0, dtype=np.int64)
+    bound = 1
+    for column, size in zip(codes, sizes):
+        if bound * (size + 1) >= _KEY_BOUND:
+            key, uniques = pd.factorize(key)
+            key = key.astype(np.int64)
+            bound = len(uniques)
+        key = key * (size + 1) + (column + 1)
+        bound *= size + 1
+    group, _ = pd.factorize(key)
+    return group
+
+
+def _first(group: np.ndarray, groups: int) -> np.ndarray:
+    """Position of the first row of every group"""
+    first = np.empty(groups, dtype=np.intp)
+    positions = np.arange(len(group), dtype=np.intp)
+    first[group[::-1]] = positions[::-1]
+    return first
+
+
+class Rollup:
+    """
+    Sums a value over several levels of grouping columns, e.g. point, operator, balancing zone, country
+    and region, where every level groups on a subset of the columns of the finest one.
+
+    The columns are factorized once into integer codes and the data is summed once over all columns;
+    every level is then rolled up from that much smaller table instead of from the raw data, and kept,
+    so drilling between levels does not group the raw data again. Rows with a missing value in one of
+    the columns of a level are left out of that level, like pandas.DataFrame.groupby.
+
+    Usage:
+        rollup = Rollup(data, OPERATIONAL_AGGREGATE_LEVELS)
+        rollup['region']
+        rollup['point']
+    """
+
+    def __init__(self, data: pd.DataFrame, levels: Dict[str, List[str]], value: str = 'value'):
+        """
+        Parameters
+        ----------
+        data : pd.DataFrame
+        levels : dict
+            level name -> grouping columns
+        value : str
+            column to sum
+        """
+        self.levels = {name: list(columns) for name, columns in levels.items()}
+        self.value = value
+        self.columns = list(dict.fromkeys(column for columns in self.levels.values() for column in columns))
+        self._cache = {}
+
+        # Sorted codes, so sorting on the codes sorts the levels like groupby does
+        factorized = {column: pd.factorize(data[column], sort=True) for column in self.columns}
+        self._uniques = {column: uniques for column, (_, uniques) in factorized.items()}
+        codes = [factorized[column][0] for column in self.columns]
+        sizes = [len(self._uniques[column]) for column in self.columns]
+
+        group = _group(codes, sizes)
+        groups = int(group.max()) + 1 if len(group) else 0
+        first = _first(group, groups)
+        self._codes = {column: column_codes[first] for column, column_codes in zip(self.columns, codes)}
+        self._values = data[self.value].groupby(group, sort=False).sum().reindex(range(groups)).to_numpy()
+
+    def __getitem__(self, level: str) -> pd.DataFrame:
+        if level not in self._cache:
+            if level not in self.levels:
+                raise KeyError(f"Unknown level {level}, should be one of {list(self.levels)}")
+            self._cache[level] = self._roll_up(self.levels[level])
+        return self._cache[level]
+
+    def _roll_up(self, columns: List[str]) -> pd.DataFrame:
+        codes = [self._codes[column] for column in columns]
+        sizes = [len(self._uniques[column]) for column in columns]
+
+        # Like groupby, leave out groups with a missing key
+        complete = np.logical_and.reduce([c >= 0 for c in codes]) if codes else np.ones(len(self._values), bool)
+        codes = [c[complete] for c in codes]
+        values = self._values[complete]
+
+        group = _group(codes, sizes)
+        groups = int(group.max()) + 1 if len(group) else 0
+        first = _first(group, groups)
+        sums = pd.Series(values).groupby(group, sort=False).sum().reindex(range(groups)).to_numpy()
+
+        level_codes = [c[first] for c in codes]
+        order = np.lexsort(level_codes[::-1]) if level_codes else np.arange(groups)
+        df = pd.DataFrame({
+            column: self._uniques[column].take(c[order]) for column, c in zip(columns, level_codes)
+        })
+        df[self.value] = sums[order]
+        return df
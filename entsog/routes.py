@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from ._lazy import lazy_import
+from .intervals import PERIOD, IntervalIndex
+from .topology import INTERCONNECTION, Topology
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+KEY = ['point_key', 'direction_key', 'product_type']
+COST_COLUMN = 'product_simulation_cost_in_euro'
+
+
+class RouteCosts:
+    """
+    Transport costs along routes between balancing zones, from the tariff simulations (the cost of flowing
+    1 GWh/d for a year, see query_tariffs_sim) and the interconnections of a Topology.
+
+    Crossing an interconnection costs the exit tariff at its from point plus the entry tariff at its to point;
+    between two balancing zones the cheapest of the parallel points is taken, and a route costs the sum of its
+    hops. A side without a simulation counts as free, a hop without any priced point makes the route unpriced.
+
+    The costs of all hops and products are arrays per tariff period; routes are padded into a matrix of hops
+    so the costs of every route and product are a single gather and sum. The hop costs are cached per
+    set of tariffs in force, so timestamps within the same tariff periods reuse them.
+
+    Usage:
+        costs = RouteCosts(topology, client.query_tariffs_sim(start, end, country_code='DE'))
+        costs.route_costs('NO---------', 'AT---------', timestamp='2022-03-01', max_hops=4)
+        costs.route_costs(['NO---------', 'DE-THE-----', 'CZ---------', 'AT---------'])
+    """
+
+    def __init__(self, topology: Topology, tariffs: pd.DataFrame, column: str = COST_COLUMN):
+        """
+        Parameters
+        ----------
+        topology : Topology
+        tariffs : pd.DataFrame
+            output of parse_tariffs_sim or EntsogPandasClient.query_tariffs_sim
+        column : str
+            cost column, e.g. product_simulation_cost_in_local_currency
+        """
+        self.topology = topology
+        self.tariffs = tariffs.reset_index(drop=True)
+        self.column = column
+        self.product_types = sorted(self.tariffs['product_type'].dropna().unique().tolist())
+        self._periods = IntervalIndex.from_frame(self.tariffs, PERIOD)
+        self._cache: Dict[Tuple, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def __repr__(self):
+        return f"RouteCosts({len(self.tariffs)} tariffs, {len(self._cache)} periods cached)"
+
+    @property
+    def periods(self) -> pd.DatetimeIndex:
+        """Distinct starts of the tariff periods"""
+        return pd.DatetimeIndex(pd.to_datetime(self.tariffs['period_from'], utc=True).unique()).sort_values()
+
+    def _edges(self) -> pd.DataFrame:
+        edges = self.topology.edges
+        return edges[edges['kind'] == INTERCONNECTION]
+
+    def _point_costs(self, positions: np.ndarray) -> pd.Series:
+        """Cost per point, direction and product type of the tariffs in force, the latest period wins"""
+        tariffs = self.tariffs.take(positions)
+        tariffs = tariffs.assign(_start=pd.to_datetime(tariffs['period_from'], utc=True)).sort_values('_start')
+        tariffs = tariffs.drop_duplicates(subset=KEY, keep='last')
+        return pd.Series(pd.to_numeric(tariffs[self.column], errors='coerce').to_numpy(dtype=float),
+                         index=pd.MultiIndex.from_frame(tariffs[KEY].astype(object)))
+
+    def _hop_costs(self, timestamp) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cheapest cost, and the interconnection edge giving it, of crossing from every node to every other
+        node per product type: arrays of shape (nodes * nodes + 1, products), the last row a free padding hop
+        """
+        positions = np.sort(self._periods.at([pd.Timestamp(timestamp)])[1])
+        key = (positions.tobytes(), self.topology.version)
+        if key in self._cache:
+            return self._cache[key]
+
+        edges = self._edges()
+        point_costs = self._point_costs(positions)
+        n, m, products = len(self.topology.nodes), len(edges), len(self.product_types)
+
+        # Exit and entry cost of every edge and product, all at once
+        product = np.tile(np.array(self.product_types, dtype=object), m)
+        exits = pd.MultiIndex.from_arrays([np.repeat(edges['from_point_key'].to_numpy(dtype=object), products),
+                                           np.full(m * products, 'exit', dtype=object), product])
+        entries = pd.MultiIndex.from_arrays([np.repeat(edges['to_point_key'].to_numpy(dtype=object), products),
+                                             np.full(m * products, 'entry', dtype=object), product])
+        exit_cost = point_costs.reindex(exits).to_numpy(dtype=float).reshape(m, products)
+        entry_cost = point_costs.reindex(entries).to_numpy(dtype=float).reshape(m, products)
+        cost = np.where(np.isnan(exit_cost) & np.isnan(entry_cost), np.nan,
+                        np.nan_to_num(exit_cost) + np.nan_to_num(entry_cost))
+
+        # Cheapest of the parallel points per pair of nodes and product: sort by (pair, product, cost)
+        index = self.topology.index
+        pair = edges['source'].map(index).to_numpy(dtype=np.int64) * n + edges['target'].map(index).to_numpy(
+            dtype=np.int64)
+        cells = np.repeat(pair, products) * products + np.tile(np.arange(products), m)
+        flat = cost.ravel()
+        order = np.lexsort((np.where(np.isnan(flat), np.inf, flat), cells))
+        first = order[np.r_[True, cells[order][1:] != cells[order][:-1]]] if m else order
+
+        hop_cost = np.full((n * n + 1) * products, np.nan)
+        hop_edge = np.full((n * n + 1) * products, -1, dtype=np.int64)
+        hop_cost[cells[first]] = flat[first]
+        hop_edge[cells[first]] = np.where(np.isnan(flat[first]), -1, edges.index.to_numpy()[first // products])
+        hop_cost[n * n * products:] = 0.0
+
+        result = self._cache[key] = hop_cost.reshape(-1, products), hop_edge.reshape(-1, products)
+        return result
+
+    def _hops(self, routes: List[List[str]]) -> np.ndarray:
+        """Routes as a matrix of node pairs, padded with the free hop"""
+        n = len(self.topology.nodes)
+        width = max((len(route) - 1 for route in routes), default=0)
+        hops = np.full((len(routes), width), n * n, dtype=np.int64)
+        for i, route in enumerate(routes):
+            ids = np.array([self.topology.index[node] for node in route], dtype=np.int64)
+            hops[i, :len(ids) - 1] = ids[:-1] * n + ids[1:]
+        return hops
+
+    def route_costs(self, source: Union[str, Sequence[str]], target: Optional[str] = None,
+                    timestamp: Optional[Union[str, pd.Timestamp]] = None, max_hops: int = 4,
+                    product_types: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Costs of the routes between two balancing zones, or of given routes, per product type
+
+        Parameters
+        ----------
+        source : str | list
+            balancing zone key, or a route as a list of balancing zone keys (or a list of such routes)
+        target : str
+            balancing zone key, all simple routes from source are then costed
+        timestamp : str | pd.Timestamp
+            the tariffs in force at this time are used, every tariff period when None
+        max_hops : int
+        product_types : list
+            e.g. ['Yearly', 'Daily'], all product types by default
+
+        Returns
+        -------
+        pd.DataFrame
+            route, hops, timestamp (the start of every tariff period when none was given), product_type,
+            cost and the interconnection points crossed, cheapest first
+        """
+        if target is not None:
+            routes = list(self.topology.routes(source, target, max_hops=max_hops))
+        elif isinstance(source, str):
+            raise ValueError(f"Give a target for source {source}, or a route as a list of balancing zones")
+        elif len(source) and isinstance(source[0], str):
+            routes = [list(source)]
+        else:
+            routes = [list(route) for route in source]
+
+        products = [self.product_types.index(p) for p in product_types if p in self.product_types] \
+            if product_types is not None else list(range(len(self.product_types)))
+        timestamps = self.periods if timestamp is None else [pd.Timestamp(timestamp)]
+        hops = self._hops(routes)
+        lengths = np.array([len(route) - 1 for route in routes], dtype=np.int64)
+        point_keys = self.topology.edges['point_key'].to_numpy(dtype=object)
+
+        frames = []
+        for at in timestamps:
+            hop_cost, hop_edge = self._hop_costs(at)
+            # (routes, hops, products)
+            cost = hop_cost[hops][:, :, products].sum(axis=1)
+            edge = hop_edge[hops][:, :, products]
+
+            route, product = np.divmod(np.arange(cost.size), len(products))
+            points = [tuple(point_keys[e] if e >= 0 else None for e in edge[r, :lengths[r], p])
+                      for r, p in zip(route, product)]
+            frames.append(pd.DataFrame({
+                'route': [tuple(routes[r]) for r in route],
+                'hops': lengths[route],
+                'timestamp': pd.Timestamp(at),
+                'product_type': np.array(self.product_types, dtype=object)[np.array(products, dtype=np.int64)][product],
+                'cost': cost.ravel(),
+                'points': points,
+            }))
+
+        if not frames:
+            return pd.DataFrame(columns=['route', 'hops', 'timestamp', 'product_type', 'cost', 'points'])
+        result = pd.concat(frames, ignore_index=True)
+        return result.sort_values(['timestamp', 'product_type', 'cost'], na_position='last', kind='stable') \
+            .reset_index(drop=True)
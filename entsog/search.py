@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Optional, Sequence
+
+from ._lazy import lazy_import
+from .misc import ranges
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+unidecode = lazy_import('unidecode')
+
+# Free-text columns of urgent market messages and operational data
+TEXT_COLUMNS = ['remarks', 'unavailability_reason', 'affected_asset_name', 'item_remarks', 'general_remarks']
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+_QUERY = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase ASCII words of a text, with accents removed like to_snake_case does"""
+    return _TOKEN.findall(unidecode.unidecode(text).lower())
+
+
+class TextIndex:
+    """
+    Inverted index over the free-text columns of DataFrames, e.g. the remarks of urgent market messages
+    and operational data, for term and phrase queries that return row ids.
+
+    Remarks repeat a lot, so every distinct text is tokenized once; the postings map a term to the
+    positions at which it occurs in these texts, and the texts map to the rows they occur in.
+    Rows are added incrementally; with a key column, adding a row with a known key replaces the
+    earlier one, so the index can follow the UrgentMarketMessages updates.
+
+    Usage:
+        index = TextIndex(key='message_id')
+        messages = UrgentMarketMessages(client, callback=index.add)
+        rows = index.search('maintenance "compressor station"')
+        index.keys(rows)
+    """
+
+    def __init__(self, columns: Optional[Sequence[str]] = None, key: Optional[str] = None):
+        """
+        Parameters
+        ----------
+        columns : list
+            columns to index, those of TEXT_COLUMNS present in the data by default
+        key : str
+            column identifying a record, the index label by default
+        """
+        self.columns = list(columns) if columns is not None else None
+        self.key = key
+
+        # Distinct texts, and term -> text id -> positions of the term in that text
+        self._texts: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[int, List[int]]] = {}
+        # Per occurrence of a text in a row
+        self._occurrences = []
+        self._keys = []
+        self._row_count = 0
+        self._alive = np.zeros(0, dtype=bool)
+        self._rows_by_key: Dict = {}
+        self._sorted = None
+
+    def __len__(self):
+        return int(self._alive.sum())
+
+    def __repr__(self):
+        return f"TextIndex({len(self)} rows, {len(self._postings)} terms)"
+
+    def _text_id(self, text: str) -> int:
+        text_id = self._texts.get(text)
+        if text_id is None:
+            text_id = self._texts[text] = len(self._texts)
+            for position, term in enumerate(tokenize(text)):
+                self._postings.setdefault(term, {}).setdefault(text_id, []).append(position)
+        return text_id
+
+    def add(self, data: pd.DataFrame) -> np.ndarray:
+        """
+        Indexes the rows of a DataFrame
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+
+        Returns
+        -------
+        np.ndarray
+            the row ids given to the rows, in order
+        """
+        rows = np.arange(self._row_count, self._row_count + len(data))
+        self._row_count += len(data)
+        self._alive = np.concatenate([self._alive, np.ones(len(data), dtype=bool)])
+        keys = data[self.key].to_numpy() if self.key is not None else data.index.to_numpy()
+        self._keys.append(keys)
+
+        if self.key is not None:
+            # A new version of a record replaces the earlier one
+            for row, key in zip(rows, keys):
+                previous = self._rows_by_key.get(key)
+                if previous is not None:
+                    self._alive[previous] = False
+                self._rows_by_key[key] = row
+
+        columns = self.columns if self.columns is not None else [c for c in TEXT_COLUMNS if c in data.columns]
+        for column in columns:
+            codes, uniques = pd.factorize(data[column])
+            text_ids = np.array([self._text_id(str(text)) for text in uniques], dtype=np.intp)
+            found = codes >= 0
+            self._occurrences.append((text_ids[codes[found]], rows[found]))
+        self._sorted = None
+        return rows
+
+    def _index(self):
+        """Occurrences sorted by text id"""
+        if self._sorted is None:
+            text_ids = np.concatenate([t for t, _ in self._occurrences]) if self._occurrences else np.zeros(0, np.intp)
+            rows = np.concatenate([r for _, r in self._occurrences]) if self._occurrences else np.zeros(0, np.intp)
+            order = np.argsort(text_ids, kind='stable')
+            self._occurrences = [(text_ids[order], rows[order])]
+            self._sorted = text_ids[order], rows[order]
+        return self._sorted
+
+    def _rows(self, text_ids) -> np.ndarray:
+        sorted_texts, rows = self._index()
+        text_ids = np.fromiter(text_ids, dtype=np.intp)
+        positions = ranges(np.searchsorted(sorted_texts, text_ids, side='left'),
+                            np.searchsorted(sorted_texts, text_ids, side='right'))
+        found = np.unique(rows[positions])
+        return found[self._alive[found]]
+
+    def term(self, term: str) -> np.ndarray:
+        """Row ids of the rows containing a word"""
+        tokens = tokenize(term)
+        if len(tokens) != 1:
+            return self.phrase(term)
+        return self._rows(self._postings.get(tokens[0], {}).keys())
+
+    def phrase(self, phrase: str) -> np.ndarray:
+        """Row ids of the rows containing the words of a phrase one after the other"""
+        tokens = tokenize(phrase)
+        if not tokens:
+            return np.zeros(0, dtype=np.intp)
+        postings = [self._postings.get(token, {}) for token in tokens]
+        candidates = set.intersection(*(set(p) for p in postings))
+
+        matches = []
+        for text_id in candidates:
+            starts = set(postings[0][text_id])
+            for offset, p in enumerate(postings[1:], start=1):
+                starts &= {position - offset for position in p[text_id]}
+                if not starts:
+                    break
+            if starts:
+                matches.append(text_id)
+        return self._rows(matches)
+
+    def search(self, query: str) -> np.ndarray:
+        """
+        Row ids of the rows containing every word and "quoted phrase" of a query
+
+        Parameters
+        ----------
+        query : str
+            e.g. 'maintenance "compressor station"'
+
+        Returns
+        -------
+        np.ndarray
+        """
+        result = None
+        for phrase, word in _QUERY.findall(query):
+            rows = self.phrase(phrase) if phrase else self.term(word)
+            result = rows if result is None else np.intersect1d(result, rows, assume_unique=True)
+        return result if result is not None else np.zeros(0, dtype=np.intp)
+
+    def keys(self, rows: np.ndarray) -> np.ndarray:
+        """The keys (or index labels) of row ids"""
+        keys = np.concatenate(self._keys) if self._keys else np.zeros(0, dtype=object)
+        self._keys = [keys]
+        return keys[rows]
@@ -0,0 +1,205 @@
+import json
+import random
+import threading
+import time
+import urllib.parse
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple, Union
+
+from .cassette import Cassette
+from .exceptions import CassetteMissError
+from .synthetic import DATA_KEYS, generate_frame, render_payload
+
+API_PREFIX = '/api/v1'
+
+FAULT_MESSAGES = {
+    429: 'Too Many Requests',
+    500: 'Internal Server Error',
+    502: 'Bad Gateway',
+    504: 'Gateway Timeout',
+}
+
+
+class EntsogServer:
+    """
+    Local stand-in for the ENTSOG transparency API, for load and fault-injection testing.
+
+    Serves the /api/v1 endpoints used by the clients with synthetic data, or replays the responses of a Cassette.
+    Synthetic responses follow the limit/offset semantics of the API and carry a meta block; an offset past the
+    last record answers 404 "No Data Found" like the real service.
+
+    Usage:
+        with EntsogServer(latency=0.05, faults={429: 0.1, 502: 0.05}, rows=50_000) as server:
+            client = EntsogPandasClient(base_url=server.url, retry_delay=0)
+            client.query_operational_data_all(start=start, end=end)
+    """
+
+    def __init__(self,
+                 host: str = '127.0.0.1',
+                 port: int = 0,
+                 rows: Union[int, Dict[str, int]] = 1000,
+                 latency: Union[float, Tuple[float, float]] = 0.0,
+                 faults: Optional[Dict[int, float]] = None,
+                 cassette: Optional[Cassette] = None,
+                 seed: int = 0):
+        """
+        Parameters
+        ----------
+        host : str
+        port : int
+            0 picks a free port
+        rows : int | dict
+            number of records matching every query, or per endpoint e.g. {'/operationaldatas': 1_000_000}
+        latency : float | (float, float)
+            seconds to wait before answering, or the bounds of a uniformly drawn wait
+        faults : dict
+            probability of answering with a status code instead of data, e.g. {429: 0.05, 502: 0.01}
+        cassette : Cassette
+            recorded responses to serve instead of synthetic data
+        seed : int
+        """
+        unknown = set(faults or {}) - set(FAULT_MESSAGES)
+        if unknown:
+            raise ValueError(f"Can only inject faults {sorted(FAULT_MESSAGES)}, not {sorted(unknown)}")
+
+        self.rows = rows
+        self.latency = latency
+        self.faults = dict(faults or {})
+        self.cassette = cassette
+        self.seed = seed
+        self.requests = 0
+        self.injected = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._frame = lru_cache(maxsize=32)(self._generate)
+        self._thread = None
+
+        handler = type('EntsogRequestHandler', (_Handler,), {'server_state': self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def start(self) -> 'EntsogServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _rows(self, endpoint: str) -> int:
+        if isinstance(self.rows, dict):
+            return self.rows.get(endpoint, 1000)
+        return self.rows
+
+    def _generate(self, endpoint: str, start: Optional[str], end: Optional[str], period_type: str):
+        return generate_frame(endpoint, self._rows(endpoint), start=start, end=end,
+                              period_type=period_type, seed=self.seed)
+
+    def _draw(self) -> Tuple[float, Optional[int]]:
+        with self._lock:
+            self.requests += 1
+            if isinstance(self.latency, tuple):
+                delay = self._random.uniform(*self.latency)
+            else:
+                delay = self.latency
+
+            draw = self._random.random()
+            for status, probability in self.faults.items():
+                if draw < probability:
+                    self.injected += 1
+                    return delay, status
+                draw -= probability
+
+        return delay, None
+
+    def respond(self, path: str, query: str) -> Tuple[int, str]:
+        """Returns the status code and body answering a GET request"""
+        delay, fault = self._draw()
+        if delay:
+            time.sleep(delay)
+        if fault is not None:
+            return fault, json.dumps({'message': FAULT_MESSAGES[fault]})
+
+        if not path.startswith(API_PREFIX) or path[len(API_PREFIX):] not in DATA_KEYS:
+            return 404, json.dumps({'message': f"Unknown endpoint {path}"})
+        endpoint = path[len(API_PREFIX):]
+        params = dict(urllib.parse.parse_qsl(query, keep_blank_values=True))
+
+        if self.cassette is not None:
+            try:
+                response = self.cassette.play(endpoint, params)
+            except CassetteMissError:
+                response = None
+            if response is None:
+                return 404, json.dumps({'message': 'No Data Found'})
+            return response.status_code, response.text
+
+        limit = int(params.get('limit', -1))
+        offset = int(params.get('offset', 0))
+        frame = self._frame(endpoint, params.get('from'), params.get('to'), params.get('periodType', 'day'))
+        if len(frame) == 0 or offset >= len(frame):
+            return 404, json.dumps({'message': 'No Data Found'})
+
+        return 200, render_payload(endpoint, frame, offset=offset, limit=limit, query=query)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_state = None
+
+    def do_GET(self):
+        path, _, query = self.path.partition('?')
+        status, body = self.server_state.respond(path, query)
+        content = body.encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        # Keep load tests quiet
+        pass
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Local stand-in for the ENTSOG transparency API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--rows', type=int, default=1000, help='records matching every query')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds before answering')
+    parser.add_argument('--fault', action='append', default=[], metavar='STATUS=PROBABILITY',
+                        help='inject a status code, e.g. --fault 429=0.05')
+    parser.add_argument('--cassette', help='directory of recorded responses to serve')
+    args = parser.parse_args()
+
+    faults = {int(status): float(probability) for status, probability in (f.split('=') for f in args.fault)}
+    cassette = Cassette(args.cassette, mode='replay') if args.cassette else None
+    server = EntsogServer(host=args.host, port=args.port, rows=args.rows, latency=args.latency,
+                          faults=faults, cassette=cassette)
+    print(f"Serving on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
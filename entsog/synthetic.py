@@ -0,0 +1,495 @@
+import json
+from typing import IO, Optional
+
+import numpy as np
+import pandas as pd
+
+from .mappings import Area, BalancingZone, Country, Indicator
+
+# Name of the list holding the records in the response of every endpoint
+DATA_KEYS = {
+    '/connectionpoints': 'connectionpoints',
+    '/operators': 'operators',
+    '/balancingzones': 'balancingzones',
+    '/operatorpointdirections': 'operatorpointdirections',
+    '/interconnections': 'interconnections',
+    '/aggregateInterconnections': 'aggregateinterconnections',
+    '/urgentmarketmessages': 'urgentmarketmessages',
+    '/tariffsfulls': 'tariffsfulls',
+    '/tariffsSimulations': 'tariffssimulations',
+    '/aggregatedData': 'aggregateddata',
+    '/interruptions': 'interruptions',
+    '/cmpauctions': 'cmpauctions',
+    '/cmpunavailables': 'cmpunavailables',
+    '/cmpUnsuccessfulRequests': 'cmpunsuccessfulrequests',
+    '/operationaldatas': 'operationaldatas',
+}
+
+_PERIOD = ['periodFrom', 'periodTo']
+_POINT = ['pointKey', 'pointLabel', 'operatorKey', 'tsoEicCode', 'operatorLabel', 'tsoItemIdentifier', 'directionKey']
+_REMARKS = ['itemRemarks', 'generalRemarks', 'lastUpdateDateTime']
+
+# Columns of every endpoint, a subset of the "Expected columns" documented in EntsogRawClient.
+# Columns not listed in COLUMN_KINDS are filled with generic text.
+SCHEMAS = {
+    '/connectionpoints': ['pointKey', 'pointLabel', 'pointEicCode', 'pointType', 'importFromCountryKey',
+                          'hasData', 'isInterconnection', 'isImport', 'isCrossBorder', 'id', 'dataSet'],
+    '/operators': ['operatorKey', 'operatorLabel', 'operatorLabelLong', 'operatorCountryKey',
+                   'operatorCountryLabel', 'operatorTypeLabel', 'tsoEicCode', 'lastUpdateDateTime', 'id', 'dataSet'],
+    '/balancingzones': ['bzKey', 'bzLabel', 'bzLabelLong', 'bzEicCode', 'bzManagerKey', 'bzManagerLabel',
+                        'isDeactivated', 'id', 'dataSet'],
+    '/operatorpointdirections': _POINT + ['validFrom', 'validTo', 'hasData', 'tSOCountry', 'tSOBalancingZone',
+                                          'crossBorderPointType', 'eURelationship', 'connectedOperators',
+                                          'adjacentTsoEic', 'adjacentOperatorKey', 'adjacentCountry', 'pointType',
+                                          'idPointType', 'adjacentZones', 'lastUpdateDateTime', 'id', 'dataSet'],
+    '/interconnections': ['pointKey', 'pointLabel', 'fromCountryKey', 'fromCountryLabel', 'fromBzKey', 'fromBzLabel',
+                          'fromOperatorKey', 'fromOperatorLabel', 'fromPointKey', 'fromPointLabel',
+                          'fromDirectionKey', 'toCountryKey', 'toCountryLabel', 'toBzKey', 'toBzLabel',
+                          'toOperatorKey', 'toOperatorLabel', 'toPointKey', 'toPointLabel', 'toDirectionKey',
+                          'validFrom', 'validto', 'lastUpdateDateTime', 'id', 'dataSet'],
+    '/aggregateInterconnections': ['countryKey', 'countryLabel', 'bzKey', 'bzLabel', 'bzLabelLong', 'operatorKey',
+                                   'operatorLabel', 'directionKey', 'adjacentSystemsKey', 'adjacentSystemsCount',
+                                   'adjacentSystemsAreBalancingZones', 'adjacentSystemsLabel', 'id', 'dataSet'],
+    '/urgentmarketmessages': ['id', 'messageId', 'marketParticipantKey', 'marketParticipantEic',
+                              'marketParticipantName', 'messageType', 'publicationDateTime', 'threadId',
+                              'versionNumber', 'eventStatus', 'eventType', 'eventStart', 'eventStop',
+                              'unavailabilityType', 'unavailabilityReason', 'unitMeasure', 'balancingZoneKey',
+                              'balancingZoneEic', 'balancingZoneName', 'affectedAssetIdentifier', 'affectedAssetName',
+                              'affectedAssetEic', 'direction', 'unavailableCapacity', 'availableCapacity',
+                              'technicalCapacity', 'remarks', 'lastUpdateDateTime', 'isLatestVersion', 'uMMType',
+                              'isArchived'],
+    '/tariffsfulls': _PERIOD + _POINT + [
+        'productPeriodFrom', 'productPeriodTo', 'productType', 'connection',
+        'multiplier', 'multiplierFactorRemarks',
+        'discountForInterruptibleCapacityValue', 'discountForInterruptibleCapacityRemarks',
+        'seasonalFactor', 'seasonalFactorRemarks', 'operatorCurrency',
+        'applicableTariffPerLocalCurrencyKwhDValue', 'applicableTariffPerLocalCurrencyKwhDUnit',
+        'applicableTariffPerLocalCurrencyKwhHValue', 'applicableTariffPerLocalCurrencyKwhHUnit',
+        'applicableTariffPerEurkwhDUnit', 'applicableTariffPerEurkwhDValue',
+        'applicableTariffPerEurkwhHUnit', 'applicableTariffPerEurkwhHValue',
+        'applicableTariffInCommonUnitValue', 'applicableTariffInCommonUnitUnit',
+        'applicableCommodityTariffLocalCurrency', 'applicableCommodityTariffEuro',
+        'applicableCommodityTariffRemarks', 'exchangeRateReferenceDate', 'remarks'] + _REMARKS,
+    '/tariffsSimulations': _PERIOD + _POINT + [
+        'connection', 'tariffCapacityType', 'tariffCapacityUnit', 'tariffCapacityRemarks', 'productType',
+        'operatorCurrency', 'productSimulationCostInLocalCurrency', 'productSimulationCostInEuro',
+        'productSimulationCostRemarks', 'exchangeRateReferenceDate', 'remarks'] + _REMARKS,
+    '/aggregatedData': ['id', 'dataSet', 'indicator', 'periodType'] + _PERIOD + [
+        'countryKey', 'countryLabel', 'bzKey', 'bzShort', 'bzLong', 'operatorKey', 'operatorLabel', 'tsoEicCode',
+        'directionKey', 'adjacentSystemsKey', 'adjacentSystemsLabel', 'unit', 'value', 'countPointPresents',
+        'flowStatus', 'pointsNames', 'lastUpdateDateTime'],
+    '/interruptions': _PERIOD + _POINT + [
+        'interruptionType', 'capacityType', 'capacityCommercialType', 'unit', 'value', 'restorationInformation',
+        'id', 'dataSet', 'indicator', 'periodType', 'flowStatus'] + _REMARKS,
+    '/cmpauctions': ['auctionFrom', 'auctionTo', 'capacityFrom', 'capacityTo'] + _POINT + [
+        'unit', 'auctionPremium', 'clearedPrice', 'reservePrice', 'bookingPlatformKey', 'bookingPlatformURL',
+        'id', 'dataSet', 'indicator', 'periodType'] + _PERIOD + _REMARKS,
+    '/cmpunavailables': _PERIOD + _POINT + [
+        'allocationProcess', 'unit', 'requestedVolume', 'allocatedVolume', 'unallocatedVolume',
+        'id', 'dataSet', 'indicator', 'periodType'] + _REMARKS,
+    '/cmpUnsuccessfulRequests': ['capacityFrom', 'capacityTo'] + _POINT + [
+        'unit', 'requestedVolume', 'allocatedVolume', 'unallocatedVolume', 'occurenceCount',
+        'id', 'dataSet', 'indicator', 'periodType'] + _PERIOD + _REMARKS,
+    '/operationaldatas': ['id', 'dataSet', 'indicator', 'periodType'] + _PERIOD + _POINT + [
+        'unit', 'value', 'isUnlimited', 'flowStatus', 'interruptionType', 'restorationInformation', 'capacityType',
+        'capacityBookingStatus', 'isCamRelevant', 'isNA', 'originalPeriodFrom', 'isCmpRelevant',
+        'bookingPlatformKey', 'bookingPlatformLabel', 'bookingPlatformURL', 'interruptionCalculationRemark',
+        'pointType', 'idPointType', 'isArchived'] + _REMARKS,
+}
+
+# How columns are generated, columns of the same entity (point direction) are consistent within a row
+COLUMN_KINDS = {
+    'pointKey': 'point_key', 'fromPointKey': 'point_key', 'toPointKey': 'point_key',
+    'pointLabel': 'point_label', 'fromPointLabel': 'point_label', 'toPointLabel': 'point_label',
+    'pointsNames': 'point_label', 'affectedAssetName': 'point_label', 'affectedAssetIdentifier': 'point_key',
+    'operatorKey': 'operator_key', 'fromOperatorKey': 'operator_key', 'bzManagerKey': 'operator_key',
+    'marketParticipantKey': 'operator_key',
+    'operatorLabel': 'operator_label', 'fromOperatorLabel': 'operator_label', 'operatorLabelLong': 'operator_label',
+    'bzManagerLabel': 'operator_label', 'marketParticipantName': 'operator_label',
+    'toOperatorKey': 'adjacent_operator_key', 'adjacentOperatorKey': 'adjacent_operator_key',
+    'toOperatorLabel': 'adjacent_operator_label', 'connectedOperators': 'adjacent_operator_label',
+    'tsoEicCode': 'eic', 'adjacentTsoEic': 'eic', 'pointEicCode': 'eic', 'bzEicCode': 'eic',
+    'balancingZoneEic': 'eic', 'marketParticipantEic': 'eic', 'affectedAssetEic': 'eic',
+    'tsoItemIdentifier': 'tso_item_identifier',
+    'directionKey': 'direction_key', 'fromDirectionKey': 'direction_key', 'direction': 'direction_key',
+    'toDirectionKey': 'adjacent_direction_key',
+    'tSOCountry': 'country', 'countryKey': 'country', 'fromCountryKey': 'country', 'operatorCountryKey': 'country',
+    'importFromCountryKey': 'adjacent_country',
+    'adjacentCountry': 'adjacent_country', 'toCountryKey': 'adjacent_country',
+    'countryLabel': 'country_label', 'fromCountryLabel': 'country_label', 'operatorCountryLabel': 'country_label',
+    'toCountryLabel': 'adjacent_country_label',
+    'tSOBalancingZone': 'bz', 'bzKey': 'bz', 'fromBzKey': 'bz', 'balancingZoneKey': 'bz',
+    'adjacentZones': 'adjacent_bz', 'toBzKey': 'adjacent_bz',
+    'bzLabel': 'bz_label', 'bzShort': 'bz_label', 'bzLong': 'bz_label', 'bzLabelLong': 'bz_label',
+    'fromBzLabel': 'bz_label', 'balancingZoneName': 'bz_label',
+    'toBzLabel': 'adjacent_bz_label',
+    'adjacentSystemsKey': 'adjacent_systems_key', 'adjacentSystemsLabel': 'adjacent_bz_label',
+    'pointType': 'point_type',
+    'periodFrom': 'period_from', 'auctionFrom': 'period_from', 'capacityFrom': 'period_from',
+    'productPeriodFrom': 'period_from', 'eventStart': 'period_from', 'originalPeriodFrom': 'period_from',
+    'validFrom': 'valid_from',
+    'periodTo': 'period_to', 'auctionTo': 'period_to', 'capacityTo': 'period_to', 'productPeriodTo': 'period_to',
+    'eventStop': 'period_to', 'validTo': 'valid_to', 'validto': 'valid_to',
+    'lastUpdateDateTime': 'last_update', 'publicationDateTime': 'last_update',
+    'exchangeRateReferenceDate': 'valid_from',
+    'id': 'row_id', 'messageId': 'row_id', 'threadId': 'row_id', 'idPointType': 'small_int',
+    'versionNumber': 'small_int', 'adjacentSystemsCount': 'small_int', 'countPointPresents': 'small_int',
+    'occurenceCount': 'small_int', 'dataSet': 'small_int',
+    'indicator': 'indicator', 'periodType': 'period_type', 'flowStatus': 'flow_status',
+    'unit': 'unit', 'unitMeasure': 'unit', 'tariffCapacityUnit': 'unit',
+    'value': 'flow', 'requestedVolume': 'flow', 'allocatedVolume': 'flow', 'unallocatedVolume': 'flow',
+    'unavailableCapacity': 'flow', 'availableCapacity': 'flow', 'technicalCapacity': 'flow',
+    'auctionPremium': 'price', 'clearedPrice': 'price', 'reservePrice': 'price',
+    'productSimulationCostInLocalCurrency': 'price', 'productSimulationCostInEuro': 'price',
+    'multiplier': 'factor', 'seasonalFactor': 'factor', 'discountForInterruptibleCapacityValue': 'factor',
+    'applicableTariffPerLocalCurrencyKwhDValue': 'tariff', 'applicableTariffPerLocalCurrencyKwhHValue': 'tariff',
+    'applicableTariffPerEurkwhDValue': 'tariff', 'applicableTariffPerEurkwhHValue': 'tariff',
+    'applicableTariffInCommonUnitValue': 'tariff', 'applicableCommodityTariffLocalCurrency': 'tariff',
+    'applicableCommodityTariffEuro': 'tariff',
+    'applicableTariffPerLocalCurrencyKwhDUnit': 'tariff_unit_local_d',
+    'applicableTariffPerLocalCurrencyKwhHUnit': 'tariff_unit_local_h',
+    'applicableTariffPerEurkwhDUnit': 'tariff_unit_eur_d', 'applicableTariffPerEurkwhHUnit': 'tariff_unit_eur_h',
+    'applicableTariffInCommonUnitUnit': 'tariff_unit_common',
+    'operatorCurrency': 'currency', 'productType': 'product_type', 'connection': 'connection',
+    'isLatestVersion': 'true', 'hasData': 'true', 'isInterconnection': 'true', 'isCrossBorder': 'true',
+    'isUnlimited': 'false', 'isCamRelevant': 'false', 'isNA': 'false', 'isCmpRelevant': 'false',
+    'isArchived': 'false', 'isImport': 'false', 'isDeactivated': 'false', 'adjacentSystemsAreBalancingZones': 'true',
+    'itemRemarks': 'remark', 'generalRemarks': 'remark', 'remarks': 'remark', 'unavailabilityReason': 'remark',
+    'multiplierFactorRemarks': 'remark', 'seasonalFactorRemarks': 'remark', 'tariffCapacityRemarks': 'remark',
+    'discountForInterruptibleCapacityRemarks': 'remark', 'applicableCommodityTariffRemarks': 'remark',
+    'productSimulationCostRemarks': 'remark', 'interruptionCalculationRemark': 'remark',
+}
+
+# Vocabularies of the remaining categorical columns
+CHOICES = {
+    'interruptionType': ['Planned', 'Unplanned'],
+    'capacityType': ['Firm', 'Interruptible'],
+    'capacityCommercialType': ['Firm', 'Interruptible'],
+    'capacityBookingStatus': ['Booked', 'Available', 'Technical'],
+    'restorationInformation': [None, 'Restored', 'Not yet restored'],
+    'allocationProcess': ['Auction', 'FCFS', 'Open subscription'],
+    'tariffCapacityType': ['Firm', 'Interruptible'],
+    'crossBorderPointType': ['Cross-Border within EU', 'Cross-Border with non-EU', 'In-Country'],
+    'eURelationship': ['Within EU', 'Outside EU'],
+    'messageType': ['Unavailabilities of Gas Facilities', 'Other unavailabilities'],
+    'eventStatus': ['Active', 'Dismissed', 'Inactive'],
+    'eventType': ['Transmission unavailability', 'Other'],
+    'unavailabilityType': ['Planned', 'Unplanned'],
+    'uMMType': ['UMM'],
+    'operatorTypeLabel': ['TSO', 'LSO', 'SSO'],
+    'bookingPlatformKey': ['PRISMA', 'GSA', 'RBP'],
+    'bookingPlatformLabel': ['PRISMA', 'GSA', 'RBP'],
+    'bookingPlatformURL': ['https://platform.prisma-capacity.eu', 'https://www.gsaplatform.eu', 'https://ipnew.rbp.eu'],
+}
+
+# Share of the rows per indicator, loosely following a pull of all indicators from /operationaldatas
+INDICATOR_WEIGHTS = {
+    Indicator.physical_flow: 20, Indicator.nomination: 15, Indicator.renomination: 15, Indicator.allocation: 15,
+    Indicator.firm_technical: 8, Indicator.firm_booked: 6, Indicator.firm_available: 6, Indicator.gcv: 5,
+    Indicator.wobbe_index: 3, Indicator.interruptible_total: 2, Indicator.interruptible_booked: 2,
+    Indicator.interruptible_available: 2,
+}
+QUALITY_INDICATORS = (Indicator.gcv, Indicator.wobbe_index)
+PERIOD_TYPES = {'day': pd.Timedelta(days=1), 'hour': pd.Timedelta(hours=1)}
+
+REMARK_WORDS = (
+    'maintenance compressor station planned unplanned works reduction of technical capacity due to the at '
+    'outage pressure inspection pipeline repair valve metering upgrade interruption data provisional update '
+    'values are based on allocations in kWh/d gas day reverse flow virtual interconnection point'
+).split()
+
+_UPDATE_BUCKETS = 12  # Distinct publication times per period, every 5 minutes after the period ended
+
+
+class _Network:
+    """
+    Synthetic point directions every generated row refers to, built from the operators of mappings.Area
+    and the balancing zones and countries of mappings.BalancingZone and mappings.Country.
+    Every column is stored factorized: the codes per point direction and the unique values.
+    """
+
+    def __init__(self, rng: np.random.Generator, points: int):
+        operators = [(key, label, area.name)
+                     for area in Area for key, label in zip(area.value, area.operator_labels)]
+        operator_keys, operator_labels, operator_countries = (np.array(column, dtype=object)
+                                                              for column in zip(*operators))
+        countries = np.unique(operator_countries)
+
+        zones = {}
+        for zone in BalancingZone:
+            zones.setdefault(zone.code[:2], []).append(zone)
+
+        # Points sit at an operator, and connect to an operator in another country
+        operator = rng.integers(0, len(operators), points)
+        adjacent_operator = rng.integers(0, len(operators), points)
+        same = operator_countries[adjacent_operator] == operator_countries[operator]
+        adjacent_operator[same] = (adjacent_operator[same] + len(operators) // 2) % len(operators)
+
+        point = np.repeat(np.arange(points), 2)  # An entry and an exit per point
+        operator = operator[point]
+        adjacent_operator = adjacent_operator[point]
+        country = operator_countries[operator]
+        adjacent_country = operator_countries[adjacent_operator]
+
+        def zone_of(code, attribute):
+            if code not in zones:
+                return f"{code}---------" if attribute == 'code' else code
+            return getattr(zones[code][0], attribute)
+
+        def label_of(code):
+            return Country[code].label if code in Country.__members__ else code
+
+        zone_keys = {code: zone_of(code, 'code') for code in countries}
+        zone_labels = {code: zone_of(code, 'label') for code in countries}
+        country_labels = {code: label_of(code) for code in countries}
+
+        direction = np.tile(np.array(['entry', 'exit'], dtype=object), points)
+        point_keys = np.array([f"ITP-{i:05d}" for i in range(points)], dtype=object)
+        adjacent_bz = np.array([zone_keys[c] for c in adjacent_country], dtype=object)
+
+        columns = {
+            'point_key': point_keys[point],
+            'point_label': np.array([f"{operator_labels[o]} {i}" for i, o in zip(point, operator)], dtype=object),
+            'direction_key': direction,
+            'adjacent_direction_key': np.where(direction == 'entry', 'exit', 'entry').astype(object),
+            'operator_key': operator_keys[operator],
+            'operator_label': operator_labels[operator],
+            'adjacent_operator_key': operator_keys[adjacent_operator],
+            'adjacent_operator_label': operator_labels[adjacent_operator],
+            'country': country,
+            'adjacent_country': adjacent_country,
+            'country_label': np.array([country_labels[c] for c in country], dtype=object),
+            'adjacent_country_label': np.array([country_labels[c] for c in adjacent_country], dtype=object),
+            'bz': np.array([zone_keys[c] for c in country], dtype=object),
+            'adjacent_bz': adjacent_bz,
+            'bz_label': np.array([zone_labels[c] for c in country], dtype=object),
+            'adjacent_bz_label': np.array([zone_labels[c] for c in adjacent_country], dtype=object),
+            'adjacent_systems_key': np.array([f"Transmission{bz}" for bz in adjacent_bz], dtype=object),
+            'eic': np.array([f"21Z{i:012d}" for i in range(len(point))], dtype=object),
+            'tso_item_identifier': np.array([f"{p}{d}" for p, d in zip(point_keys[point], direction)],
+                                            dtype=object),
+            'point_type': np.where(country == adjacent_country, 'In-Country',
+                                   'Cross-Border Transmission IP').astype(object),
+        }
+
+        self.size = len(point)
+        self.columns = {name: pd.factorize(values) for name, values in columns.items()}
+        # Technical capacity of every point direction in kWh/d, flows are a share of it
+        self.capacity = rng.lognormal(mean=np.log(5e7), sigma=1.2, size=self.size)
+
+    def column(self, kind: str, entity: np.ndarray) -> pd.Categorical:
+        codes, uniques = self.columns[kind]
+        return pd.Categorical.from_codes(codes[entity], categories=uniques)
+
+
+def _remarks(rng: np.random.Generator, size: int = 500) -> np.ndarray:
+    """Pool of remark texts, with the long tailed lengths of the remarks on the transparency platform"""
+    lengths = np.clip(rng.lognormal(mean=np.log(80), sigma=0.9, size=size), 10, 1000).astype(int)
+    remarks = []
+    for length in lengths:
+        words = rng.choice(REMARK_WORDS, size=length // 4 + 1)
+        remarks.append(' '.join(words)[:length].capitalize())
+    return pd.unique(np.array(remarks, dtype=object))
+
+
+def _categorical(rng: np.random.Generator, rows: int, values, p=None, null_share: float = 0.0) -> pd.Categorical:
+    values = list(values)
+    codes = rng.choice(len(values), size=rows, p=p).astype(np.int32)
+    if null_share:
+        codes[rng.random(rows) < null_share] = -1
+    categories = [v for v in values if v is not None]
+    # Map codes onto the categories without None, which becomes a missing value
+    lookup = np.array([categories.index(v) if v is not None else -1 for v in values], dtype=np.int32)
+    codes = np.where(codes >= 0, lookup[np.maximum(codes, 0)], -1)
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+
+def _utc(ts) -> pd.Timestamp:
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')
+
+
+def _timestamps(values: pd.DatetimeIndex) -> np.ndarray:
+    return np.asarray(values.strftime('%Y-%m-%dT%H:%M:%S+00:00'), dtype=object)
+
+
+def generate_frame(endpoint: str, rows: int,
+                   start: Optional[pd.Timestamp] = None,
+                   end: Optional[pd.Timestamp] = None,
+                   period_type: str = 'day',
+                   points: int = 800,
+                   remark_share: float = 0.1,
+                   seed: int = 0) -> pd.DataFrame:
+    """
+    Generates synthetic records in the raw (camelCase) format of an endpoint.
+
+    Rows cycle over all point directions for every period from start onwards. Keys and labels come from
+    the vocabularies in mappings, text columns are categoricals so 10M rows take seconds and little memory.
+
+    Parameters
+    ----------
+    endpoint : str
+        e.g. '/operationaldatas'
+    rows : int
+    start : pd.Timestamp
+    end : pd.Timestamp
+        the periods wrap around to start after end
+    period_type : str
+        'day' or 'hour'
+    points : int
+        number of distinct points, every point has an entry and exit direction
+    remark_share : float
+        share of the rows with a remark
+    seed : int
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    rng = np.random.default_rng(seed)
+    network = _Network(rng, points)
+    start = _utc(start if start is not None else '2022-01-01')
+    step = PERIOD_TYPES.get(period_type, PERIOD_TYPES['day'])
+    if end is not None:
+        periods = max(int((_utc(end) - start) / step), 1)
+    else:
+        periods = max(-(-rows // network.size), 1)
+
+    index = np.arange(rows)
+    entity = index % network.size
+    period = ((index // network.size) % periods).astype(np.int32)
+
+    period_starts = start + step * np.arange(periods + 1)
+    period_strings = _timestamps(pd.DatetimeIndex(period_starts))
+    updates = (pd.DatetimeIndex(np.repeat(period_starts[1:], _UPDATE_BUCKETS))
+               + pd.to_timedelta(np.tile(np.arange(_UPDATE_BUCKETS) * 5, periods), unit='min'))
+    update_strings = _timestamps(updates)
+
+    # Indicators are drawn once, so the unit of every row can follow its indicator
+    weights = np.array(list(INDICATOR_WEIGHTS.values()), dtype=float)
+    indicator = rng.choice(len(weights), size=rows, p=weights / weights.sum()).astype(np.int8)
+    indicators = [i.code for i in INDICATOR_WEIGHTS]
+    energy_unit = 'kWh/d' if period_type == 'day' else 'kWh/h'
+    unit_codes, units = pd.factorize(np.array(['kWh/m3' if i in QUALITY_INDICATORS else energy_unit
+                                               for i in INDICATOR_WEIGHTS], dtype=object))
+    remark_pool = _remarks(rng)
+
+    data = {}
+    for column in SCHEMAS[endpoint]:
+        kind = COLUMN_KINDS.get(column, 'text')
+        if kind in network.columns:
+            values = network.column(kind, entity)
+        elif column in CHOICES:
+            values = _categorical(rng, rows, CHOICES[column])
+        elif kind == 'period_from':
+            values = pd.Categorical.from_codes(period, categories=period_strings)
+        elif kind == 'period_to':
+            values = pd.Categorical.from_codes(period + 1, categories=period_strings)
+        elif kind == 'valid_from':
+            values = pd.Categorical.from_codes(np.zeros(rows, dtype=np.int8), categories=['2015-01-01T00:00:00+00:00'])
+        elif kind == 'valid_to':
+            values = np.full(rows, None)
+        elif kind == 'last_update':
+            bucket = rng.integers(0, _UPDATE_BUCKETS, rows, dtype=np.int32)
+            values = pd.Categorical.from_codes(period * _UPDATE_BUCKETS + bucket, categories=update_strings)
+        elif kind == 'row_id':
+            values = index + 1
+        elif kind == 'small_int':
+            values = rng.integers(1, 5, rows, dtype=np.int8)
+        elif kind == 'indicator':
+            values = pd.Categorical.from_codes(indicator, categories=indicators)
+        elif kind == 'period_type':
+            values = _categorical(rng, rows, [period_type])
+        elif kind == 'flow_status':
+            values = _categorical(rng, rows, ['Confirmed', 'Provisional'], p=[0.75, 0.25])
+        elif kind == 'unit':
+            values = pd.Categorical.from_codes(unit_codes[indicator], categories=units)
+        elif kind == 'flow':
+            values = (network.capacity[entity] * rng.random(rows)).astype(np.int64)
+        elif kind in ('price', 'factor', 'tariff'):
+            values = np.round(rng.random(rows), 6)
+        elif kind.startswith('tariff_unit'):
+            currency = 'EUR' if '_eur' in kind or kind.endswith('common') else 'Local'
+            unit = 'kWh/h)/h' if kind.endswith('_h') else 'kWh/d)/d'
+            values = _categorical(rng, rows, [f"{currency}/({unit}"])
+        elif kind == 'currency':
+            values = _categorical(rng, rows, ['EUR', 'PLN', 'CZK', 'HUF', 'DKK'], p=[0.8, 0.05, 0.05, 0.05, 0.05])
+        elif kind == 'product_type':
+            values = _categorical(rng, rows, ['Yearly', 'Quarterly', 'Monthly', 'Daily', 'Within-day'])
+        elif kind == 'connection':
+            values = _categorical(rng, rows, ['IP', 'VIP'], p=[0.9, 0.1])
+        elif kind == 'true':
+            values = np.ones(rows, dtype=bool)
+        elif kind == 'false':
+            values = np.zeros(rows, dtype=bool)
+        elif kind == 'remark':
+            codes = rng.integers(0, len(remark_pool), rows, dtype=np.int32)
+            codes[rng.random(rows) >= remark_share] = -1
+            values = pd.Categorical.from_codes(codes, categories=remark_pool)
+        else:
+            values = _categorical(rng, rows, [column])
+        data[column] = values
+
+    return pd.DataFrame(data)
+
+
+def generate_payload(endpoint: str, rows: int, offset: int = 0, limit: int = -1,
+                     query: str = '', **kwargs) -> str:
+    """
+    Generates a synthetic JSON response of an endpoint, including the meta block
+
+    Parameters
+    ----------
+    endpoint : str
+    rows : int
+        total number of records matching the query
+    offset : int
+    limit : int
+        -1 returns everything from the offset onwards
+    query : str
+        echoed in the meta block
+    **kwargs
+        passed to generate_frame
+
+    Returns
+    -------
+    str
+    """
+    frame = generate_frame(endpoint, rows, **kwargs)
+    return render_payload(endpoint, frame, offset=offset, limit=limit, query=query)
+
+
+def _meta(frame: pd.DataFrame, count: int, offset: int, limit: int, query: str) -> str:
+    return json.dumps({'query': query, 'total': len(frame), 'count': count, 'offset': offset, 'limit': limit})
+
+
+def render_payload(endpoint: str, frame: pd.DataFrame, offset: int = 0, limit: int = -1, query: str = '') -> str:
+    """Renders a page of a frame of raw records in the JSON format of the API"""
+    page = frame.iloc[offset:] if limit is None or limit < 0 else frame.iloc[offset:offset + limit]
+    meta = _meta(frame, len(page), offset, limit, query)
+    return f'{{"meta":{meta},"{DATA_KEYS[endpoint]}":{page.to_json(orient="records")}}}'
+
+
+def write_payload(f: IO[str], endpoint: str, rows: int, chunk_rows: int = 250_000, query: str = '', **kwargs):
+    """
+    Streams a synthetic JSON response to a text file, for payloads too large to hold as one string
+
+    Parameters
+    ----------
+    f : file-like
+        opened in text mode
+    endpoint : str
+    rows : int
+    chunk_rows : int
+        records rendered at a time
+    query : str
+    **kwargs
+        passed to generate_frame
+    """
+    frame = generate_frame(endpoint, rows, **kwargs)
+    f.write(f'{{"meta":{_meta(frame, len(frame), 0, -1, query)},"{DATA_KEYS[endpoint]}":[')
+    for i, chunk_start in enumerate(range(0, len(frame), chunk_rows)):
+        if i:
+            f.write(',')
+        f.write(frame.iloc[chunk_start:chunk_start + chunk_rows].to_json(orient='records')[1:-1])
+    f.write(']}')
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import os
+from typing import List, Optional, Sequence, Union
+
+from ._lazy import lazy_import
+from .intervals import _MAX, _MIN, _nanoseconds
+from .misc import factorize
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+KEY = ['point_key', 'direction_key', 'product_type']
+
+# Numeric tariff columns of parse_tariffs (melt=False) kept by default
+TARIFF_COLUMNS = [
+    'applicable_tariff_per_local_currency_kwh_d_value',
+    'applicable_tariff_per_local_currency_kwh_h_value',
+    'applicable_tariff_per_eur_kwh_d_value',
+    'applicable_tariff_per_eur_kwh_h_value',
+    'applicable_tariff_in_common_unit_value',
+    'applicable_commodity_tariff_local_currency',
+    'applicable_commodity_tariff_euro',
+    'multiplier',
+    'seasonal_factor',
+    'discount_for_interruptible_capacity_value',
+]
+
+
+class TariffTable:
+    """
+    Tariffs per point, direction and product type, for point-in-time lookups of the applicable tariff.
+
+    The tariffs are sorted by (point, direction, product type, period_from) into flat arrays; the key and
+    the rank of period_from form a single int64, so a batch of lookups is a single searchsorted. Tables are
+    saved with np.savez and load without parsing anything.
+
+    Usage:
+        table = TariffTable(client.query_tariffs(start, end, country_code='DE', melt=False))
+        table.lookup('ITP-00096', 'entry', 'Yearly', '2022-03-01')
+        flows['tariff'] = table.price(flows, product_type='Yearly')
+        table.save('tariffs.npz')
+        table = TariffTable.load('tariffs.npz')
+    """
+
+    def __init__(self, tariffs: Optional[pd.DataFrame] = None, columns: Optional[Sequence[str]] = None):
+        """
+        Parameters
+        ----------
+        tariffs : pd.DataFrame
+            output of parse_tariffs or EntsogPandasClient.query_tariffs, with melt=False
+        columns : list
+            tariff columns to keep, the ones of TARIFF_COLUMNS present by default
+        """
+        if tariffs is None:
+            return
+
+        columns = list(columns) if columns is not None else [c for c in TARIFF_COLUMNS if c in tariffs.columns]
+        start = _nanoseconds(tariffs['period_from'], _MIN)
+        stop = _nanoseconds(tariffs['period_to'], _MAX)
+        codes, keys = pd.factorize(pd.MultiIndex.from_frame(tariffs[KEY].astype(object)))
+        values = np.column_stack([pd.to_numeric(tariffs[c], errors='coerce').to_numpy(dtype=float) for c in columns]) \
+            if columns else np.zeros((len(tariffs), 0))
+
+        # Of several tariffs for the same key and start, the latest update wins
+        updated = _nanoseconds(tariffs['last_update_date_time'], _MIN) if 'last_update_date_time' in tariffs.columns \
+            else np.zeros(len(tariffs), dtype=np.int64)
+        order = np.lexsort((updated, start, codes))
+        codes, start = codes[order], start[order]
+        last = np.r_[(codes[1:] != codes[:-1]) | (start[1:] != start[:-1]), True]
+        order = order[last]
+
+        self._set(
+            keys=np.array(keys.tolist(), dtype=str).reshape(-1, len(KEY)),
+            codes=codes[last],
+            starts=start[last],
+            stops=stop[order],
+            values=values[order],
+            columns=np.array(columns, dtype=str),
+        )
+
+    def _set(self, keys, codes, starts, stops, values, columns):
+        self._keys, self._codes, self.starts, self.stops = keys, codes, starts, stops
+        self.values, self.columns = values, [str(c) for c in columns]
+        # Keys are matched on the codes of their columns, which is much faster than hashing tuples
+        self._levels = [pd.Index(pd.unique(keys[:, i]), dtype=object) for i in range(len(KEY))]
+        self._key_index = pd.Index(self._combine([level.get_indexer(keys[:, i])
+                                                  for i, level in enumerate(self._levels)]))
+        # Ranks of period_from, so key and start fit a single int64
+        self._times = np.unique(starts)
+        self._width = len(self._times) + 1
+        self._composite = codes.astype(np.int64) * self._width + np.searchsorted(self._times, starts) + 1
+
+    def _combine(self, codes: List[np.ndarray]) -> np.ndarray:
+        """One int64 per combination of column codes, -1 when a value is unknown"""
+        combined = np.zeros(len(codes[0]), dtype=np.int64)
+        unknown = np.zeros(len(codes[0]), dtype=bool)
+        for level, level_codes in zip(self._levels, codes):
+            combined = combined * (len(level) + 1) + level_codes
+            unknown |= level_codes < 0
+        return np.where(unknown, -1, combined)
+
+    def _key_codes(self, *columns) -> np.ndarray:
+        codes = []
+        for level, values in zip(self._levels, columns):
+            # Every distinct value is looked up once
+            value_codes, uniques = factorize(values)
+            codes.append(level.get_indexer(uniques)[value_codes])
+        return self._key_index.get_indexer(self._combine(codes))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __repr__(self):
+        return f"TariffTable({len(self)} tariffs of {len(self._keys)} point directions and products)"
+
+    def positions(self, point_key, direction_key, product_type, timestamp) -> np.ndarray:
+        """
+        Rows of the tariffs applicable to every lookup, -1 where none applies. Arguments are scalars or
+        equally long arrays.
+        """
+        shape = np.shape(timestamp)
+        timestamp = _nanoseconds(timestamp if shape else [timestamp], _MIN).reshape(shape)
+        point_key, direction_key, product_type, timestamp = np.broadcast_arrays(
+            np.asarray(point_key, dtype=object), np.asarray(direction_key, dtype=object),
+            np.asarray(product_type, dtype=object), timestamp
+        )
+        shape = timestamp.shape
+        codes = self._key_codes(point_key.ravel(), direction_key.ravel(), product_type.ravel())
+        timestamp = timestamp.ravel()
+
+        # The last tariff of the key starting at or before the timestamp, if it did not end yet
+        rank = np.searchsorted(self._times, timestamp, side='right')
+        position = np.searchsorted(self._composite, codes.astype(np.int64) * self._width + rank, side='right') - 1
+        valid = (codes >= 0) & (position >= 0)
+        valid[valid] = (self._codes[position[valid]] == codes[valid]) & (self.stops[position[valid]] > timestamp[valid])
+        return np.where(valid, position, -1).reshape(shape)
+
+    def lookup(self, point_key, direction_key, product_type, timestamp,
+               column: str = 'applicable_tariff_in_common_unit_value') -> Union[float, np.ndarray]:
+        """
+        The applicable tariff of point directions and product types at timestamps, NaN where there is none
+
+        Parameters
+        ----------
+        point_key : str | array-like
+        direction_key : str | array-like
+        product_type : str | array-like
+            e.g. 'Yearly', 'Quarterly', 'Monthly', 'Daily', 'Within-day'
+        timestamp : str | pd.Timestamp | array-like
+        column : str
+
+        Returns
+        -------
+        float | np.ndarray
+        """
+        position = self.positions(point_key, direction_key, product_type, timestamp)
+        values = self.values[:, self.columns.index(column)]
+        result = np.where(position >= 0, values[np.maximum(position, 0)] if len(values) else np.nan, np.nan)
+        return result if result.ndim else float(result)
+
+    def price(self, data: pd.DataFrame, product_type: str = 'Yearly',
+              column: str = 'applicable_tariff_in_common_unit_value', at: str = 'period_from') -> pd.Series:
+        """The applicable tariff of every row of e.g. operational data, by its point, direction and period"""
+        product = data['product_type'] if 'product_type' in data.columns else product_type
+        values = self.lookup(data['point_key'].to_numpy(), data['direction_key'].to_numpy(), product,
+                             data[at], column)
+        return pd.Series(values, index=data.index, name=column)
+
+    def save(self, path: str):
+        """Stores the table as an uncompressed .npz, which loads in milliseconds"""
+        temp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(temp, keys=self._keys, codes=self._codes, starts=self.starts, stops=self.stops,
+                 values=self.values, columns=np.array(self.columns, dtype=str))
+        os.replace(temp, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'TariffTable':
+        table = cls()
+        with np.load(path) as arrays:
+            table._set(**{name: arrays[name] for name in arrays.files})
+        return table
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ._lazy import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+# Edge kinds: a cross-border interconnection between balancing zones, or an operator active in a balancing zone
+INTERCONNECTION = 'interconnection'
+OPERATOR = 'operator'
+
+EDGE_COLUMNS = ['kind', 'source', 'target', 'point_key', 'from_operator_key', 'from_point_key',
+                'to_operator_key', 'to_point_key']
+
+
+def _interconnection_edges(interconnections: pd.DataFrame) -> pd.DataFrame:
+    edges = interconnections[['from_bz_key', 'to_bz_key', 'point_key', 'from_operator_key', 'from_point_key',
+                              'to_operator_key', 'to_point_key']].dropna(subset=['from_bz_key', 'to_bz_key'])
+    edges = edges.rename(columns={'from_bz_key': 'source', 'to_bz_key': 'target'})
+    edges = edges[edges['source'] != edges['target']]
+    edges.insert(0, 'kind', INTERCONNECTION)
+    return edges
+
+
+def _operator_edges(aggregate_interconnections: pd.DataFrame) -> pd.DataFrame:
+    links = aggregate_interconnections[['operator_key', 'bz_key']].dropna().drop_duplicates()
+    # Both ways, an operator connects to its balancing zone and the other way round
+    forward = pd.DataFrame({'source': links['operator_key'], 'target': links['bz_key']})
+    backward = pd.DataFrame({'source': links['bz_key'], 'target': links['operator_key']})
+    edges = pd.concat([forward, backward], ignore_index=True)
+    edges.insert(0, 'kind', OPERATOR)
+    return edges
+
+
+class Topology:
+    """
+    Graph of the transmission network: balancing zones connected by interconnection points
+    (from query_interconnections) and operators linked to their balancing zones
+    (from query_aggregate_interconnections), stored as CSR adjacency arrays.
+
+    Every node has a stable integer id; indptr[i]:indptr[i + 1] are the positions of its outgoing
+    edges in targets/edges. Edges carry the firm technical capacity of their point, set with
+    set_capacities from operational data, which max_flow and bottleneck use. version counts the
+    rebuilds of the graph, so caches built on it know when they are stale.
+
+    Usage:
+        topology = Topology(client.query_interconnections(), client.query_aggregate_interconnections())
+        topology.neighbours('DE-THE-----')
+        list(topology.routes('NO---------', 'IT---------', max_hops=4))
+        topology.set_capacities(client.query_operational_data_all(start, end, indicators=['firm_technical']))
+        topology.max_flow('NO---------', 'IT---------')
+    """
+
+    def __init__(self, interconnections: Optional[pd.DataFrame] = None,
+                 aggregate_interconnections: Optional[pd.DataFrame] = None):
+        self.nodes: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.edges = pd.DataFrame(columns=EDGE_COLUMNS + ['capacity'])
+        self._capacities = None
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.targets = np.zeros(0, dtype=np.int64)
+        self.order = np.zeros(0, dtype=np.int64)
+        self.version = 0
+        self.update(interconnections=interconnections, aggregate_interconnections=aggregate_interconnections)
+
+    def __repr__(self):
+        return f"Topology({len(self.nodes)} nodes, {len(self.edges)} edges)"
+
+    def _replace(self, kind: str, edges: pd.DataFrame) -> Tuple[int, int]:
+        """Replaces the edges of a kind, returns the number of added and removed edges"""
+        old = self.edges[self.edges['kind'] == kind]
+        edges = edges.reindex(columns=EDGE_COLUMNS).drop_duplicates()
+        old_keys = pd.MultiIndex.from_frame(old[EDGE_COLUMNS].astype(object))
+        new_keys = pd.MultiIndex.from_frame(edges[EDGE_COLUMNS].astype(object))
+        added = int((~new_keys.isin(old_keys)).sum())
+        removed = int((~old_keys.isin(new_keys)).sum())
+        if added or removed:
+            kept = self.edges[self.edges['kind'] != kind]
+            self.edges = pd.concat([kept, edges], ignore_index=True)
+        return added, removed
+
+    def update(self, interconnections: Optional[pd.DataFrame] = None,
+               aggregate_interconnections: Optional[pd.DataFrame] = None) -> Dict[str, int]:
+        """
+        Applies new reference data. Only the edges of the given datasets are compared; when nothing changed
+        the graph is left as is, otherwise the adjacency arrays are rebuilt keeping the ids of known nodes.
+
+        Parameters
+        ----------
+        interconnections : pd.DataFrame
+        aggregate_interconnections : pd.DataFrame
+
+        Returns
+        -------
+        dict
+            number of added and removed edges
+        """
+        changes = {'added': 0, 'removed': 0}
+        for frame, build, kind in ((interconnections, _interconnection_edges, INTERCONNECTION),
+                                   (aggregate_interconnections, _operator_edges, OPERATOR)):
+            if frame is None:
+                continue
+            added, removed = self._replace(kind, build(frame))
+            changes['added'] += added
+            changes['removed'] += removed
+
+        if changes['added'] or changes['removed'] or len(self.indptr) != len(self.nodes) + 1:
+            self._build()
+        return changes
+
+    def _build(self):
+        # New nodes are appended, so ids of known nodes stay the same
+        for node in pd.unique(pd.concat([self.edges['source'], self.edges['target']])):
+            if node not in self.index:
+                self.index[node] = len(self.nodes)
+                self.nodes.append(node)
+
+        sources = self.edges['source'].map(self.index).to_numpy(dtype=np.int64)
+        targets = self.edges['target'].map(self.index).to_numpy(dtype=np.int64)
+        self.order = np.argsort(sources, kind='stable')
+        self.targets = targets[self.order]
+        self.indptr = np.zeros(len(self.nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(self.nodes)), out=self.indptr[1:])
+        self._kinds = self.edges['kind'].to_numpy()[self.order]
+        self._apply_capacities()
+        self.version += 1
+
+    def set_capacities(self, data: pd.DataFrame, indicator: str = 'Firm Technical', how: str = 'max'):
+        """
+        Sets the capacity of the interconnection edges from operational data. The capacity of an edge is
+        the smaller of the exit capacity at its from point and the entry capacity at its to point.
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            operational data with operator_key, point_key, direction_key, indicator and value
+        indicator : str
+        how : str
+            how to combine the periods of a point direction, e.g. 'max', 'min' or 'mean'
+        """
+        if 'indicator' in data.columns:
+            data = data[data['indicator'] == indicator]
+        values = pd.to_numeric(data['value'], errors='coerce')
+        self._capacities = values.groupby(
+            [data['operator_key'], data['point_key'], data['direction_key']]
+        ).agg(how)
+        self._apply_capacities()
+
+    def _apply_capacities(self):
+        capacity = np.full(len(self.edges), np.nan)
+        if self._capacities is not None and len(self.edges):
+            capacities = self._capacities
+            exits = pd.MultiIndex.from_arrays([self.edges['from_operator_key'], self.edges['from_point_key'],
+                                               np.full(len(self.edges), 'exit', dtype=object)])
+            entries = pd.MultiIndex.from_arrays([self.edges['to_operator_key'], self.edges['to_point_key'],
+                                                 np.full(len(self.edges), 'entry', dtype=object)])
+            exit_capacity = capacities.reindex(exits).to_numpy(dtype=float)
+            entry_capacity = capacities.reindex(entries).to_numpy(dtype=float)
+            capacity = np.fmin(exit_capacity, entry_capacity)
+        self.edges['capacity'] = capacity
+        self._capacity = np.nan_to_num(capacity[self.order], nan=0.0)
+
+    def neighbours(self, node: str, kind: Optional[str] = None) -> List[str]:
+        """Nodes reachable over one edge, optionally only over edges of a kind"""
+        i = self.index[node]
+        start, stop = self.indptr[i], self.indptr[i + 1]
+        targets = self.targets[start:stop]
+        if kind is not None:
+            targets = targets[self._kinds[start:stop] == kind]
+        return [self.nodes[t] for t in dict.fromkeys(targets.tolist())]
+
+    def edges_between(self, source: str, target: str) -> pd.DataFrame:
+        """The interconnection points (with capacities) from one node to another"""
+        i = self.index[source]
+        start, stop = self.indptr[i], self.indptr[i + 1]
+        positions = self.order[start:stop][self.targets[start:stop] == self.index[target]]
+        return self.edges.iloc[positions]
+
+    def routes(self, source: str, target: str, max_hops: int = 4,
+               kind: Optional[str] = INTERCONNECTION) -> Iterator[List[str]]:
+        """
+        Enumerates the simple routes between two nodes, by default over interconnections between
+        balancing zones only, shortest first
+
+        Parameters
+        ----------
+        source : str
+        target : str
+        max_hops : int
+        kind : str
+            edge kind to follow, None for all edges
+
+        Yields
+        ------
+        list
+            the nodes of a route, source and target included
+        """
+        start, goal = self.index[source], self.index[target]
+        allowed = None if kind is None else self._kinds == kind
+        queue = deque([(start,)])
+        while queue:
+            path = queue.popleft()
+            node = path[-1]
+            if node == goal:
+                yield [self.nodes[n] for n in path]
+                continue
+            if len(path) > max_hops:
+                continue
+            lo, hi = self.indptr[node], self.indptr[node + 1]
+            targets = self.targets[lo:hi] if allowed is None else self.targets[lo:hi][allowed[lo:hi]]
+            for nxt in dict.fromkeys(targets.tolist()):
+                if nxt not in path:
+                    queue.append(path + (nxt,))
+
+    def _capacity_matrix(self) -> np.ndarray:
+        """Total capacity between every pair of nodes over interconnections"""
+        n = len(self.nodes)
+        sources = np.repeat(np.arange(n), np.diff(self.indptr))
+        mask = self._kinds == INTERCONNECTION
+        cells = sources[mask] * n + self.targets[mask]
+        return np.bincount(cells, weights=self._capacity[mask], minlength=n * n).reshape(n, n)
+
+    def bottleneck(self, route: List[str]) -> Tuple[float, Tuple[str, str]]:
+        """Smallest total capacity between consecutive nodes of a route, and between which nodes"""
+        capacity = self._capacity_matrix()
+        hops = [(self.index[a], self.index[b]) for a, b in zip(route, route[1:])]
+        values = [capacity[a, b] for a, b in hops]
+        i = int(np.argmin(values))
+        return float(values[i]), (route[i], route[i + 1])
+
+    def max_flow(self, source: str, target: str) -> Tuple[float, pd.DataFrame]:
+        """
+        Maximum flow between two balancing zones over the interconnection capacities (Edmonds-Karp)
+
+        Returns
+        -------
+        (float, pd.DataFrame)
+            the maximum flow, and the flow per pair of nodes that achieves it
+        """
+        if source == target:
+            raise ValueError(f"No flow from {source} to itself, source and target should differ")
+
+        capacity = self._capacity_matrix()
+        n = len(self.nodes)
+        s, t = self.index[source], self.index[target]
+        flow = np.zeros((n, n))
+        total = 0.0
+        while True:
+            residual = capacity - flow
+            parent = np.full(n, -1)
+            parent[s] = s
+            queue = deque([s])
+            while queue and parent[t] < 0:
+                u = queue.popleft()
+                for v in np.flatnonzero((residual[u] > 0) & (parent < 0)):
+                    parent[v] = u
+                    queue.append(v)
+            if parent[t] < 0:
+                break
+
+            path = []
+            v = t
+            while v != s:
+                path.append((parent[v], v))
+                v = parent[v]
+            amount = min(residual[u, v] for u, v in path)
+            for u, v in path:
+                flow[u, v] += amount
+                flow[v, u] -= amount
+            total += amount
+
+        sources, targets = np.nonzero(flow > 0)
+        flows = pd.DataFrame({
+            'from': [self.nodes[i] for i in sources],
+            'to': [self.nodes[j] for j in targets],
+            'flow': flow[sources, targets],
+            'capacity': capacity[sources, targets],
+        })
+        return total, flows
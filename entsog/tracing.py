@@ -0,0 +1,55 @@
+from contextlib import nullcontext
+from functools import wraps
+
+_tracer = None
+
+
+def set_tracer(tracer):
+    """
+    Sets the tracer used to emit spans, e.g. ``opentelemetry.trace.get_tracer('entsog')``.
+    Any object with an OpenTelemetry compatible ``start_as_current_span(name, attributes=...)`` works.
+    Passing None disables tracing again, which is the default.
+
+    Parameters
+    ----------
+    tracer : opentelemetry.trace.Tracer
+    """
+    global _tracer
+    _tracer = tracer
+
+
+def get_tracer():
+    return _tracer
+
+
+def _to_attribute(value):
+    # OpenTelemetry only accepts primitives (and sequences of them) as attribute values
+    if isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [str(v) for v in value]
+    return str(value)
+
+
+def span(name: str, **attributes):
+    """Context manager around a span, a no-op when no tracer is set"""
+    if _tracer is None:
+        return nullcontext()
+
+    attributes = {key: _to_attribute(value) for key, value in attributes.items() if value is not None}
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+def traced(func):
+    """Wraps every call of a client method in a span named after the method"""
+
+    @wraps(func)
+    def traced_wrapper(*args, **kwargs):
+        if _tracer is None:
+            return func(*args, **kwargs)
+
+        name = f"{type(args[0]).__name__}.{func.__name__}"
+        with span(name, start=kwargs.get('start'), end=kwargs.get('end')):
+            return func(*args, **kwargs)
+
+    return traced_wrapper
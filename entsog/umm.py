@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Callable, Dict, Optional, Union
+
+from ._lazy import lazy_import
+from .entsog import EntsogRawClient
+from .intervals import EVENT, IntervalIndex
+from .mappings import BalancingZone
+from .parsers import parse_urgent_market_messages
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+# Event of a message that was not known before, and of a new version of a known one
+NEW = 'new'
+UPDATED = 'updated'
+
+
+class UrgentMarketMessages:
+    """
+    Follows the urgent market messages (outages and other unavailabilities), keeping the latest version of
+    every message in a local index by messageId.
+
+    The API has no filter on update time, so every update still downloads all messages; but an unchanged
+    response is skipped by its hash, and of a changed one only the messages that are new or have a higher
+    versionNumber are normalized. These are emitted as events (event 'new' or 'updated') to the callback
+    and/or queue.
+
+    The messages are indexed by eventStart/eventStop as well (an IntervalIndex, per balancing zone when
+    asked for one), so which outages overlap a period is a binary search instead of a scan.
+
+    Usage:
+        messages = UrgentMarketMessages(client, callback=print)
+        messages.update()  # After every interval
+        messages.affecting('2022-03-01', '2022-03-08', balancing_zone='DE-THE-----')
+    """
+
+    def __init__(self,
+                 client,
+                 balancing_zone: Optional[Union[BalancingZone, str]] = None,
+                 callback: Optional[Callable[[pd.DataFrame], None]] = None,
+                 queue=None):
+        """
+        Parameters
+        ----------
+        client : EntsogPandasClient
+        balancing_zone : BalancingZone | str
+            only follow the messages of a balancing zone
+        callback : callable
+            called with a DataFrame of the new and updated messages, with an event column
+        queue : queue.Queue
+            the DataFrames of new and updated messages are put on it
+        """
+        self.client = client
+        self.balancing_zone = balancing_zone
+        self.callback = callback
+        self.queue = queue
+
+        self.messages = pd.DataFrame()
+        self.versions: Dict = {}
+        self._body = None
+        self._intervals = {}
+
+    def __len__(self):
+        return len(self.messages)
+
+    def __repr__(self):
+        return f"UrgentMarketMessages({len(self)} messages)"
+
+    def update(self) -> pd.DataFrame:
+        """
+        Fetches the messages and emits the new and updated ones
+
+        Returns
+        -------
+        pd.DataFrame
+            the new and updated messages, with an event column
+        """
+        # The raw client's query: the body is hashed before parsing, and the pandas client's override of the
+        # same name parses it straight away
+        text, url = EntsogRawClient.query_urgent_market_messages(self.client, balancing_zone=self.balancing_zone)
+
+        body = hashlib.blake2b(text.encode(), digest_size=16).digest()
+        if body == self._body:
+            # Not parsed, so the client did not emit the metrics of the request yet
+            self.client.emit_request_metrics()
+            return pd.DataFrame()
+        self._body = body
+
+        changed = self.client.parse(parse_urgent_market_messages, text, self.versions)
+        if changed.empty:
+            return changed
+
+        # Only the highest version per message, if the response holds more than one
+        changed = changed.sort_values('version_number').drop_duplicates('message_id', keep='last')
+        changed.insert(0, 'event', np.where(changed['message_id'].isin(self.versions), UPDATED, NEW))
+        changed['url'] = url
+        for column in ('event_start', 'event_stop'):
+            changed[column] = pd.to_datetime(changed[column], utc=True, errors='coerce')
+
+        messages = changed.drop(columns=['event'])
+        if not self.messages.empty:
+            messages = pd.concat([self.messages[~self.messages['message_id'].isin(messages['message_id'])], messages],
+                                 ignore_index=True)
+        self.messages = messages.reset_index(drop=True)
+        self.versions.update(zip(changed['message_id'], changed['version_number']))
+        self._intervals = {}
+
+        changed = changed.reset_index(drop=True)
+        if self.callback is not None:
+            self.callback(changed)
+        if self.queue is not None:
+            self.queue.put(changed)
+        return changed
+
+    def _index(self, by_zone: bool) -> IntervalIndex:
+        """Interval index over the events of the messages, per balancing zone or over all of them"""
+        if by_zone not in self._intervals:
+            self._intervals[by_zone] = IntervalIndex.from_frame(
+                self.messages, EVENT, by=['balancing_zone_key'] if by_zone else None
+            )
+        return self._intervals[by_zone]
+
+    def affecting(self, start: Union[str, pd.Timestamp], end: Union[str, pd.Timestamp],
+                  balancing_zone: Optional[Union[BalancingZone, str]] = None,
+                  latest: bool = True) -> pd.DataFrame:
+        """
+        Messages whose event overlaps a period
+
+        Parameters
+        ----------
+        start : str | pd.Timestamp
+        end : str | pd.Timestamp
+        balancing_zone : BalancingZone | str
+            balancing zone key, e.g. 'DE-THE-----'
+        latest : bool
+            leave out messages that are not flagged as the latest version
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        if self.messages.empty:
+            return self.messages
+
+        if balancing_zone is None:
+            positions = self._index(by_zone=False).overlapping(start, end)
+        else:
+            key = balancing_zone.code if isinstance(balancing_zone, BalancingZone) else balancing_zone
+            positions = self._index(by_zone=True).overlapping(start, end, key=key)
+
+        result = self.messages.take(positions)
+        if latest and 'is_latest_version' in result.columns:
+            result = result[result['is_latest_version'].fillna(True).astype(bool)]
+        return result
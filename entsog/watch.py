@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from ._lazy import lazy_import
+from .decorators import url_batches
+from .exceptions import NoMatchingDataError, NotFoundError
+from .mappings import Indicator
+from .parsers import parse_operational_data
+from .tracing import span
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+
+class OperationalDataWatcher:
+    """
+    Polls operational data over a sliding window, e.g. the nominations and renominations of today and
+    tomorrow per hour, and emits only the records that are new or changed since the previous poll.
+
+    The body of every response is hashed first: when it is the same as the previous time, it is not
+    parsed at all. Otherwise every parsed record is hashed and compared to the records of the previous
+    poll, and only the ones not seen before are emitted, to the callback and/or put on the queue.
+    A batch of point directions without any data counts as empty, the other batches are still emitted.
+
+    Usage:
+        watcher = OperationalDataWatcher(client, callback=print, country_code='NL')
+        watcher.poll()  # Once, returns the changed records
+        watcher.start()  # Every interval seconds in a background thread, until watcher.stop()
+    """
+
+    def __init__(self,
+                 client,
+                 interval: float = 300,
+                 window: Tuple[Union[str, pd.Timedelta], Union[str, pd.Timedelta]] = ('0h', '1D'),
+                 period_type: str = 'hour',
+                 indicators: Union[List[Indicator], List[str]] = ('nomination', 'renomination'),
+                 point_directions: Optional[List[str]] = None,
+                 country_code=None, balancing_zone=None, operator=None,
+                 callback: Optional[Callable[[pd.DataFrame], None]] = None,
+                 queue=None,
+                 verbose: bool = False):
+        """
+        Parameters
+        ----------
+        client : EntsogPandasClient
+        interval : float
+            seconds between polls
+        window : (str | pd.Timedelta, str | pd.Timedelta)
+            start and end of the polled window relative to the start of the current period
+        period_type : str
+        indicators : list
+        point_directions : list
+            point directions to watch, or resolved from country_code, balancing_zone and/or operator;
+            all points when none of these are given
+        callback : callable
+            called with a DataFrame of the new or changed records
+        queue : queue.Queue
+            the DataFrames of new or changed records are put on it
+        verbose : bool
+        """
+        self.client = client
+        self.interval = interval
+        self.window = (pd.Timedelta(window[0]), pd.Timedelta(window[1]))
+        self.period_type = period_type
+        self.indicators = list(indicators) if indicators is not None else None
+        self.callback = callback
+        self.queue = queue
+        self.verbose = verbose
+
+        if point_directions is None and any(v is not None for v in (country_code, balancing_zone, operator)):
+            point_directions = client.resolve_point_directions(
+                country_code=country_code, balancing_zone=balancing_zone, operator=operator
+            )
+            if not point_directions:
+                raise NoMatchingDataError
+        self.point_directions = point_directions
+
+        # Per batch of point directions and indicators: hash of the last body and of its records
+        self._bodies: Dict[int, bytes] = {}
+        self._records: Dict[int, np.ndarray] = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _count(self, result: str):
+        if self.client.metrics is not None:
+            self.client.metrics.inc('watch_polls_total', result=result)
+
+    def _poll_batch(self, batch: int, start: pd.Timestamp, end: pd.Timestamp,
+                    point_directions: Optional[List[str]], indicators: Optional[List[str]]) -> Optional[pd.DataFrame]:
+        try:
+            # The raw response: the pandas client inherits the query of the raw client
+            text, url = self.client.query_operational_data(
+                start=start, end=end, period_type=self.period_type,
+                indicators=indicators, point_directions=point_directions
+            )
+        except (NoMatchingDataError, NotFoundError):
+            # No data for this batch (yet), which should not cost the other batches their changes
+            self._count('empty')
+            self._bodies.pop(batch, None)
+            self._records[batch] = np.zeros(0, dtype=np.uint64)
+            return None
+
+        body = hashlib.blake2b(text.encode(), digest_size=16).digest()
+        if self._bodies.get(batch) == body:
+            self._count('unchanged')
+            # Not parsed, so the client did not emit the metrics of the request yet
+            self.client.emit_request_metrics()
+            return None
+        self._bodies[batch] = body
+        self._count('changed')
+
+        try:
+            data = self.client.parse(parse_operational_data, text, self.verbose)
+        except NoMatchingDataError:
+            self._records[batch] = np.zeros(0, dtype=np.uint64)
+            return None
+        data['url'] = url
+
+        records = pd.util.hash_pandas_object(data.drop(columns=['url']), index=False).to_numpy()
+        previous = self._records.get(batch, np.zeros(0, dtype=np.uint64))
+        self._records[batch] = np.sort(records)
+        return data[~np.isin(records, previous)]
+
+    def _period(self, now: pd.Timestamp) -> pd.Timestamp:
+        """Start of the period of now"""
+        if self.period_type != 'hour':
+            return now.normalize()
+        if now.tz is None:
+            return now.floor('h')
+        # Flooring in UTC gives the same whole hour, without the ambiguous hour when DST ends
+        return now.tz_convert('UTC').floor('h').tz_convert(now.tz)
+
+    def poll(self, now: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        Polls the window once and emits the new or changed records
+
+        Parameters
+        ----------
+        now : pd.Timestamp
+            defaults to the current time
+
+        Returns
+        -------
+        pd.DataFrame
+            the new or changed records, empty when there are none
+        """
+        now = pd.Timestamp.now(tz='Europe/Brussels') if now is None else now
+        period = self._period(now)
+        start, end = period + self.window[0], period + self.window[1]
+
+        frames = []
+        with span('entsog.watch', period_type=self.period_type):
+            for batch, (point_directions, indicators) in enumerate(url_batches(self.client, self.point_directions, self.indicators)):
+                frame = self._poll_batch(batch, start, end, point_directions, indicators)
+                if frame is not None and not frame.empty:
+                    frames.append(frame)
+
+        delta = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        if not delta.empty:
+            if self.callback is not None:
+                self.callback(delta)
+            if self.queue is not None:
+                self.queue.put(delta)
+        return delta
+
+    def run(self, polls: Optional[int] = None):
+        """Polls every interval seconds until stop() is called, or polls times"""
+        count = 0
+        while not self._stop.is_set() and (polls is None or count < polls):
+            try:
+                self.poll()
+            except Exception as e:
+                # A failing poll should not end the watch, the next one may well succeed
+                logging.warning(f"Polling operational data failed: {e!r}")
+            count += 1
+            if polls is None or count < polls:
+                self._stop.wait(self.interval)
+
+    def start(self) -> threading.Thread:
+        """Runs the watcher in a background thread"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='entsog-watch', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
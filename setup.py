@@ -63,7 +63,7 @@ setup(
 
     # List run-time dependencies here.  These will be installed by pip when
     # your project is installed.
-    install_requires=['requests', 'pandas', 'bs4', 'unidecode'],
+    install_requires=['requests', 'pandas', 'pytz', 'python-dateutil', 'unidecode'],
 
     # If there are data files included in your packages that need to be
     # installed, specify them here.  If using Python 2.6 or less, then these
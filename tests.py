@@ -1,7 +1,11 @@
+import os
 from entsog import EntsogPandasClient
+from entsog.cassette import Cassette
 import pandas as pd
 
-client = EntsogPandasClient()
+# Set ENTSOG_CASSETTE to a directory to record the responses once and replay them offline afterwards
+cassette = Cassette(os.environ['ENTSOG_CASSETTE']) if 'ENTSOG_CASSETTE' in os.environ else None
+client = EntsogPandasClient(cassette=cassette)
 
 start = pd.Timestamp('20220918', tz='Europe/Brussels')
 end = pd.Timestamp('20220920', tz='Europe/Brussels')
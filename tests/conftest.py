@@ -0,0 +1,52 @@
+import json
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entsog.server import EntsogServer  # noqa: E402
+from entsog.topology import Topology  # noqa: E402
+
+# Point directions the stand-in server has no data for
+EMPTY = 'EMPTY'
+
+
+class SparseServer(EntsogServer):
+    """EntsogServer answering 404 "No Data Found", like the API, to requests for EMPTY point directions"""
+
+    def respond(self, path, query):
+        if EMPTY in query:
+            with self._lock:
+                self.requests += 1
+            return 404, json.dumps({'message': 'No Data Found'})
+        return super().respond(path, query)
+
+
+@pytest.fixture
+def server():
+    with EntsogServer(rows=20) as server:
+        yield server
+
+
+@pytest.fixture
+def sparse_server():
+    with SparseServer(rows=20) as server:
+        yield server
+
+
+def _interconnection(source, target, point):
+    return dict(from_bz_key=source, to_bz_key=target, point_key=point, from_operator_key=f"O-{source}",
+                from_point_key=f"X-{point}", to_operator_key=f"O-{target}", to_point_key=f"E-{point}")
+
+
+@pytest.fixture
+def topology():
+    # A -> B -> D and A -> C -> D, with two parallel points from A to B
+    interconnections = pd.DataFrame([
+        _interconnection('A', 'B', 'P1'), _interconnection('A', 'B', 'P2'),
+        _interconnection('B', 'D', 'P3'), _interconnection('A', 'C', 'P4'), _interconnection('C', 'D', 'P5'),
+    ])
+    return Topology(interconnections)
@@ -0,0 +1,89 @@
+import pandas as pd
+import pytest
+
+from entsog import EntsogPandasClient
+from entsog.decorators import URL_OVERHEAD, url_batches
+from entsog.exceptions import NoMatchingDataError
+from entsog.misc import _joined_length, batch_by_length, batch_pairs
+
+from conftest import EMPTY
+
+START = pd.Timestamp('2022-01-01', tz='UTC')
+END = pd.Timestamp('2022-01-02', tz='UTC')
+
+
+def _point_directions(n, prefix='NL-TSO-0001ITP-'):
+    return [f"{prefix}{i:05d}entry" for i in range(n)]
+
+
+def test_batch_by_length_keeps_order_and_limit():
+    keys = _point_directions(50)
+    batches = batch_by_length(keys, 200)
+    assert [key for batch in batches for key in batch] == keys
+    assert all(_joined_length(batch) <= 200 for batch in batches)
+
+
+@pytest.mark.parametrize('separator', [',', ';'])
+def test_batch_pairs_covers_every_pair_within_limit(separator):
+    first = _point_directions(40)
+    second = ['Physical Flow', 'Nomination', 'Renomination', 'Allocation']
+    requests = batch_pairs(first, second, 300, separator)
+
+    pairs = {(a, b) for batch_a, batch_b in requests for a in batch_a for b in batch_b}
+    assert pairs == {(a, b) for a in first for b in second}
+    for batch_a, batch_b in requests:
+        assert _joined_length(batch_a, separator) + _joined_length(batch_b, separator) <= 300
+
+
+def test_batch_pairs_keeps_none():
+    assert batch_pairs(None, None, 100) == [(None, None)]
+    assert batch_pairs(None, ['a', 'b'], 100) == [(None, ['a', 'b'])]
+
+
+def test_url_batches_maps_indicators_back():
+    client = EntsogPandasClient(max_url_length=500)
+    indicators = ['physical_flow', 'nomination']
+    batches = url_batches(client, _point_directions(60), indicators)
+    assert len(batches) > 1
+    assert {i for _, batch in batches for i in batch} == set(indicators)
+
+
+def test_requests_stay_within_max_url_length(server):
+    urls = []
+    client = EntsogPandasClient(base_url=server.url, retry_delay=0, max_url_length=600,
+                                hooks=[lambda record: urls.append(record.url)])
+    client.query_operational_point_data(start=START, end=END, point_directions=_point_directions(80),
+                                        indicators=['physical_flow', 'nomination'])
+    assert len(urls) > 1
+    assert max(len(url) for url in urls) <= 600
+    # The overhead leaves room for the longest other parameters, not a lot more
+    assert 600 - max(len(url) for url in urls) < URL_OVERHEAD
+
+
+def test_empty_batch_does_not_abort_query(sparse_server):
+    client = EntsogPandasClient(base_url=sparse_server.url, retry_delay=0, max_url_length=400)
+    point_directions = _point_directions(20, prefix=EMPTY) + _point_directions(20)
+    data = client.query_operational_point_data(start=START, end=END, point_directions=point_directions,
+                                               indicators=['physical_flow'])
+    assert len(data) == 20
+    assert sparse_server.requests > 2
+
+
+def test_all_batches_empty_raises(sparse_server):
+    client = EntsogPandasClient(base_url=sparse_server.url, retry_delay=0, max_url_length=400)
+    with pytest.raises(NoMatchingDataError):
+        client.query_operational_point_data(start=START, end=END,
+                                            point_directions=_point_directions(40, prefix=EMPTY),
+                                            indicators=['physical_flow'])
+
+
+def test_query_by_area_keeps_raw_signature(server):
+    client = EntsogPandasClient(base_url=server.url, retry_delay=0)
+    operator_key = client.query_operator_point_directions()['operator_key'].iloc[0]
+    data = client.query_operational_data_by_area(start=START, end=END, operator=operator_key)
+    assert not data.empty
+
+    # The inherited method still takes the parameters of the raw client
+    text, url = client.query_operational_data(start=START, end=END, indicators=['physical_flow'],
+                                              point_directions=_point_directions(2))
+    assert 'pointDirection' in url
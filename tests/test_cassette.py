@@ -0,0 +1,81 @@
+import gzip
+import json
+import os
+from datetime import timedelta
+
+import pytest
+import requests
+
+from entsog import EntsogRawClient
+from entsog.cassette import Cassette
+from entsog.exceptions import BadGatewayError, CassetteMissError
+
+BODY = json.dumps({'operators': [{'operatorKey': 'NL-TSO-0001', 'operatorLabel': 'Gasunie Transport Services'}]})
+
+
+class StubSession:
+    """Stands in for requests.Session: answers every request with status_code and counts them"""
+
+    def __init__(self, status_code: int = 200):
+        self.status_code = status_code
+        self.requests = 0
+
+    def get(self, url, params=None, proxies=None, timeout=None):
+        self.requests += 1
+        response = requests.Response()
+        response.status_code = self.status_code
+        response.url = f"{url}?{params}"
+        response.encoding = 'utf-8'
+        response.elapsed = timedelta(0)
+        response._content = (BODY if self.status_code == 200 else 'Bad Gateway').encode()
+        return response
+
+
+def test_auto_records_and_replays(tmp_path):
+    session = StubSession()
+    client = EntsogRawClient(session=session, retry_delay=0, cassette=Cassette(str(tmp_path)))
+    first, _ = client.query_operators()
+    replayed, _ = client.query_operators()
+    assert session.requests == 1
+    assert replayed == first
+    assert len(client.cassette) == 1
+
+
+def test_replay_miss_raises(tmp_path):
+    session = StubSession()
+    client = EntsogRawClient(session=session, cassette=Cassette(str(tmp_path), mode='replay'))
+    with pytest.raises(CassetteMissError):
+        client.query_operators()
+    assert session.requests == 0
+
+
+def test_errors_are_not_recorded(tmp_path):
+    session = StubSession(502)
+    client = EntsogRawClient(session=session, retry_delay=0, retry_count=3, cassette=Cassette(str(tmp_path)))
+    with pytest.raises(BadGatewayError):
+        client.query_operators()
+    # Every retry reached the server instead of replaying the first error
+    assert session.requests == 3
+    assert len(client.cassette) == 0
+
+    session.status_code = 200
+    assert client.query_operators()[0] == BODY
+    assert session.requests == 4
+
+
+def test_auto_ignores_recorded_errors(tmp_path):
+    session = StubSession()
+    client = EntsogRawClient(session=session, retry_delay=0, cassette=Cassette(str(tmp_path)))
+    client.query_operators()
+
+    # An error recorded by an older version
+    [name] = os.listdir(tmp_path)
+    with open(tmp_path / name, 'rb') as f:
+        meta, body = gzip.decompress(f.read()).split(b'\n', 1)
+    meta = json.loads(meta)
+    meta['status_code'] = 502
+    with open(tmp_path / name, 'wb') as f:
+        f.write(gzip.compress(json.dumps(meta).encode() + b'\n' + body))
+
+    assert client.query_operators()[0] == BODY
+    assert session.requests == 2
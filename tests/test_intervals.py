@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from entsog.intervals import IntervalIndex, overlap_join
+from entsog.misc import ranges
+
+
+def _periods(rng, rows, points):
+    start = pd.Timestamp('2022-01-01', tz='UTC') + pd.to_timedelta(rng.integers(0, 60, rows), 'D')
+    stop = start + pd.to_timedelta(rng.integers(1, 20, rows), 'D')
+    return pd.DataFrame({'point_key': rng.choice(points, rows), 'period_from': start, 'period_to': stop})
+
+
+def test_overlap_join_matches_brute_force():
+    rng = np.random.default_rng(0)
+    left = _periods(rng, 200, ['A', 'B', 'C'])
+    right = _periods(rng, 100, ['A', 'B']).assign(id=range(100))
+    right.loc[5, 'period_to'] = pd.NaT  # Not ended yet
+
+    joined = overlap_join(left, right, by=['point_key'])
+    merged = left.reset_index().merge(right, on='point_key', suffixes=('', '_right'))
+    stop = merged['period_to_right'].fillna(pd.Timestamp.max.tz_localize('UTC'))
+    expected = merged[(merged['period_from'] < stop) & (merged['period_from_right'] < merged['period_to'])]
+    assert sorted(zip(joined['point_key'], joined['id'])) == sorted(zip(expected['point_key'], expected['id']))
+
+
+def test_interval_index_overlapping():
+    index = IntervalIndex(pd.to_datetime(['2022-01-01', '2022-01-05', '2022-01-10'], utc=True),
+                          pd.to_datetime(['2022-01-03', '2022-01-20', '2022-01-11'], utc=True))
+    np.testing.assert_array_equal(index.overlapping('2022-01-02', '2022-01-06'), [0, 1])
+    np.testing.assert_array_equal(index.overlapping('2022-01-03', '2022-01-04'), [])
+
+
+def test_ranges_concatenates_aranges():
+    starts = np.array([0, 5, 5, 7])
+    stops = np.array([3, 5, 8, 9])
+    expected = np.concatenate([np.arange(a, b) for a, b in zip(starts, stops)])
+    np.testing.assert_array_equal(ranges(starts, stops), expected)
+    assert len(ranges(np.array([2]), np.array([2]))) == 0
+
+
+def test_from_frame_parses_mixed_iso_strings():
+    # As returned by the API: offsets, dates only and missing ends in one column
+    frame = pd.DataFrame({'period_from': ['2022-01-01T06:00:00+01:00', '2022-01-05', '2022-01-10T00:00:00Z'],
+                          'period_to': ['2022-01-03', None, '2022-01-11T00:00:00+00:00']}, dtype=object)
+    index = IntervalIndex.from_frame(frame)
+    np.testing.assert_array_equal(index.overlapping('2022-01-02', '2022-01-06'), [0, 1])
+    np.testing.assert_array_equal(index.overlapping('2022-01-10T12:00', '2022-01-12'), [1, 2])
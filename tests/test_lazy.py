@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+THREADS = textwrap.dedent("""
+    from concurrent.futures import ThreadPoolExecutor
+    from entsog._lazy import lazy_import
+
+    pd = lazy_import('pandas')
+    # Every thread touches pandas for the first time at once
+    with ThreadPoolExecutor(8) as executor:
+        sizes = list(executor.map(lambda i: len(pd.DataFrame({'a': range(i)})), range(8)))
+    assert sizes == list(range(8)), sizes
+""")
+
+
+def run(code: str) -> subprocess.CompletedProcess:
+    """Runs code in a new interpreter, in which nothing is imported yet"""
+    env = {**os.environ, 'PYTHONPATH': ROOT}
+    return subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, capture_output=True, text=True,
+                          timeout=120)
+
+
+def test_import_does_not_load_pandas():
+    result = run("import sys, entsog; from entsog import EntsogPandasClient; "
+                 "EntsogPandasClient(); assert 'pandas' not in sys.modules")
+    assert result.returncode == 0, result.stderr
+
+
+def test_first_use_from_threads_in_cold_interpreter():
+    for _ in range(3):
+        result = run(THREADS)
+        assert result.returncode == 0, result.stderr
+
+
+def test_lazy_module_attributes():
+    from entsog._lazy import lazy_import, load
+
+    json = lazy_import('json')
+    assert json.loads('[1]') == [1]
+    rrule = lazy_import('dateutil.rrule')
+    load(rrule)
+    assert rrule.MONTHLY == 1
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from entsog.mappings import Area, BalancingZone, Country, Indicator, code_index, lookup_area, \
+    lookup_balancing_zone, lookup_country, lookup_indicator, map_codes
+
+
+def _scan(enum, s):
+    """The lookup the reverse indexes replace: by name, otherwise the first member with that code"""
+    if s in enum.__members__:
+        return enum[s]
+    return next((member for member in enum if member.value == s), None)
+
+
+@pytest.mark.parametrize('enum, lookup', [
+    (Country, lookup_country), (BalancingZone, lookup_balancing_zone), (Indicator, lookup_indicator)
+])
+def test_lookup_matches_scan(enum, lookup):
+    for member in enum:
+        assert lookup(member) is member
+        assert lookup(member.name) is _scan(enum, member.name)
+        assert lookup(member.value) is _scan(enum, member.value)
+
+
+def test_lookup_aliases():
+    assert lookup_country('Netherlands') is Country.NL
+    assert lookup_country(' netherlands ') is Country.NL
+    assert lookup_indicator('physical  FLOW') is Indicator.physical_flow
+    with pytest.raises(IndexError):
+        lookup_country('XX')
+
+
+def test_lookup_area_by_operator():
+    assert lookup_area('NL') is Area.NL
+    for operator_key in Area.NL.value:
+        assert lookup_area(operator_key) is Area.NL
+    assert lookup_area('XX') is None
+    assert lookup_area(None) is None
+
+
+def test_map_codes_matches_lookup():
+    codes = pd.Series([member.value for member in Country] + ['XX', None])
+    expected = pd.Series([lookup_country(code).label if code in code_index(Country) else np.nan for code in codes])
+    pd.testing.assert_series_equal(map_codes(codes, Country), expected)
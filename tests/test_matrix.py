@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from entsog.matrix import KEY_COLUMNS, flow_matrix
+
+PERIODS = ['2022-01-01T06:00:00+01:00', '2022-01-02T06:00:00+01:00', '2022-01-03T06:00:00+01:00']
+
+
+@pytest.fixture
+def flows():
+    rng = np.random.default_rng(0)
+    point_directions = pd.DataFrame({
+        'operator_key': [f"O-{i % 3}" for i in range(30)],
+        'point_key': [f"P-{i}" for i in range(30)],
+        'direction_key': rng.choice(['entry', 'exit'], 30),
+        't_so_country': rng.choice(['NL', 'DE', 'BE'], 30),
+        'adjacent_country': rng.choice(['NL', 'DE', 'BE', None], 30),
+    })
+    data = point_directions[KEY_COLUMNS].sample(300, replace=True, random_state=0).reset_index(drop=True)
+    data['period_from'] = rng.choice(PERIODS, len(data))
+    data['indicator'] = rng.choice(['Physical Flow', 'Nomination'], len(data))
+    data['value'] = rng.random(len(data))
+    # A point direction without operator point direction is left out
+    data.loc[0, 'point_key'] = 'P-UNKNOWN'
+    return data, point_directions
+
+
+def _reference(data, point_directions, direction):
+    """Cross-border flows of one direction summed per (period, from, to), through a merge"""
+    merged = data[data['indicator'] == 'Physical Flow'].merge(point_directions, on=KEY_COLUMNS)
+    merged = merged[merged['adjacent_country'].notna() & (merged['t_so_country'] != merged['adjacent_country'])]
+    merged = merged[merged['direction_key'] == direction]
+    own, adjacent = merged['t_so_country'], merged['adjacent_country']
+    merged = merged.assign(period_from=pd.to_datetime(merged['period_from'], utc=True),
+                           source=adjacent if direction == 'entry' else own,
+                           target=own if direction == 'entry' else adjacent)
+    return merged.groupby(['period_from', 'source', 'target'])['value'].sum().to_dict()
+
+
+@pytest.mark.parametrize('side', ['entry', 'exit'])
+def test_flow_matrix_matches_merge(flows, side):
+    data, point_directions = flows
+    matrix = flow_matrix(data, point_directions, side=side)
+    cells = matrix.to_frame()
+    result = dict(zip(zip(cells['period_from'], cells['from'], cells['to']), cells['value']))
+    assert result == pytest.approx(_reference(data, point_directions, side))
+    assert list(matrix.periods) == sorted(pd.to_datetime(PERIODS, utc=True))
+
+
+def test_flow_matrix_mean_and_net(flows):
+    data, point_directions = flows
+    entries = flow_matrix(data, point_directions, side='entry').values
+    exits = flow_matrix(data, point_directions, side='exit').values
+    matrix = flow_matrix(data, point_directions, side='mean')
+    # Averages where both sides reported
+    np.testing.assert_allclose(matrix.values, np.where((entries > 0) & (exits > 0), (entries + exits) / 2,
+                                                       entries + exits))
+    np.testing.assert_allclose(matrix.net(), -matrix.net().transpose(0, 2, 1))
+    np.testing.assert_allclose(matrix.net_positions().sum(axis=1), 0, atol=1e-9)
+    assert matrix.flow('NL', 'DE').tolist() == matrix.values[:, matrix.index['NL'], matrix.index['DE']].tolist()
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from entsog.misc import factorize, to_utc, transform_unique
+
+
+def test_transform_unique_matches_direct_transform():
+    values = pd.Series(['EUR/(kWh/d)/y', None, 'EUR/(kWh/h)/d', 'EUR/(kWh/d)/y'] * 5, index=range(100, 120))
+    expected = values.str.extract(r'\((.*?)\)')[0]
+    result = transform_unique(values, lambda s: s.str.extract(r'\((.*?)\)')[0])
+    pd.testing.assert_series_equal(result, expected, check_names=False)
+
+
+def test_transform_unique_frames():
+    values = pd.Series(['NL-TSO-0001', 'DE-TSO-0002', None, 'NL-TSO-0001'], name='operator_key')
+    split = lambda s: s.str.split('-', expand=True)  # noqa: E731
+    pd.testing.assert_frame_equal(transform_unique(values, split), split(values))
+
+
+def test_factorize_codes_missing_values():
+    values = pd.Series(['b', None, 'a', 'b', np.nan])
+    codes, uniques = factorize(values)
+    assert codes.tolist() == [0, 2, 1, 0, 2]
+    assert uniques[:2].tolist() == ['b', 'a'] and pd.isna(uniques[2])
+
+    codes, uniques = factorize(pd.Series(pd.to_datetime(['2022-01-01', None, '2022-01-01'])))
+    assert codes.tolist() == [0, 1, 0]
+    assert isinstance(uniques, pd.DatetimeIndex)
+
+
+def test_to_utc_mixed_forms():
+    values = pd.Series(['2022-01-01T06:00:00+01:00', '2022-01-02', '2022-01-03T06:00:00Z', None, 'garbage'])
+    expected = pd.Series(pd.DatetimeIndex(['2022-01-01 05:00', '2022-01-02 00:00', '2022-01-03 06:00', None, None], tz='UTC'))
+    pd.testing.assert_series_equal(to_utc(values), expected, check_dtype=False)
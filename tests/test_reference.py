@@ -0,0 +1,119 @@
+import textwrap
+
+import pandas as pd
+import pytest
+
+from entsog import EntsogPandasClient
+from entsog.reference import DATASETS, ReferenceData
+
+from test_lazy import run
+
+WARM = textwrap.dedent("""
+    from entsog import EntsogPandasClient
+    from entsog.server import EntsogServer
+
+    with EntsogServer(rows=20) as server:
+        client = EntsogPandasClient(base_url=server.url, retry_delay=0)
+        frames = client.warm()
+    assert all(len(frame) == 20 for frame in frames.values()), {name: len(f) for name, f in frames.items()}
+""")
+
+
+@pytest.fixture
+def client(server):
+    return EntsogPandasClient(base_url=server.url, retry_delay=0)
+
+
+def test_snapshot_round_trip(server, client, tmp_path):
+    reference = ReferenceData(str(tmp_path)).ensure(client)
+    assert sorted(reference.frames) == sorted(DATASETS)
+    assert reference.stale() == []
+    requests = server.requests
+
+    loaded = ReferenceData(str(tmp_path)).ensure(client)
+    assert server.requests == requests
+    for name in DATASETS:
+        pd.testing.assert_frame_equal(loaded[name], reference[name], check_dtype=False)
+        assert loaded.refreshed[name] == reference.refreshed[name]
+
+
+def test_only_stale_datasets_are_refreshed(server, client, tmp_path):
+    reference = ReferenceData(str(tmp_path), max_age='1h').ensure(client)
+    reference.refreshed['operators'] -= pd.Timedelta('2h')
+    assert reference.stale() == ['operators']
+    assert reference.get('operators') is None
+    assert reference.get('balancing_zones') is not None
+
+    requests = server.requests
+    reference.ensure(client)
+    assert server.requests == requests + 1
+    assert reference.stale() == []
+
+    reference.discard('operators')
+    assert reference.stale() == ['operators']
+    with pytest.raises(KeyError):
+        reference['operators']
+
+
+def test_select_matches_filter(client):
+    reference = ReferenceData().ensure(client)
+    frame = reference['operator_point_directions']
+    operator_key, direction_key = frame.iloc[0][['operator_key', 'direction_key']]
+
+    expected = frame[(frame['operator_key'] == operator_key) & (frame['direction_key'] == direction_key)]
+    pd.testing.assert_frame_equal(reference.point_directions(operator_key=operator_key, direction_key=direction_key),
+                                  expected)
+    assert reference.point_directions(operator_key='XX-TSO-9999').empty
+
+    operators = reference['operators']
+    operator_key = operators['operator_key'].iloc[3]
+    assert reference.operator(operator_key) == operators[operators['operator_key'] == operator_key].iloc[0].to_dict()
+    assert reference.operator('XX-TSO-9999') is None
+
+
+def test_index_follows_replaced_dataset(client):
+    reference = ReferenceData().ensure(client)
+    operators = reference['operators']
+    operator_key = operators['operator_key'].iloc[3]
+    assert reference.operator(operator_key) is not None
+
+    # Lookups on the replacement never use positions from the index of the old frame
+    reversed_operators = operators.iloc[::-1].reset_index(drop=True)
+    reference.set('operators', reversed_operators)
+    assert reference.operator(operator_key) == \
+        reversed_operators[reversed_operators['operator_key'] == operator_key].iloc[0].to_dict()
+    reference.set('operators', operators[operators['operator_key'] != operator_key])
+    assert reference.operator(operator_key) is None
+
+
+def test_warm_serves_from_registry(server, client):
+    frames = client.warm()
+    assert sorted(frames) == sorted(DATASETS)
+    requests = server.requests
+
+    pd.testing.assert_frame_equal(client.query_operators(), frames['operators'])
+    assert server.requests == requests
+    # Filtered queries still go to the API
+    client.query_operators(country_code='NL')
+    assert server.requests == requests + 1
+
+
+def test_client_given_registry(server, client):
+    reference = ReferenceData().ensure(client)
+    requests = server.requests
+
+    other = EntsogPandasClient(base_url=server.url, reference=reference)
+    pd.testing.assert_frame_equal(other.query_balancing_zones(), reference['balancing_zones'])
+    assert server.requests == requests
+
+    other.warm(ttl=60)
+    assert reference.max_age == '1D'
+    client.warm(ttl=60)
+    assert client.reference.max_age == '60s'
+
+
+def test_warm_in_cold_interpreter():
+    # Every worker of warm() would touch pandas for the first time at once
+    for _ in range(3):
+        result = run(WARM)
+        assert result.returncode == 0, result.stderr
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from entsog.revisions import KEY, LatestRevisions, RevisionStore, latest_revisions
+
+
+def _revisions(seed=0, rows=300):
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        'operator_key': 'NL-TSO-0001',
+        'point_key': rng.choice([f"ITP-{i:05d}" for i in range(10)], rows),
+        'direction_key': rng.choice(['entry', 'exit'], rows),
+        'indicator': 'Physical Flow',
+        'period_type': 'day',
+        'period_from': rng.choice(['2022-01-01T06:00:00+01:00', '2022-01-02T06:00:00+01:00'], rows),
+        'flow_status': rng.choice(['Provisional', 'Confirmed'], rows),
+        'value': rng.integers(0, 100, rows).astype(float),
+    })
+    data['last_update_date_time'] = (pd.Timestamp('2022-01-01', tz='UTC')
+                                     + pd.to_timedelta(rng.integers(0, 10_000, rows), 's')).map(pd.Timestamp.isoformat)
+    return data
+
+
+def _reference(data):
+    ranked = data.assign(_rank=data['flow_status'].map({'Confirmed': 2, 'Provisional': 1}),
+                         _updated=pd.to_datetime(data['last_update_date_time'], utc=True))
+    ranked = ranked.sort_values(['_rank', '_updated'], kind='stable')
+    return ranked.drop_duplicates(subset=KEY, keep='last').drop(columns=['_rank', '_updated'])
+
+
+def _sorted(frame):
+    return frame.sort_values(KEY).reset_index(drop=True)
+
+
+def test_latest_revisions_match_sort():
+    data = _revisions()
+    pd.testing.assert_frame_equal(_sorted(latest_revisions(data)), _sorted(_reference(data)))
+
+
+def test_latest_revisions_view_over_chunks():
+    data = _revisions(1)
+    view = LatestRevisions()
+    for chunk in np.array_split(np.arange(len(data)), 4):
+        view.update(data.iloc[chunk])
+    assert len(view) == len(_reference(data))
+    pd.testing.assert_series_equal(_sorted(view.frame)['value'], _sorted(_reference(data))['value'])
+
+
+def test_revision_store_as_of():
+    data = _revisions(2).drop(columns=['flow_status'])
+    store = RevisionStore(columns=['value'])
+    store.add(data)
+    assert store.add(data) == 0
+
+    moment = pd.Timestamp('2022-01-01 01:00', tz='UTC')
+    published = data[pd.to_datetime(data['last_update_date_time'], utc=True) <= moment]
+    expected = published.assign(_updated=pd.to_datetime(published['last_update_date_time'], utc=True))
+    expected = expected.sort_values('_updated', kind='stable').drop_duplicates(subset=KEY, keep='last')
+
+    result = store.as_of(moment)
+    assert len(result) == len(expected)
+    merged = result.merge(expected, on=KEY, suffixes=('', '_expected'))
+    np.testing.assert_array_equal(merged['value'], merged['value_expected'])
@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+
+from entsog.rollup import Rollup
+
+
+def test_rollup_matches_groupby():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({
+        'country': rng.choice(['NL', 'DE', None], 500),
+        'zone': rng.choice(['A', 'B', 'C'], 500),
+        'point': rng.choice([f"P{i}" for i in range(20)], 500),
+        'value': rng.random(500),
+    })
+    levels = {'point': ['country', 'zone', 'point'], 'country': ['country']}
+    rollup = Rollup(data, levels)
+    for level, columns in levels.items():
+        expected = data.groupby(columns)['value'].sum().reset_index()
+        result = rollup[level]
+        np.testing.assert_allclose(result['value'].to_numpy(), expected['value'].to_numpy())
+        assert result[columns].astype(object).equals(expected[columns].astype(object))
@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+
+from entsog.routes import RouteCosts
+
+
+def _tariffs(costs, year=2022):
+    return pd.DataFrame([
+        dict(point_key=point, direction_key=direction, product_type=product, period_from=f"{year}-01-01",
+             period_to=f"{year + 1}-01-01", product_simulation_cost_in_euro=cost)
+        for (point, direction, product), cost in costs.items()
+    ])
+
+
+def test_route_costs_take_cheapest_parallel_point(topology):
+    tariffs = _tariffs({
+        ('X-P1', 'exit', 'Yearly'): 5.0, ('E-P1', 'entry', 'Yearly'): 5.0,
+        ('X-P2', 'exit', 'Yearly'): 1.0, ('E-P2', 'entry', 'Yearly'): 2.0,
+        ('X-P3', 'exit', 'Yearly'): 4.0,
+        ('X-P4', 'exit', 'Yearly'): 1.0,
+    })
+    costs = RouteCosts(topology, tariffs)
+    result = costs.route_costs('A', 'D', timestamp='2022-06-01')
+    by_route = dict(zip(result['route'], result['cost']))
+    assert by_route[('A', 'B', 'D')] == 7.0
+    # Nothing priced between C and D
+    assert pd.isna(by_route[('A', 'C', 'D')])
+    assert result['points'].iloc[0] == ('P2', 'P3')
+
+    with pytest.raises(ValueError):
+        costs.route_costs('A')
+
+
+def test_route_costs_follow_topology_updates(topology):
+    tariffs = _tariffs({('X-P3', 'exit', 'Yearly'): 4.0, ('E-NEW', 'entry', 'Yearly'): 6.0})
+    costs = RouteCosts(topology, tariffs)
+    assert costs.route_costs(['B', 'D'], timestamp='2022-06-01')['cost'].tolist() == [4.0]
+
+    changed = topology.edges.assign(from_bz_key=topology.edges['source'], to_bz_key=topology.edges['target'])
+    changed.loc[changed['point_key'] == 'P3', 'to_point_key'] = 'E-NEW'
+    topology.update(interconnections=changed)
+    assert costs.route_costs(['B', 'D'], timestamp='2022-06-01')['cost'].tolist() == [10.0]
@@ -0,0 +1,19 @@
+import pandas as pd
+
+from entsog.search import TextIndex
+
+
+def test_text_index_terms_and_phrases():
+    messages = pd.DataFrame({
+        'message_id': ['m1', 'm2', 'm3'],
+        'remarks': ['Planned maintenance at compressor station', 'Compressor failure', 'Station maintenance'],
+    })
+    index = TextIndex(key='message_id')
+    index.add(messages)
+    assert list(index.keys(index.search('maintenance'))) == ['m1', 'm3']
+    assert list(index.keys(index.search('"compressor station"'))) == ['m1']
+    assert list(index.keys(index.search('station maintenance compressor'))) == ['m1']
+
+    # A new version of a message replaces the earlier one
+    index.add(pd.DataFrame({'message_id': ['m1'], 'remarks': ['Resolved']}))
+    assert list(index.keys(index.search('maintenance'))) == ['m3']
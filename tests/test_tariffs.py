@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from entsog.tariffs import TariffTable
+
+
+def test_tariff_table_lookups(tmp_path):
+    tariffs = pd.DataFrame({
+        'point_key': ['P1', 'P1', 'P1', 'P2'],
+        'direction_key': ['entry', 'entry', 'entry', 'exit'],
+        'product_type': ['Yearly'] * 4,
+        'period_from': ['2021-01-01T00:00:00+00:00', '2022-01-01T00:00:00+00:00', '2022-01-01T00:00:00+00:00',
+                        '2022-01-01T00:00:00+00:00'],
+        'period_to': ['2022-01-01T00:00:00+00:00', '2023-01-01T00:00:00+00:00', '2023-01-01T00:00:00+00:00', None],
+        'applicable_tariff_in_common_unit_value': [1.0, 2.0, 3.0, 4.0],
+        'last_update_date_time': ['2021-01-01', '2021-06-01', '2021-07-01', '2021-01-01'],
+    })
+    table = TariffTable(tariffs)
+    assert table.lookup('P1', 'entry', 'Yearly', '2021-05-01') == 1.0
+    # The latest update of the same period wins
+    assert table.lookup('P1', 'entry', 'Yearly', '2022-05-01') == 3.0
+    assert table.lookup('P2', 'exit', 'Yearly', '2030-01-01') == 4.0
+    assert np.isnan(table.lookup('P1', 'entry', 'Yearly', '2024-01-01'))
+    assert np.isnan(table.lookup('P3', 'entry', 'Yearly', '2022-05-01'))
+
+    flows = pd.DataFrame({'point_key': ['P1', 'P2', 'P1'], 'direction_key': ['entry', 'exit', 'exit'],
+                          'period_from': pd.to_datetime(['2021-03-01', '2022-03-01', '2022-03-01'], utc=True)})
+    np.testing.assert_array_equal(table.price(flows).to_numpy(), [1.0, 4.0, np.nan])
+
+    table.save(str(tmp_path / 'tariffs.npz'))
+    loaded = TariffTable.load(str(tmp_path / 'tariffs.npz'))
+    np.testing.assert_array_equal(loaded.price(flows).to_numpy(), table.price(flows).to_numpy())
@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+
+def test_routes_shortest_first(topology):
+    routes = list(topology.routes('A', 'D'))
+    assert sorted(map(tuple, routes)) == [('A', 'B', 'D'), ('A', 'C', 'D')]
+    assert topology.neighbours('A') == ['B', 'C']
+
+
+def test_max_flow_and_bottleneck(topology):
+    capacities = {'P1': 10.0, 'P2': 5.0, 'P3': 12.0, 'P4': 4.0, 'P5': 3.0}
+    edges = topology.edges
+    exits = pd.DataFrame({'operator_key': edges['from_operator_key'], 'point_key': edges['from_point_key'],
+                          'direction_key': 'exit', 'value': edges['point_key'].map(capacities)})
+    entries = exits.assign(operator_key=edges['to_operator_key'], point_key=edges['to_point_key'],
+                           direction_key='entry')
+    topology.set_capacities(pd.concat([exits, entries]).assign(indicator='Firm Technical'))
+    total, flows = topology.max_flow('A', 'D')
+    # min(10 + 5, 12) over B plus min(4, 3) over C
+    assert total == 15.0
+    assert topology.bottleneck(['A', 'C', 'D']) == (3.0, ('C', 'D'))
+    with pytest.raises(ValueError):
+        topology.max_flow('A', 'A')
+
+
+def test_update_rebuilds_on_changed_points(topology):
+    version = topology.version
+    assert topology.update(interconnections=topology.edges.assign(from_bz_key=topology.edges['source'],
+                                                                  to_bz_key=topology.edges['target'])) == \
+        {'added': 0, 'removed': 0}
+    assert topology.version == version
+
+    changed = topology.edges.assign(from_bz_key=topology.edges['source'], to_bz_key=topology.edges['target'])
+    changed.loc[0, 'to_point_key'] = 'E-NEW'
+    assert topology.update(interconnections=changed) == {'added': 1, 'removed': 1}
+    assert topology.version == version + 1
+    assert 'E-NEW' in set(topology.edges['to_point_key'])
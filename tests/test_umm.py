@@ -0,0 +1,82 @@
+import json
+import queue
+
+import pandas as pd
+import pytest
+
+from entsog import EntsogPandasClient
+from entsog.server import EntsogServer
+from entsog.umm import NEW, UPDATED, UrgentMarketMessages
+
+
+class MessagesServer(EntsogServer):
+    """
+    EntsogServer whose messages have events spread over January 2022, the last one without an end, and
+    which publishes a new version of the messages in revised
+    """
+
+    revised = ()
+
+    def respond(self, path, query):
+        status, body = super().respond(path, query)
+        if status != 200 or 'urgentmarketmessages' not in path:
+            return status, body
+        payload = json.loads(body)
+        for i, message in enumerate(payload['urgentmarketmessages']):
+            start = pd.Timestamp('2022-01-01', tz='UTC') + pd.Timedelta(days=i)
+            message['eventStart'] = start.isoformat()
+            message['eventStop'] = (start + pd.Timedelta(days=i % 4 + 1)).isoformat() if i < 19 else None
+            if message['messageId'] in self.revised:
+                message['versionNumber'] += 1
+                message['remarks'] = 'Revised'
+        return status, json.dumps(payload)
+
+
+@pytest.fixture
+def messages_server():
+    with MessagesServer(rows=20) as server:
+        yield server
+
+
+def test_update_emits_new_and_updated_messages(messages_server):
+    requests = []
+    updates = queue.Queue()
+    client = EntsogPandasClient(base_url=messages_server.url, retry_delay=0, hooks=[requests.append])
+    messages = UrgentMarketMessages(client, queue=updates)
+
+    first = messages.update()
+    assert len(first) == len(messages) == 20
+    assert set(first['event']) == {NEW}
+    assert updates.get_nowait() is not None
+
+    # An unchanged response is not parsed, but its request is still reported
+    assert messages.update().empty
+    assert updates.empty()
+    assert len(requests) == 2
+
+    revised = list(first['message_id'][:3])
+    messages_server.revised = revised
+    changed = messages.update()
+    assert sorted(changed['message_id']) == sorted(revised)
+    assert set(changed['event']) == {UPDATED}
+    assert len(messages) == 20
+    latest = messages.messages.set_index('message_id')
+    assert (latest.loc[revised, 'remarks'] == 'Revised').all()
+    assert (latest.loc[revised, 'version_number'] == 2).all()
+
+
+@pytest.mark.parametrize('start, end', [('2022-01-05', '2022-01-08'), ('2022-01-10 12:00', '2022-01-11'),
+                                        ('2022-03-01', '2022-04-01'), ('2021-01-01', '2021-02-01')])
+def test_affecting_matches_filter(messages_server, start, end):
+    messages = UrgentMarketMessages(EntsogPandasClient(base_url=messages_server.url, retry_delay=0))
+    messages.update()
+    frame = messages.messages
+    start, end = pd.Timestamp(start, tz='UTC'), pd.Timestamp(end, tz='UTC')
+
+    stop = frame['event_stop'].fillna(pd.Timestamp.max.tz_localize('UTC'))
+    overlapping = (frame['event_start'] < end) & (stop > start)
+    assert sorted(messages.affecting(start, end)['message_id']) == sorted(frame.loc[overlapping, 'message_id'])
+
+    for zone in frame['balancing_zone_key'].unique():
+        expected = frame.loc[overlapping & (frame['balancing_zone_key'] == zone), 'message_id']
+        assert sorted(messages.affecting(start, end, balancing_zone=zone)['message_id']) == sorted(expected)
@@ -0,0 +1,63 @@
+import queue
+
+import pandas as pd
+
+from entsog import EntsogPandasClient
+from entsog.metrics import MetricsRegistry
+from entsog.watch import OperationalDataWatcher
+
+from conftest import EMPTY
+
+NOW = pd.Timestamp('2022-01-01 10:30', tz='UTC')
+
+
+def _point_directions(n, prefix='NL-TSO-0001ITP-'):
+    return [f"{prefix}{i:05d}entry" for i in range(n)]
+
+
+def test_unchanged_poll_emits_nothing(server):
+    updates = queue.Queue()
+    client = EntsogPandasClient(base_url=server.url, retry_delay=0, metrics=MetricsRegistry())
+    watcher = OperationalDataWatcher(client, point_directions=_point_directions(5), queue=updates)
+
+    first = watcher.poll(NOW)
+    assert len(first) == 20
+    assert updates.get_nowait() is not None
+
+    assert watcher.poll(NOW).empty
+    assert updates.empty()
+    assert client.metrics.get('watch_polls_total', result='unchanged') == 1
+
+
+def test_empty_batch_keeps_other_batches(sparse_server):
+    client = EntsogPandasClient(base_url=sparse_server.url, retry_delay=0, max_url_length=400,
+                                metrics=MetricsRegistry())
+    point_directions = _point_directions(20, prefix=EMPTY) + _point_directions(20)
+    watcher = OperationalDataWatcher(client, point_directions=point_directions)
+
+    delta = watcher.poll(NOW)
+    assert len(delta) > 0
+    assert client.metrics.get('watch_polls_total', result='empty') > 0
+    assert client.metrics.get('watch_polls_total', result='changed') > 0
+
+
+def test_run_survives_failing_polls(server):
+    client = EntsogPandasClient(base_url=server.url, retry_delay=0, retry_count=1)
+    watcher = OperationalDataWatcher(client, interval=0, point_directions=_point_directions(5))
+    server.faults = {502: 1.0}
+    watcher.run(polls=2)
+    assert server.requests == 2
+
+
+def test_hourly_period_when_dst_ends(server):
+    client = EntsogPandasClient(base_url=server.url, retry_delay=0)
+    watcher = OperationalDataWatcher(client, point_directions=_point_directions(5))
+    # 02:30 occurs twice in Brussels on 2022-10-30, first at +02:00 and then at +01:00
+    for utc in ['2022-10-30 00:30', '2022-10-30 01:30']:
+        now = pd.Timestamp(utc, tz='UTC').tz_convert('Europe/Brussels')
+        assert watcher._period(now) == pd.Timestamp(utc, tz='UTC').floor('h')
+        watcher.poll(now)
+    assert server.requests == 2
+
+    daily = OperationalDataWatcher(client, period_type='day', point_directions=_point_directions(5))
+    assert daily._period(now) == pd.Timestamp('2022-10-30', tz='Europe/Brussels')